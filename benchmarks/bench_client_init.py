@@ -0,0 +1,36 @@
+"""
+Client construction throughput and logger handler count.
+
+    python benchmarks/bench_client_init.py [--clients 5000]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from spotinst_sdk import SpotinstClient
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=5000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("spotinst_sdk")
+
+    start = time.time()
+    for i in range(args.clients):
+        SpotinstClient(auth_token="dummy-token", account_id="act-{}".format(i))
+    elapsed = time.time() - start
+
+    print("{} clients: {:.3f}s, {:.0f} clients/s".format(
+        args.clients, elapsed, args.clients / elapsed))
+    print("handlers on spotinst_sdk logger: {}".format(len(logger.handlers)))
+    print("handlers on root logger: {}".format(len(logging.getLogger().handlers)))
+
+
+if __name__ == "__main__":
+    main()
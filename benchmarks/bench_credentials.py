@@ -0,0 +1,75 @@
+"""
+Client construction across many profiles of one credentials file, with
+the process-wide credentials cache against parsing the file per client.
+
+    python benchmarks/bench_credentials.py [--profiles 500]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import yaml
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk import spotinst_credentials
+
+
+def report(name, elapsed, clients):
+    print("{}: {:.3f}ms per client, {:.2f}s for {} clients".format(
+        name, elapsed * 1000 / clients, elapsed, clients))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profiles", type=int, default=500)
+    parser.add_argument("--uncached-samples", type=int, default=20,
+                        help="clients timed without the cache, it is slow")
+    args = parser.parse_args()
+
+    # environment credentials take precedence over the file
+    for variable in ("SPOTINST_TOKEN", "SPOTINST_ACCOUNT"):
+        os.environ.pop(variable, None)
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "credentials")
+    profiles = ["profile-{}".format(i) for i in range(args.profiles)]
+
+    try:
+        with open(path, "w") as f:
+            for i, profile in enumerate(profiles):
+                f.write("{}:\n  token: token-{}\n  account: act-{}\n".format(profile, i, i))
+
+        print("libyaml available: {}".format(hasattr(yaml, "CSafeLoader")))
+
+        samples = profiles[:args.uncached_samples]
+
+        # previous behaviour: full loader, file parsed for every client
+        loader = getattr(yaml, "FullLoader", yaml.Loader)
+        start = time.time()
+        for profile in samples:
+            with open(path) as f:
+                yaml.load(f, Loader=loader)[profile]
+        report("parse per client, full loader", time.time() - start, len(samples))
+
+        start = time.time()
+        for profile in samples:
+            spotinst_credentials.clear_cache()
+            SpotinstClient(credentials_file=path, profile=profile)
+        report("parse per client, safe loader", time.time() - start, len(samples))
+
+        spotinst_credentials.clear_cache()
+        start = time.time()
+        for profile in profiles:
+            SpotinstClient(credentials_file=path, profile=profile)
+        report("cached", time.time() - start, len(profiles))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Structural diff of two synthetic fleet states against a naive deep
+comparison.
+
+    python benchmarks/bench_fleet_diff.py [--groups 5000] [--changed 50]
+"""
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from spotinst_sdk.spotinst_fleet import FleetSnapshot
+from spotinst_sdk import spotinst_fleet_diff
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_fleet_index import build_groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--groups", type=int, default=5000)
+    parser.add_argument("--changed", type=int, default=50)
+    args = parser.parse_args()
+
+    old_groups = build_groups(args.groups)
+    new_groups = copy.deepcopy(old_groups)
+
+    rnd = random.Random(11)
+    for group_id in rnd.sample(sorted(new_groups), args.changed):
+        new_groups[group_id]["capacity"]["target"] += 1
+
+    old_snapshot = FleetSnapshot(old_groups, {})
+    new_snapshot = FleetSnapshot(new_groups, {})
+
+    start = time.time()
+    changed = [group_id for group_id in old_groups
+               if old_groups[group_id] != new_groups[group_id]]
+    print("deep compare: {:.3f}ms ({} groups)".format(
+        (time.time() - start) * 1000, len(changed)))
+
+    start = time.time()
+    changes = new_snapshot.diff(old_snapshot)
+    print("snapshot diff: {:.3f}ms ({} changes)".format(
+        (time.time() - start) * 1000, len(changes)))
+
+    start = time.time()
+    old_trees = old_snapshot.hash_trees()
+    new_trees = new_snapshot.hash_trees()
+    print("hash {} groups x2: {:.3f}s".format(args.groups, time.time() - start))
+
+    start = time.time()
+    changes = spotinst_fleet_diff.diff_groups(old_groups, new_groups, old_trees, new_trees)
+    print("diff with prebuilt trees: {:.3f}ms ({} changes)".format(
+        (time.time() - start) * 1000, len(changes)))
+
+
+if __name__ == "__main__":
+    main()
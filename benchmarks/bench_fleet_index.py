@@ -0,0 +1,72 @@
+"""
+Compound query latency of FleetIndex over a synthetic fleet.
+
+    python benchmarks/bench_fleet_index.py [--groups 30000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from spotinst_sdk.spotinst_fleet import FleetSnapshot
+from spotinst_sdk.spotinst_fleet_index import FleetIndex
+
+REGIONS = ["us-east-1", "us-west-2", "eu-west-1", "ap-southeast-1"]
+TYPES = ["c5.large", "c5.xlarge", "c5.4xlarge", "m5.large", "m5.2xlarge", "r5.xlarge"]
+TEAMS = ["search", "ads", "infra", "data", "web", "ml"]
+
+
+def build_groups(count):
+    rnd = random.Random(7)
+    groups = {}
+
+    for i in range(count):
+        region = rnd.choice(REGIONS)
+        group_id = "sig-{:08x}".format(i)
+        groups[group_id] = {
+            "id": group_id,
+            "region": region,
+            "capacity": {"minimum": 0, "maximum": 100, "target": rnd.randint(0, 100)},
+            "compute": {
+                "product": "Linux/UNIX",
+                "instance_types": {"ondemand": rnd.choice(TYPES),
+                                   "spot": rnd.sample(TYPES, 3)},
+                "availability_zones": [{"name": region + "a"}, {"name": region + "b"}],
+                "launch_specification": {"tags": [
+                    {"tag_key": "team", "tag_value": rnd.choice(TEAMS)},
+                    {"tag_key": "env", "tag_value": rnd.choice(["prod", "dev"])}]}}}
+
+    return groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--groups", type=int, default=30000)
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    snapshot = FleetSnapshot(build_groups(args.groups), {})
+
+    start = time.time()
+    index = FleetIndex.build(snapshot)
+    print("build {} groups: {:.3f}s".format(args.groups, time.time() - start))
+
+    start = time.time()
+    for _ in range(args.repeat):
+        result = index.find(region="us-east-1", instance_type="c5.4xlarge",
+                            tags={"team": "search", "env": "prod"})
+    elapsed = (time.time() - start) / args.repeat
+    print("compound find: {:.3f}ms ({} groups)".format(elapsed * 1000, len(result)))
+
+    start = time.time()
+    for _ in range(args.repeat):
+        result = index.capacity_range("target", 40, 45)
+    elapsed = (time.time() - start) / args.repeat
+    print("capacity range: {:.3f}ms ({} groups)".format(elapsed * 1000, len(result)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Packaging benchmark for function bundles on a synthetic 5k file tree,
+write_zip with max_workers=1 (serial) against thread pools.
+
+    python benchmarks/bench_function_zip.py [--files 5000] [--workers 1 2 4 8]
+"""
+import argparse
+import io
+import os
+import random
+import shutil
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from spotinst_sdk import spotinst_functions
+
+
+def build_tree(root, count):
+    rnd = random.Random(42)
+    words = ["".join(rnd.choice(string.ascii_lowercase) for _ in range(8))
+             for _ in range(2000)]
+
+    files = []
+    for i in range(count):
+        directory = os.path.join(root, "pkg_{}".format(i % 50), "sub_{}".format(i % 7))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        size = rnd.randint(200, 16000)
+        text = " ".join(rnd.choice(words) for _ in range(size // 9))
+        path = os.path.join(directory, "module_{}.py".format(i))
+        with open(path, "w") as f:
+            f.write(text)
+
+        files.append((path, os.path.relpath(path, root)))
+
+    return files
+
+
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        fn()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--level", type=int, default=spotinst_functions.DEFAULT_COMPRESSION_LEVEL)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        files = build_tree(root, args.files)
+        print("{} files, {} CPUs".format(len(files), cpu_count()))
+
+        baseline = None
+        for workers in args.workers:
+            elapsed = timed(lambda: spotinst_functions.write_zip(
+                io.BytesIO(), files, compression_level=args.level,
+                max_workers=workers))
+            baseline = baseline or elapsed
+            print("{:<24}{:>10.3f}s  x{:.2f}".format(
+                "max_workers={}".format(workers), elapsed, baseline / elapsed))
+    finally:
+        shutil.rmtree(root)
+
+
+def cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        import multiprocessing
+        return multiprocessing.cpu_count()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Cold import time of spotinst_sdk measured with python -X importtime.
+
+    python benchmarks/bench_import_time.py [--runs 10] [--max-ms 50]
+
+Exits with status 1 when the median exceeds --max-ms or when a heavy
+dependency is imported eagerly, so it can be used as a regression guard.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+HEAVY_MODULES = ("requests", "yaml", "numpy", "multiprocessing.pool")
+
+
+def import_time(module):
+    """
+    :return: (cumulative microseconds, imported module names)
+    """
+    output = subprocess.check_output(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        stderr=subprocess.STDOUT, cwd=ROOT).decode("utf-8")
+
+    cumulative = None
+    imported = set()
+
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, total, name = line.split("|")
+        name = name.strip()
+        imported.add(name)
+
+        if name == module:
+            cumulative = int(total)
+
+    return cumulative, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--module", default="spotinst_sdk")
+    parser.add_argument("--max-ms", type=float)
+    args = parser.parse_args()
+
+    times = []
+    imported = set()
+    for _ in range(args.runs):
+        cumulative, imported = import_time(args.module)
+        times.append(cumulative)
+
+    times.sort()
+    median = times[len(times) // 2] / 1000.0
+    eager = [module for module in HEAVY_MODULES if module in imported]
+
+    print("import {}: median {:.1f}ms, min {:.1f}ms over {} runs".format(
+        args.module, median, times[0] / 1000.0, args.runs))
+    print("heavy modules imported: {}".format(", ".join(eager) or "none"))
+
+    if eager or (args.max_ms is not None and median > args.max_ms):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+Per-request cost of SpotinstClient.send_request with metrics off and on,
+against a stub transport so only the SDK's own work is measured.
+
+    python benchmarks/bench_metrics.py [--requests 50000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk import spotinst_metrics
+
+
+class Response:
+    status_code = 200
+    content = b'{"response": {"items": []}}'
+
+
+def run(client, requests):
+    url = "https://api.spotinst.io/aws/ec2/group/sig-1234/status"
+
+    start = time.time()
+    for _ in range(requests):
+        client.send_request("get", url, params=None, headers=None)
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50000)
+    args = parser.parse_args()
+
+    response = Response()
+    results = []
+
+    for name, metrics in (("disabled", None),
+                          ("in-memory", spotinst_metrics.InMemoryMetrics())):
+        client = SpotinstClient(auth_token="dummy-token", metrics=metrics)
+        client.transport = lambda method, url, **kwargs: response
+
+        elapsed = run(client, args.requests)
+        results.append(elapsed)
+        print("{:>10}: {:.2f}us per request".format(
+            name, elapsed / args.requests * 1e6))
+
+    print("overhead when enabled: {:.2f}us per request".format(
+        (results[1] - results[0]) / args.requests * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Cost of a whole SDK call (get_elastigroup) with tracing off and on,
+against a stub transport so only the SDK's own work is measured.
+
+    python benchmarks/bench_tracing.py [--calls 20000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk import spotinst_tracing
+
+
+class Response:
+    status_code = 200
+    content = json.dumps({"response": {"items": [
+        {"id": "sig-1234", "name": "web", "capacity": {"minimum": 1, "maximum": 10,
+                                                       "target": 2}}]}}).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    response = Response()
+    results = []
+
+    for name, tracer in (("off", None),
+                         ("recording", spotinst_tracing.RecordingTracer())):
+        client = SpotinstClient(auth_token="dummy-token", print_output=False,
+                                tracer=tracer)
+        client.transport = lambda method, url, **kwargs: response
+
+        start = time.time()
+        for _ in range(args.calls):
+            client.get_elastigroup("sig-1234")
+        elapsed = time.time() - start
+
+        results.append(elapsed)
+        print("{:>10}: {:.2f}us per call".format(name, elapsed / args.calls * 1e6))
+
+    print("overhead when recording: {:.2f}us per call".format(
+        (results[1] - results[0]) / args.calls * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -50,6 +50,10 @@ setup(
     keywords='spotinst spot instances aws ec2 cloud infrastructure development elastigroup',
     packages=["spotinst_sdk"],
     install_requires=['requests', 'PyYaml'],
+    extras_require={'analytics': ['numpy']},
+    entry_points={
+        'console_scripts': ['spotinst=spotinst_sdk.cli:main'],
+    },
 
     setup_requires=[] + pytest_runner,
     tests_require=["pytest"]
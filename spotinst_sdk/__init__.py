@@ -1,36 +1,72 @@
+import datetime
+import importlib
 import json
+import logging
 import os
 import re
-
-import requests
-import yaml
-import logging
-import argparse
-
-from spotinst_sdk import aws_elastigroup
-from spotinst_sdk import spotinst_functions
-from spotinst_sdk import spotinst_emr
-from spotinst_sdk import spotinst_stateful
-from spotinst_sdk import spotinst_blue_green_deployment
-from spotinst_sdk import spotinst_deployment_action
-from spotinst_sdk import spotinst_asg
+import sys
+import time
+
+from spotinst_sdk import spotinst_credentials
+from spotinst_sdk import spotinst_executor
+from spotinst_sdk import spotinst_metrics
+from spotinst_sdk import spotinst_tracing
+from spotinst_sdk.version import __version__
+
+# submodules and heavy dependencies (requests, yaml, numpy) are imported on
+# first use so importing the package stays cheap
+LAZY_SUBMODULES = (
+    "aws_elastigroup",
+    "spotinst_functions",
+    "spotinst_emr",
+    "spotinst_stateful",
+    "spotinst_blue_green_deployment",
+    "spotinst_deployment_action",
+    "spotinst_asg",
+    "spotinst_cost",
+    "spotinst_fleet")
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name in LAZY_SUBMODULES:
+            return importlib.import_module("{}.{}".format(__name__, name))
+        raise AttributeError("module {!r} has no attribute {!r}".format(
+            __name__, name))
+else:
+    # no module __getattr__ before 3.7, keep spotinst_sdk.<submodule> working
+    for _submodule in LAZY_SUBMODULES:
+        importlib.import_module("{}.{}".format(__name__, _submodule))
+
+# SpotinstClient reaches submodules as _package.<submodule>, which goes
+# through __getattr__ on first use
+_package = sys.modules[__name__]
+
+# kept as a dict for code reading spotinst_sdk.version['__version__']
+version = dict(__version__=__version__)
+
+none = "d3043820717d74d9a17694c176d39733"
 
 VAR_SPOTINST_SHARED_CREDENTIALS_FILE = 'SPOTINST_SHARED_CREDENTIALS_FILE'
 VAR_SPOTINST_PROFILE = 'SPOTINST_PROFILE'
 VAR_SPOTINST_TOKEN = 'SPOTINST_TOKEN'
 VAR_SPOTINST_ACCOUNT = 'SPOTINST_ACCOUNT'
+VAR_SPOTINST_LOG_LEVEL = 'SPOTINST_LOG_LEVEL'
 
 DEFAULT_PROFILE = 'default'
+DEFAULT_LOG_LEVEL = 'critical'
+LOG_LEVELS = dict(
+    debug=logging.DEBUG,
+    info=logging.INFO,
+    warn=logging.WARN,
+    error=logging.ERROR,
+    critical=logging.CRITICAL)
+DEFAULT_MAX_QUERY_VALUE_LENGTH = 2000
 DEFAULT_CREDENTIALS_FILE = os.path.join(
     os.path.expanduser("~"), '.spotinst', 'credentials')
 
-version = {}
-with open(os.path.join(os.path.dirname(__file__), "./version.py")) as fp:
-    exec(fp.read(), version)
-
 _SpotinstClient__spotinst_sdk_python_agent_name = 'spotinst-sdk-python'
 _SpotinstClient__spotinst_sdk_user_agent = '{}/{}'.format(
-    _SpotinstClient__spotinst_sdk_python_agent_name, version['__version__'])
+    _SpotinstClient__spotinst_sdk_python_agent_name, __version__)
 
 
 class SpotinstClient:
@@ -52,8 +88,12 @@ class SpotinstClient:
                  profile=None,
                  credentials_file=None,
                  print_output=True,
-                 log_level="critical",
-                 user_agent=None):
+                 log_level=None,
+                 user_agent=None,
+                 session=None,
+                 rate_limit=None,
+                 metrics=None,
+                 tracer=None):
         """
 
         :type auth_token: str
@@ -62,7 +102,22 @@ class SpotinstClient:
         :type credentials_file: str
         :type print_output: bool
         :type log_level: str
+        :param log_level: debug, info, warn, error or critical; defaults to
+                          the SPOTINST_LOG_LEVEL environment variable. The
+                          level applies to the shared spotinst_sdk logger
         :type user_agent: str
+        :type session: requests.Session
+        :param session: send requests through this session's connection
+                        pool instead of a new connection per request
+        :type rate_limit: float | spotinst_executor.RateLimiter
+        :param rate_limit: requests per second for every call of the client
+        :type metrics: spotinst_metrics.MetricsSink
+        :param metrics: receives latency, size and status of every request,
+                        e.g. spotinst_metrics.InMemoryMetrics()
+        :type tracer: spotinst_tracing.Tracer
+        :param tracer: opens a span around every API call and sends its
+                       trace id with the request, e.g.
+                       spotinst_tracing.RecordingTracer()
         """
 
         if not auth_token:
@@ -73,20 +128,34 @@ class SpotinstClient:
 
         self.should_print_output = print_output
         self.user_agent = user_agent
+        self.session = session
+        self.rate_limiter = spotinst_executor.resolve_rate_limiter(rate_limit)
+        self.metrics = metrics or spotinst_metrics.NULL_SINK
+        self.tracer = tracer or spotinst_tracing.NULL_TRACER
+        self.kubernetes_cost_cache = dict()
+        self._fleet = None
 
-        # initialize logger
         self.logger = self.init_logger()
-        options = self.get_args()
 
-        if options:
-            self.set_log_level(options)
-        else:
+        log_level = log_level or os.environ.get(VAR_SPOTINST_LOG_LEVEL)
+        if log_level:
             self.set_log_level(log_level)
 
+    @property
+    def fleet(self):
+        """
+        Local fleet inventory with indexed queries, loaded on first use.
+
+        :rtype: spotinst_fleet.Fleet
+        """
+        if self._fleet is None:
+            self._fleet = _package.spotinst_fleet.Fleet(self)
+        return self._fleet
 
     # region EMR
+    @spotinst_tracing.traced
     def create_emr(self, emr):
-        emr = spotinst_emr.EMRCreationRequest(emr)
+        emr = _package.spotinst_emr.EMRCreationRequest(emr)
 
         excluded_group_dict = self.exclude_missing(json.loads(emr.toJSON()))
         
@@ -111,7 +180,56 @@ class SpotinstClient:
 
     # region Kubernetes
 
-    def get_kubernetes_cluster_cost(self, custer_id, from_date, to_date):        
+    @spotinst_tracing.traced
+    def get_kubernetes_cluster_cost(self, custer_id, from_date, to_date,
+                                    window_days=None,
+                                    max_workers=spotinst_executor.DEFAULT_MAX_WORKERS):
+        """
+        With window_days set, the range is split into aligned windows that
+        are fetched concurrently and merged in order. Windows that ended
+        before today are cached on the client, so re-running a report only
+        fetches the uncovered windows.
+
+        :type custer_id: str
+        :type from_date: str
+        :type to_date: str
+        :type window_days: int
+        :type max_workers: int
+        """
+        if not window_days:
+            return self.get_kubernetes_cluster_cost_window(
+                custer_id, from_date, to_date)
+
+        windows = _package.spotinst_cost.split_date_range(
+            from_date, to_date, window_days, aligned=True)
+        today = _package.spotinst_cost.format_date(datetime.date.today())
+
+        def get_window(window):
+            key = (self.account_id, custer_id) + window
+
+            if key in self.kubernetes_cost_cache:
+                return self.kubernetes_cost_cache[key]
+
+            item = self.get_kubernetes_cluster_cost_window(
+                custer_id, window[0], window[1])
+
+            if window[1] < today:
+                self.kubernetes_cost_cache[key] = item
+
+            return item
+
+        results = spotinst_executor.run_batch(
+            get_window, windows, max_workers=max_workers)
+
+        for result in results:
+            if not result.ok:
+                raise result.error
+
+        return _package.spotinst_cost.merge_kubernetes_cluster_costs(
+            [result.result for result in results])
+
+    @spotinst_tracing.traced
+    def get_kubernetes_cluster_cost_window(self, custer_id, from_date, to_date):
         geturl = self.__base_kube_url + "/" + custer_id + "/costs"
         query_params = self.build_query_params_with_input({"toDate":to_date, "fromDate":from_date})
 
@@ -127,8 +245,9 @@ class SpotinstClient:
 
 
     # region Elastigroup
+    @spotinst_tracing.traced
     def create_elastigroup(self, group):        
-        group = aws_elastigroup.ElastigroupCreationRequest(group)
+        group = _package.aws_elastigroup.ElastigroupCreationRequest(group)
 
         excluded_group_dict = self.exclude_missing(json.loads(group.toJSON()))
 
@@ -151,6 +270,7 @@ class SpotinstClient:
 
         return retVal
 
+    @spotinst_tracing.traced
     def scale_elastigroup_up(self, group_id, adjustment):
         query_params = dict({"adjustment": adjustment})
         content = self.send_put_with_params(
@@ -166,6 +286,7 @@ class SpotinstClient:
             content, self.camel_to_underscore)
         return formatted_response["response"]["items"]
 
+    @spotinst_tracing.traced
     def scale_elastigroup_down(self, group_id, adjustment):
         query_params = dict({"adjustment": adjustment})
         content = self.send_put_with_params(
@@ -181,9 +302,9 @@ class SpotinstClient:
             content, self.camel_to_underscore)
         return formatted_response["response"]["items"]
 
+    @spotinst_tracing.traced
     def update_elastigroup(self, group_update, group_id):
-
-        group = aws_elastigroup.ElastigroupUpdateRequest(group_update)
+        group = _package.aws_elastigroup.ElastigroupUpdateRequest(group_update)
 
         excluded_group_update_dict = self.exclude_missing(
             json.loads(group.toJSON()))
@@ -209,16 +330,18 @@ class SpotinstClient:
 
         return retVal
 
+    @spotinst_tracing.traced
     def delete_elastigroup(self, group_id):
         delurl = self.__base_elastigroup_url + "/" + group_id
         response = self.send_delete(url=delurl, entity_name='elastigroup')
         return response
 
+    @spotinst_tracing.traced
     def delete_elastigroup_with_deallocation(
             self, group_id, stateful_deallocation):
         delurl = self.__base_elastigroup_url + "/" + group_id
 
-        deletion_request = aws_elastigroup.ElastigroupDeletionRequest(
+        deletion_request = _package.aws_elastigroup.ElastigroupDeletionRequest(
             stateful_deallocation)
 
         excluded_deletion_dict = self.exclude_missing(
@@ -232,6 +355,7 @@ class SpotinstClient:
 
         return response
 
+    @spotinst_tracing.traced
     def get_elastigroup(self, group_id):
         geturl = self.__base_elastigroup_url + "/" + group_id
         result = self.send_get(url=geturl, entity_name='elastigroup')
@@ -241,6 +365,7 @@ class SpotinstClient:
 
         return formatted_response["response"]["items"][0]
 
+    @spotinst_tracing.traced
     def get_elastigroups(self):
         content = self.send_get(
             url=self.__base_elastigroup_url,
@@ -249,6 +374,7 @@ class SpotinstClient:
             content, self.camel_to_underscore)
         return formatted_response["response"]["items"]
 
+    @spotinst_tracing.traced
     def get_elastigroup_active_instances(self, group_id):
         content = self.send_get(
             url=self.__base_elastigroup_url +
@@ -260,6 +386,7 @@ class SpotinstClient:
             content, self.camel_to_underscore)
         return formatted_response["response"]["items"]
 
+    @spotinst_tracing.traced
     def get_elastigroup_activity(self, group_id, start_date):
         query_params = self.build_query_params_with_input({"fromDate":start_date})
 
@@ -275,8 +402,9 @@ class SpotinstClient:
             content, self.camel_to_underscore)
         return formatted_response["response"]["items"]
 
+    @spotinst_tracing.traced
     def roll_group(self, group_id, group_roll):
-        group_roll_request = aws_elastigroup.ElastigroupRollRequest(
+        group_roll_request = _package.aws_elastigroup.ElastigroupRollRequest(
             group_roll=group_roll)
 
 
@@ -303,6 +431,7 @@ class SpotinstClient:
 
         return retVal
 
+    @spotinst_tracing.traced
     def get_all_group_deployment(self, group_id):
         content = self.send_get(
             url=self.__base_elastigroup_url +
@@ -316,6 +445,7 @@ class SpotinstClient:
         return formatted_response["response"]["items"]
 
 
+    @spotinst_tracing.traced
     def get_deployment_status(self, group_id, roll_id):
         content = self.send_get(
             url=self.__base_elastigroup_url +
@@ -330,6 +460,7 @@ class SpotinstClient:
 
         return formatted_response["response"]["items"]
 
+    @spotinst_tracing.traced
     def stop_deployment(self, group_id, roll_id):
         content = self.send_put(
             url=self.__base_elastigroup_url +
@@ -345,8 +476,9 @@ class SpotinstClient:
 
         return formatted_response["response"]
 
+    @spotinst_tracing.traced
     def create_deployment_action(self, group_id, roll_id, deployment_action):
-        deployment_action_request = spotinst_deployment_action.DeploymentActionRequest(deployment_action)
+        deployment_action_request = _package.spotinst_deployment_action.DeploymentActionRequest(deployment_action)
 
         deployment_action_dict = self.exclude_missing(
             json.loads(deployment_action_request.toJSON()))
@@ -372,6 +504,7 @@ class SpotinstClient:
 
         return retVal
 
+    @spotinst_tracing.traced
     def get_instance_type_by_region(self, region):
         query_params = dict(region=region)
         response = self.send_get(
@@ -386,6 +519,7 @@ class SpotinstClient:
 
         return formatted_response["response"]["items"]
 
+    @spotinst_tracing.traced
     def lock_instance(self, instance_id, lock_time=None):
         query_params= dict(ttlInMinutes=lock_time)
 
@@ -403,6 +537,7 @@ class SpotinstClient:
 
         return formatted_response["response"]["status"]
 
+    @spotinst_tracing.traced
     def unlock_instance(self, instance_id):
         response = self.send_post(
             url=self.__base_url +
@@ -417,6 +552,7 @@ class SpotinstClient:
 
         return formatted_response["response"]["status"]
 
+    @spotinst_tracing.traced
     def enter_instance_standby(self, instance_id):
         response = self.send_post(
             url=self.__base_url + 
@@ -431,6 +567,7 @@ class SpotinstClient:
 
         return formatted_response["response"]["status"]
 
+    @spotinst_tracing.traced
     def exit_instance_standby(self, instance_id):
         response = self.send_post(
             url=self.__base_url + 
@@ -445,6 +582,7 @@ class SpotinstClient:
 
         return formatted_response["response"]["status"]
 
+    @spotinst_tracing.traced
     def get_instance_status(self, instance_id):
         response = self.send_get(
             url=self.__base_url + 
@@ -458,6 +596,7 @@ class SpotinstClient:
 
         return formatted_response["response"]["items"][0]
 
+    @spotinst_tracing.traced
     def get_instance_healthiness(self, group_id):
         response = self.send_get(
             url=self.__base_elastigroup_url +
@@ -472,6 +611,7 @@ class SpotinstClient:
         return formatted_response["response"]["items"][0]  
 
 
+    @spotinst_tracing.traced
     def create_instance_signal(self, instance_id, signal):
         body = dict(instanceId=instance_id, signal=signal)
 
@@ -487,8 +627,58 @@ class SpotinstClient:
 
         return formatted_response["response"]["status"]  
 
+    @spotinst_tracing.traced
+    def lock_instances(self, instance_ids, lock_time=None,
+                       max_workers=spotinst_executor.DEFAULT_MAX_WORKERS,
+                       rate_limit=None):
+        return spotinst_executor.run_batch(
+            lambda instance_id: self.lock_instance(instance_id, lock_time),
+            instance_ids, max_workers=max_workers, rate_limit=rate_limit)
+
+    @spotinst_tracing.traced
+    def unlock_instances(self, instance_ids,
+                         max_workers=spotinst_executor.DEFAULT_MAX_WORKERS,
+                         rate_limit=None):
+        return spotinst_executor.run_batch(
+            self.unlock_instance,
+            instance_ids, max_workers=max_workers, rate_limit=rate_limit)
+
+    @spotinst_tracing.traced
+    def enter_instances_standby(self, instance_ids,
+                                max_workers=spotinst_executor.DEFAULT_MAX_WORKERS,
+                                rate_limit=None):
+        return spotinst_executor.run_batch(
+            self.enter_instance_standby,
+            instance_ids, max_workers=max_workers, rate_limit=rate_limit)
+
+    @spotinst_tracing.traced
+    def exit_instances_standby(self, instance_ids,
+                               max_workers=spotinst_executor.DEFAULT_MAX_WORKERS,
+                               rate_limit=None):
+        return spotinst_executor.run_batch(
+            self.exit_instance_standby,
+            instance_ids, max_workers=max_workers, rate_limit=rate_limit)
+
+    @spotinst_tracing.traced
+    def create_instances_signal(self, instance_ids, signal,
+                                max_workers=spotinst_executor.DEFAULT_MAX_WORKERS,
+                                rate_limit=None):
+        return spotinst_executor.run_batch(
+            lambda instance_id: self.create_instance_signal(instance_id, signal),
+            instance_ids, max_workers=max_workers, rate_limit=rate_limit)
+
+    @spotinst_tracing.traced
+    def get_instances_status(self, instance_ids,
+                             max_workers=spotinst_executor.DEFAULT_MAX_WORKERS,
+                             rate_limit=None):
+        return spotinst_executor.run_batch(
+            self.get_instance_status,
+            instance_ids, max_workers=max_workers, rate_limit=rate_limit)
+
+    @spotinst_tracing.traced
     def get_cost_per_account(self, to_date=None, from_date=None):
-        query_params=dict(toDate=to_date, fromDate=from_date)
+        query_params = self.build_query_params_with_input(
+            dict(toDate=to_date, fromDate=from_date))
 
         response = self.send_get(
             url="https://api.spotinst.io/aws/costs",
@@ -501,8 +691,10 @@ class SpotinstClient:
 
         return formatted_response["response"]["items"]  
 
+    @spotinst_tracing.traced
     def get_cost_per_elastigroup(self, group_id, to_date=None, from_date=None):
-        query_params=dict(toDate=to_date, fromDate=from_date)
+        query_params = self.build_query_params_with_input(
+            dict(toDate=to_date, fromDate=from_date))
 
         response = self.send_get(
             url=self.__base_elastigroup_url +
@@ -517,8 +709,10 @@ class SpotinstClient:
 
         return formatted_response["response"]["items"]   
 
+    @spotinst_tracing.traced
     def get_group_detailed_cost(self, group_id, to_date=None, from_date=None):
-        query_params=dict(toDate=to_date, fromDate=from_date)
+        query_params = self.build_query_params_with_input(
+            dict(toDate=to_date, fromDate=from_date))
 
         response = self.send_get(
             url=self.__base_elastigroup_url +
@@ -533,6 +727,7 @@ class SpotinstClient:
 
         return formatted_response["response"]["items"] 
 
+    @spotinst_tracing.traced
     def get_potential_savings(self):
         response = self.send_get(
             url="https://api.spotinst.io/aws/potentialSavings",
@@ -544,25 +739,47 @@ class SpotinstClient:
 
         return formatted_response["response"]["items"] 
 
-    def get_instance_potential_savings(self, instance_ids, region):
-        instance_str = ""
+    @spotinst_tracing.traced
+    def get_instance_potential_savings(
+            self, instance_ids, region,
+            max_query_length=DEFAULT_MAX_QUERY_VALUE_LENGTH,
+            max_workers=spotinst_executor.DEFAULT_MAX_WORKERS):
+        """
+        Instance ids are split into chunks that keep the query string under
+        max_query_length, fetched in parallel and merged back in order.
 
-        for instance in instance_ids:
-            instance_str += instance + "," 
-        
-        query_params = dict(region=region, instanceIds=instance_str)
+        :type instance_ids: list[str]
+        :type region: str
+        :type max_query_length: int
+        :type max_workers: int
+        """
+        def get_chunk(instance_str):
+            query_params = dict(region=region, instanceIds=instance_str)
 
-        response = self.send_get(
-            url="https://api.spotinst.io/aws/instancePotentialSavings",
-            query_params=query_params,
-            entity_name="saving"
-        )
+            response = self.send_get(
+                url="https://api.spotinst.io/aws/instancePotentialSavings",
+                query_params=query_params,
+                entity_name="saving"
+            )
 
-        formatted_response = self.convert_json(
-            response, self. camel_to_underscore)
+            formatted_response = self.convert_json(
+                response, self. camel_to_underscore)
 
-        return formatted_response["response"]["items"] 
+            return formatted_response["response"]["items"]
 
+        chunks = self.chunk_query_values(instance_ids, max_query_length)
+        results = spotinst_executor.run_batch(
+            get_chunk, chunks, max_workers=max_workers)
+
+        items = []
+        for result in results:
+            if not result.ok:
+                raise result.error
+            items.extend(result.result)
+
+        return items
+
+    @spotinst_tracing.traced
     def list_suspended_scaling_policies(self, group_id):
         response = self.send_get(
             url=self.__base_elastigroup_url +
@@ -576,6 +793,7 @@ class SpotinstClient:
 
         return formatted_response["response"]["items"]   
 
+    @spotinst_tracing.traced
     def suspend_scaling_policies(self, group_id, policy_name):
         query_params = dict(policyName=policy_name)
 
@@ -592,6 +810,7 @@ class SpotinstClient:
 
         return formatted_response["response"]["items"][0]
 
+    @spotinst_tracing.traced
     def resume_suspended_scaling_policies(self, group_id, policy_name):
         query_params = dict(policyName=policy_name)
 
@@ -608,6 +827,7 @@ class SpotinstClient:
 
         return formatted_response["response"]["status"]
 
+    @spotinst_tracing.traced
     def list_suspended_process(self, group_id):
         response = self.send_get(
             url=self.__base_elastigroup_url +
@@ -621,6 +841,7 @@ class SpotinstClient:
 
         return formatted_response["response"]["items"]
 
+    @spotinst_tracing.traced
     def suspend_process(self, group_id, processes, suspensions):
         body = dict(suspensions=suspensions, processes=processes)
         
@@ -637,6 +858,7 @@ class SpotinstClient:
 
         return formatted_response["response"]["items"]
 
+    @spotinst_tracing.traced
     def remove_suspended_process(self, group_id, processes):
         body = dict(processes=processes)
 
@@ -653,9 +875,9 @@ class SpotinstClient:
 
         return formatted_response
 
+    @spotinst_tracing.traced
     def detach_elastigroup_instances(self, group_id, detach_configuration):
-
-        group_detach_request = aws_elastigroup.ElastigroupDetachInstancesRequest(
+        group_detach_request = _package.aws_elastigroup.ElastigroupDetachInstancesRequest(
             detach_configuration=detach_configuration)
 
         excluded_group_detach_dict = self.exclude_missing(
@@ -681,8 +903,9 @@ class SpotinstClient:
 
         return retVal
 
+    @spotinst_tracing.traced
     def import_stateful_instance(self, stateful_instance):
-        stateful_instance = spotinst_stateful.StatefulImportRequest(stateful_instance)
+        stateful_instance = _package.spotinst_stateful.StatefulImportRequest(stateful_instance)
 
         excluded_group_dict = self.exclude_missing(json.loads(stateful_instance.toJSON()))
 
@@ -703,6 +926,7 @@ class SpotinstClient:
 
         return retVal
 
+    @spotinst_tracing.traced
     def get_stateful_import_status(self, stateful_migration_id):
         content = self.send_get(
             url=self.__base_stateful_url +
@@ -715,6 +939,7 @@ class SpotinstClient:
 
         return formatted_response["response"]["items"] 
 
+    @spotinst_tracing.traced
     def delete_stateful_import(self, stateful_migration_id):
         content = self.send_delete(
             url=self.__base_stateful_url +
@@ -726,6 +951,7 @@ class SpotinstClient:
             content, self.camel_to_underscore)
         return formatted_response
 
+    @spotinst_tracing.traced
     def deallocate_stateful_instance(self, group_id, stateful_instance_id):
         content = self.send_put(
             url=self.__base_elastigroup_url +
@@ -740,6 +966,7 @@ class SpotinstClient:
             content, self.camel_to_underscore)
         return formatted_response["response"]
 
+    @spotinst_tracing.traced
     def recycle_stateful_instance(self, group_id, stateful_instance_id):
         content = self.send_put(
             url=self.__base_elastigroup_url +
@@ -755,6 +982,7 @@ class SpotinstClient:
         return formatted_response["response"]
 
 
+    @spotinst_tracing.traced
     def get_stateful_instances(self, group_id):
         content = self.send_get(
             url=self.__base_elastigroup_url +
@@ -767,6 +995,7 @@ class SpotinstClient:
             content, self.camel_to_underscore)
         return formatted_response["response"]["items"]           
 
+    @spotinst_tracing.traced
     def resume_stateful_instance(self, group_id, stateful_instance_id):
         content = self.send_put(
             url=self.__base_elastigroup_url +
@@ -781,6 +1010,7 @@ class SpotinstClient:
             content, self.camel_to_underscore)
         return formatted_response["response"]
 
+    @spotinst_tracing.traced
     def pause_stateful_instance(self, group_id, stateful_instance_id):
         content = self.send_put(
             url=self.__base_elastigroup_url +
@@ -798,6 +1028,7 @@ class SpotinstClient:
 
 
 
+    @spotinst_tracing.traced
     def beanstalk_maintenance_status(self, group_id):
         
         status_response = self.send_get(
@@ -815,6 +1046,7 @@ class SpotinstClient:
         return retVal
 
 
+    @spotinst_tracing.traced
     def beanstalk_maintenance_start(self, group_id):
 
         start_response = self.send_put(
@@ -832,6 +1064,7 @@ class SpotinstClient:
 
         return retVal
 
+    @spotinst_tracing.traced
     def beanstalk_maintenance_finish(self, group_id):   
 
         finish_response = self.send_put(
@@ -849,6 +1082,7 @@ class SpotinstClient:
 
         return retVal
 
+    @spotinst_tracing.traced
     def beanstalk_import(self, region, env_id=None, env_name=None):
         query_params = dict(region=region, environmentId=env_id, environmentName=env_name)
 
@@ -866,6 +1100,7 @@ class SpotinstClient:
 
         return retVal
 
+    @spotinst_tracing.traced
     def beanstalk_reimport(self, group_id):
         response = self.send_put(
             url=self.__base_elastigroup_url +
@@ -881,10 +1116,11 @@ class SpotinstClient:
 
         return retVal
 
+    @spotinst_tracing.traced
     def import_asg(self, region, asg_name, asg, dry_run=None):
         query_params = dict(region=region, autoScalingGroupName=asg_name, dryRun=dry_run)
 
-        asg = spotinst_asg.ImportASGRequest(asg)
+        asg = _package.spotinst_asg.ImportASGRequest(asg)
 
         excluded_group_dict = self.exclude_missing(json.loads(asg.toJSON()))
 
@@ -909,6 +1145,7 @@ class SpotinstClient:
 
         return retVal
 
+    @spotinst_tracing.traced
     def get_activity_events(self, group_id, from_date):
         query_params = dict(fromDate=from_date)
 
@@ -926,6 +1163,7 @@ class SpotinstClient:
 
         return retVal
 
+    @spotinst_tracing.traced
     def ami_backup(self, group_id):
         response = self.send_post(
             url=self.__base_elastigroup_url +
@@ -942,8 +1180,9 @@ class SpotinstClient:
 
         return retVal["response"]["status"]
 
+    @spotinst_tracing.traced
     def create_blue_green_deployment(self, group_id, blue_green_deployment):
-        blue_green_deployment = spotinst_blue_green_deployment.BlueGreenDeploymentRequest(blue_green_deployment)
+        blue_green_deployment = _package.spotinst_blue_green_deployment.BlueGreenDeploymentRequest(blue_green_deployment)
 
         excluded_group_dict = self.exclude_missing(json.loads(blue_green_deployment.toJSON()))
 
@@ -966,6 +1205,7 @@ class SpotinstClient:
 
         return retVal
 
+    @spotinst_tracing.traced
     def get_blue_green_deployment(self, group_id):
         response = self.send_get(
             url= self.__base_elastigroup_url + "/" + group_id + "/codeDeploy/blueGreenDeployment",
@@ -978,6 +1218,7 @@ class SpotinstClient:
 
         return retVal
 
+    @spotinst_tracing.traced
     def stop_blue_green_deployment(self, group_id, deployment_id):
         response = self.send_put(
             url=self.__base_elastigroup_url + "/" + group_id + "/codeDeploy/blueGreenDeployment/" + deployment_id + "/stop",
@@ -997,9 +1238,10 @@ class SpotinstClient:
     # endregion
 
     # region Functions
+    @spotinst_tracing.traced
     def create_application(self, app):
 
-        app = spotinst_functions.ApplicationCreationRequest(app)
+        app = _package.spotinst_functions.ApplicationCreationRequest(app)
 
         excluded_group_dict = self.exclude_missing(json.loads(app.toJSON()))
 
@@ -1023,9 +1265,10 @@ class SpotinstClient:
 
         return retVal
 
+    @spotinst_tracing.traced
     def create_environment(self, env):
 
-        env = spotinst_functions.EnvironmentCreationRequest(env)
+        env = _package.spotinst_functions.EnvironmentCreationRequest(env)
 
         excluded_env_dict = self.exclude_missing(json.loads(env.toJSON()))
 
@@ -1049,30 +1292,96 @@ class SpotinstClient:
 
         return retVal
 
-    def create_function(self, fx):
-        fx = spotinst_functions.FunctionCreationRequest(fx, self.should_print_output)
+    @spotinst_tracing.traced
+    def create_function(self, fx,
+                        compression_level=None,
+                        max_workers=None,
+                        bundle_cache=None,
+                        ignore_patterns=None):
+        """
+        Files matching the directory's .spotinstignore, ignore_patterns or
+        the default patterns (vcs directories, __pycache__, *.pyc) are left
+        out of the bundle.
+
+        With a bundle_cache, an unchanged source tree reuses the cached
+        encoded bundle, and an unchanged function is not redeployed: the
+        result of its last deployment is returned instead.
+
+        :type fx: spotinst_functions.Function
+        :type compression_level: int
+        :param compression_level: defaults to DEFAULT_COMPRESSION_LEVEL
+        :type max_workers: int
+        :param max_workers: threads compressing bundle files, defaults to
+                            DEFAULT_ZIP_WORKERS
+        :type bundle_cache: spotinst_functions.BundleCache
+        :type ignore_patterns: list[str]
+        """
+        if compression_level is None:
+            compression_level = _package.spotinst_functions.DEFAULT_COMPRESSION_LEVEL
+        if max_workers is None:
+            max_workers = _package.spotinst_functions.DEFAULT_ZIP_WORKERS
+
+        fx = _package.spotinst_functions.FunctionCreationRequest(
+            fx, self.should_print_output,
+            compression_level=compression_level, max_workers=max_workers,
+            bundle_cache=bundle_cache, ignore_patterns=ignore_patterns)
+
+        return self.send_function_creation(fx)
+
+    @spotinst_tracing.traced
+    def send_function_creation(self, fx):
+        """
+        Upload an already packaged function. The request's bundle is
+        closed afterwards.
+
+        :type fx: spotinst_functions.FunctionCreationRequest
+        """
+        try:
+            return self.upload_function(fx)
+        finally:
+            fx.close()
+
+    def upload_function(self, fx):
+        bundle_cache = fx.bundle_cache
 
         excluded_fx_dict = self.exclude_missing(json.loads(fx.toJSON()))
 
         formatted_fx_dict = self.convert_json(
             excluded_fx_dict, self.underscore_to_camel)
 
-        body_json = json.dumps(formatted_fx_dict)
+        body_json = json.dumps(formatted_fx_dict, sort_keys=True)
 
-        formatted_fx_dict['function']['code']['source'] = 'INLINE_BASE64_SOURCE_CODE'
-        self.print_output(json.dumps(formatted_fx_dict))
+        self.print_output(body_json)
 
-        fx_response = self.send_post(
-            body=body_json,
-            url=self.__base_functions_url +
-            '/function',
-            entity_name='function')
+        if bundle_cache is not None:
+            deployment_key = "{}/{}/{}".format(
+                self.account_id, fx.function.environment_id, fx.function.name)
+            deployment_hash = bundle_cache.deployment_hash(
+                body_json, fx.bundle_hash)
+
+            retVal = bundle_cache.get_deployment(deployment_key, deployment_hash)
+
+            if retVal is not None:
+                self.print_output(
+                    "function {} unchanged, skipping deployment".format(
+                        fx.function.name), "info")
+                return retVal
+
+        with fx.build_body(body_json) as body:
+            fx_response = self.send_post(
+                body=body,
+                url=self.__base_functions_url +
+                '/function',
+                entity_name='function')
 
         formatted_response = self.convert_json(
             fx_response, self.camel_to_underscore)
 
         retVal = formatted_response["response"]["items"][0]
 
+        if bundle_cache is not None:
+            bundle_cache.put_deployment(deployment_key, deployment_hash, retVal)
+
         return retVal
 
     # endregion
@@ -1082,151 +1391,176 @@ class SpotinstClient:
         if self.should_print_output is True:
             print(output)
 
+    def send_request(self, method, url, **kwargs):
+        """
+        Every API call goes through here, so a shared session and rate
+        limiter apply to all of them.
+
+        :type method: str
+        :param method: get, post, put or delete
+        """
+        if self.tracer.enabled:
+            with self.tracer.phase(spotinst_tracing.NETWORK):
+                return self.measure_request(method, url, **kwargs)
+
+        return self.measure_request(method, url, **kwargs)
+
+    def measure_request(self, method, url, **kwargs):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+        metrics = self.metrics
+        if not metrics.enabled:
+            return self.transport(method, url, **kwargs)
+
+        endpoint = spotinst_metrics.endpoint_of(url)
+        request_bytes = spotinst_metrics.body_size(kwargs.get("data"))
+        status = spotinst_metrics.STATUS_ERROR
+        response_bytes = 0
+
+        metrics.request_started(method, endpoint)
+        started = time.time()
+        try:
+            result = self.transport(method, url, **kwargs)
+            status = result.status_code
+            response_bytes = len(result.content or b"")
+            return result
+        finally:
+            metrics.request_finished(method, endpoint, status, time.time() - started,
+                                     request_bytes, response_bytes)
+
+    def transport(self, method, url, **kwargs):
+        if self.session is not None:
+            return self.session.request(method.upper(), url, **kwargs)
+
+        # the only place requests is needed outside a caller's session
+        import requests
+
+        return getattr(requests, method)(url, **kwargs)
+
     def send_get(self, url,entity_name,query_params=None):
-        agent = self.resolve_user_agent()
         query_params = query_params or self.build_query_params()
-        headers = dict(
-            {
-                'User-Agent': agent,
-                'Content-Type': 'application/json',
-                'Authorization': 'Bearer ' + self.auth_token
-            }
-        )
+        headers = self.build_headers()
 
         self.print_output("Sending get request to spotinst API.")
-        result = requests.get(url, params=query_params, headers=headers)
+        result = self.send_request("get", url, params=query_params, headers=headers)
 
-        if result.status_code == requests.codes.ok:
+        if result.status_code == 200:
             self.print_output("Success")
-            data = json.loads(result.content.decode('utf-8'))
-            return data
+            return self.decode_response(result)
         else:
             self.handle_exception("getting {}".format(entity_name), result)
 
     def send_delete(self, url, entity_name, body=None):
-        agent = self.resolve_user_agent()
         query_params = self.build_query_params()
-        headers = dict(
-            {
-                'User-Agent': agent,
-                'Content-Type': 'application/json',
-                'Authorization': 'Bearer ' + self.auth_token
-            }
-        )
+        headers = self.build_headers()
 
         self.print_output("Sending deletion request to spotinst API.")
 
-        result = requests.delete(url, params=query_params, body=body, headers=headers)
+        result = self.send_request("delete", url, params=query_params, data=body, headers=headers)
 
-        if result.status_code == requests.codes.ok:
+        if result.status_code == 200:
             self.print_output("Success")
             return True
         else:
             self.handle_exception("deleting {}".format(entity_name), result)
 
     def send_delete_with_body(self, body, url, entity_name):
-        agent = self.resolve_user_agent()
         query_params = self.build_query_params()
-        headers = dict(
-            {
-                'User-Agent': agent,
-                'Content-Type': 'application/json',
-                'Authorization': 'Bearer ' + self.auth_token
-            }
-        )
+        headers = self.build_headers()
 
         self.print_output("Sending deletion request to spotinst API.")
 
-        result = requests.delete(
+        result = self.send_request(
+            "delete",
             url,
             params=query_params,
             headers=headers,
             data=body)
 
-        if result.status_code == requests.codes.ok:
+        if result.status_code == 200:
             self.print_output("Success")
             return True
         else:
             self.handle_exception("deleting {}".format(entity_name), result)
 
     def send_post(self, url, entity_name, body=None, query_params=None):
-        agent = self.resolve_user_agent()
         query_params = query_params or self.build_query_params()
-        headers = dict(
-            {
-                'User-Agent': agent,
-                'Content-Type': 'application/json',
-                'Authorization': 'Bearer ' + self.auth_token
-            }
-        )
+        headers = self.build_headers()
 
         self.print_output("Sending post request to spotinst API.")
 
-        result = requests.post(
+        result = self.send_request(
+            "post",
             url,
             params=query_params,
             data=body,
             headers=headers)
 
-        if result.status_code == requests.codes.ok:
+        if result.status_code == 200:
             self.print_output("Success")
-            data = json.loads(result.content.decode('utf-8'))
-            return data
+            return self.decode_response(result)
         else:
             self.handle_exception("creating {}".format(entity_name), result)
 
     def send_put(self, url, entity_name, body=None):
-        agent = self.resolve_user_agent()
         query_params = self.build_query_params()
-        headers = dict(
-            {
-                'User-Agent': agent,
-                'Content-Type': 'application/json',
-                'Authorization': 'Bearer ' + self.auth_token
-            }
-        )
+        headers = self.build_headers()
 
         self.print_output("Sending put request to spotinst API.")
-        result = requests.put(
+        result = self.send_request(
+            "put",
             url,
             params=query_params,
             data=body,
             headers=headers)
 
-        if result.status_code == requests.codes.ok:
+        if result.status_code == 200:
             self.print_output("Success")
-            data = json.loads(result.content.decode('utf-8'))
-            return data
+            return self.decode_response(result)
         else:
             self.handle_exception("updating {}".format(entity_name), result)
 
     def send_put_with_params(self, body, url, entity_name, user_query_params):
-        agent = self.resolve_user_agent()
         query_params = self.build_query_params_with_input(user_query_params)
-
-        headers = dict(
-            {
-                'User-Agent': agent,
-                'Content-Type': 'application/json',
-                'Authorization': 'Bearer ' + self.auth_token
-            }
-        )
+        headers = self.build_headers()
 
         self.print_output("Sending put request to spotinst API.")
 
-        result = requests.put(
+        result = self.send_request(
+            "put",
             url,
             params=query_params,
             data=body,
             headers=headers)
 
-        if result.status_code == requests.codes.ok:
+        if result.status_code == 200:
             self.print_output("Success")
-            data = json.loads(result.content.decode('utf-8'))
-            return data
+            return self.decode_response(result)
         else:
             self.handle_exception("updating {}".format(entity_name), result)
 
+    def build_headers(self):
+        headers = dict(
+            {
+                'User-Agent': self.resolve_user_agent(),
+                'Content-Type': 'application/json',
+                'Authorization': 'Bearer ' + self.auth_token
+            }
+        )
+
+        if self.tracer.enabled:
+            self.tracer.inject(headers)
+
+        return headers
+
+    def decode_response(self, result):
+        if self.tracer.enabled:
+            with self.tracer.phase(spotinst_tracing.DECODE):
+                return json.loads(result.content.decode('utf-8'))
+
+        return json.loads(result.content.decode('utf-8'))
+
     def resolve_user_agent(self):
         global _SpotinstClient__spotinst_sdk_user_agent
         agent = _SpotinstClient__spotinst_sdk_user_agent
@@ -1248,6 +1582,15 @@ class SpotinstClient:
             response_json)
 
     def convert_json(self, val, convert):
+        # only response key conversion is a phase of its own, request
+        # bodies are converted within serialize
+        if self.tracer.enabled and convert == self.camel_to_underscore:
+            with self.tracer.phase(spotinst_tracing.CONVERT):
+                return self.convert_keys(val, convert)
+
+        return self.convert_keys(val, convert)
+
+    def convert_keys(self, val, convert):
         new_json = {}
         if val is None:
             return val
@@ -1257,11 +1600,11 @@ class SpotinstClient:
         for k, v in list(val.items()):
             new_v = v
             if isinstance(v, dict):
-                new_v = self.convert_json(v, convert)
+                new_v = self.convert_keys(v, convert)
             elif isinstance(v, list):
                 new_v = list()
                 for x in v:
-                    new_v.append(self.convert_json(x, convert))
+                    new_v.append(self.convert_keys(x, convert))
             new_json[convert(k)] = new_v
         return new_json
 
@@ -1273,7 +1616,7 @@ class SpotinstClient:
             for key, value in list(obj.items()):
 
                 # Remove none values
-                if value == aws_elastigroup.none:
+                if value == none:
                     del obj[key]
 
                 # Handle Objects
@@ -1295,6 +1638,30 @@ class SpotinstClient:
                 hasattr(arg, "__getitem__") or
                 hasattr(arg, "__iter__"))
 
+    @staticmethod
+    def chunk_query_values(values, max_length):
+        """
+        Join values into comma separated strings whose url-encoded length
+        (commas become %2C) stays within max_length.
+        """
+        chunk = []
+        length = 0
+
+        for value in values:
+            value_length = len(value) + (len(chunk) and 3)
+
+            if chunk and length + value_length > max_length:
+                yield ",".join(chunk)
+                chunk = []
+                value_length = len(value)
+                length = 0
+
+            chunk.append(value)
+            length += value_length
+
+        if chunk:
+            yield ",".join(chunk)
+
     def build_query_params(self):
         query_params = None
         if self.account_id is not None:
@@ -1327,36 +1694,29 @@ class SpotinstClient:
 
     @staticmethod
     def init_logger():
-        logging.basicConfig(level=logging.CRITICAL)
+        # the handler is added once per process, not per client
         logger = logging.getLogger(__name__)
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter('%(asctime)s %(name)-12s %(levelname)-8s %(message)s')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+
+        if not any(getattr(handler, "spotinst_handler", False)
+                   for handler in logger.handlers):
+            handler = logging.StreamHandler()
+            handler.spotinst_handler = True
+            formatter = logging.Formatter('%(asctime)s %(name)-12s %(levelname)-8s %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+            logger.setLevel(LOG_LEVELS[DEFAULT_LOG_LEVEL])
+
         return logger
 
-    @staticmethod
-    def get_args():
-        parser = argparse.ArgumentParser(description='Options for Spotinst python-sdk')
-        parser.add_argument('--log-level',
-                            choices=["debug", "info", "warn", "error", "critical"],
-                            help='set log level: debug, info, warn, error, critical')
-        args = parser.parse_args()
-        return args
-
-    def set_log_level(self, args):
-        level = vars(args)['log_level']
-
-        if level == "debug":
-            self.logger.setLevel(logging.DEBUG)
-        if level == "info":
-            self.logger.setLevel(logging.INFO)
-        if level == "warn":
-            self.logger.setLevel(logging.WARN)
-        if level == "error":
-            self.logger.setLevel(logging.ERROR)
-        if level == "critical":
-            self.logger.setLevel(logging.CRITICAL)
+    def set_log_level(self, level):
+        """
+        :type level: str
+        """
+        if level.lower() not in LOG_LEVELS:
+            raise ValueError("unknown log level {}, expected one of {}".format(
+                level, ", ".join(sorted(LOG_LEVELS))))
+
+        self.logger.setLevel(LOG_LEVELS[level.lower()])
 
     @staticmethod
     def merge_two_dicts(x, y):
@@ -1383,15 +1743,11 @@ class SpotinstClient:
                     VAR_SPOTINST_SHARED_CREDENTIALS_FILE,
                     DEFAULT_CREDENTIALS_FILE)
 
-            with open(credentials_file, 'r') as credentials_file:
-                config = yaml.load(credentials_file)
+            config = spotinst_credentials.load_profiles(credentials_file)
+            profile_config = config.get(profile) or {}
 
-                if config:
-                    self.account_id = config.get(
-                        profile, {}).get(
-                        "account", None)
-                    self.auth_token = config.get(
-                        profile, {}).get("token", None)
+            self.account_id = profile_config.get("account", None)
+            self.auth_token = profile_config.get("token", None)
 
             if not self.auth_token:
                 raise SpotinstClientException("failed to load credentials")
@@ -1400,7 +1756,8 @@ class SpotinstClient:
 
 
 class SpotinstClientException(Exception):
-    def __init__(self, message, response):
-        message = message + "\n" + response
+    def __init__(self, message, response=None):
+        if response is not None:
+            message = message + "\n" + response
         # Call the base class constructor with the parameters it needs
         super(SpotinstClientException, self).__init__(message)
\ No newline at end of file
@@ -0,0 +1,226 @@
+"""
+spotinst - run batches of Spotinst operations.
+
+Operations are read as JSON lines from a file or stdin, one per line:
+
+    {"op": "scale", "group_id": "sig-1", "adjustment": -2}
+    {"op": "roll", "group_id": "sig-1", "batch_size_percentage": 20}
+    {"op": "lock", "instance_id": "i-1", "lock_time": 30}
+    {"op": "detach", "group_id": "sig-1", "instances_to_detach": ["i-1"]}
+    {"op": "get", "group_id": "sig-1", "what": "instances"}
+
+and executed concurrently. One NDJSON result is written per operation, in
+input order, as soon as it is done:
+
+    {"line": 1, "op": "scale", "ok": true, "result": ..., "elapsed": 0.21}
+
+A summary line is printed to stderr once every operation is done.
+
+An optional "id" field of an operation is copied to its result.
+"""
+import argparse
+import json
+import sys
+import time
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk import aws_elastigroup
+from spotinst_sdk import spotinst_executor
+
+LOG_LEVELS = ["debug", "info", "warn", "error", "critical"]
+
+
+class OperationError(Exception):
+    pass
+
+
+def run_scale(client, op):
+    adjustment = int(op["adjustment"])
+
+    if adjustment == 0:
+        raise OperationError("adjustment must not be 0")
+    if adjustment > 0:
+        return client.scale_elastigroup_up(op["group_id"], adjustment)
+    return client.scale_elastigroup_down(op["group_id"], -adjustment)
+
+
+def run_roll(client, op):
+    roll = aws_elastigroup.Roll(
+        batch_size_percentage=op.get("batch_size_percentage", aws_elastigroup.none),
+        grace_period=op.get("grace_period", aws_elastigroup.none),
+        health_check_type=op.get("health_check_type", aws_elastigroup.none))
+    return client.roll_group(op["group_id"], roll)
+
+
+def run_lock(client, op):
+    return client.lock_instance(op["instance_id"], op.get("lock_time"))
+
+
+def run_detach(client, op):
+    configuration = aws_elastigroup.DetachConfiguration(
+        instances_to_detach=op["instances_to_detach"],
+        should_terminate_instances=op.get(
+            "should_terminate_instances", aws_elastigroup.none),
+        draining_timeout=op.get("draining_timeout", aws_elastigroup.none),
+        should_decrement_target_capacity=op.get(
+            "should_decrement_target_capacity", aws_elastigroup.none))
+    return client.detach_elastigroup_instances(op["group_id"], configuration)
+
+
+def run_get(client, op):
+    what = op.get("what", "group")
+
+    if what == "group":
+        return client.get_elastigroup(op["group_id"])
+    if what == "instances":
+        return client.get_elastigroup_active_instances(op["group_id"])
+    if what == "groups":
+        return client.get_elastigroups()
+
+    raise OperationError("unknown get target {}".format(what))
+
+
+OPERATIONS = {
+    "scale": run_scale,
+    "roll": run_roll,
+    "lock": run_lock,
+    "detach": run_detach,
+    "get": run_get,
+}
+
+
+def read_operations(lines):
+    """
+    :type lines: iterable
+    :rtype: collections.Iterable[tuple]
+    :return: (line number, operation dict or parse error)
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        try:
+            op = json.loads(line)
+            if not isinstance(op, dict):
+                raise ValueError("operation must be a JSON object")
+        except ValueError as e:
+            yield number, OperationError("invalid operation: {}".format(e))
+            continue
+
+        yield number, op
+
+
+def execute(client, item):
+    number, op = item
+
+    if isinstance(op, Exception):
+        raise op
+
+    fn = OPERATIONS.get(op.get("op"))
+    if fn is None:
+        raise OperationError("unknown op {!r}, expected one of {}".format(
+            op.get("op"), ", ".join(sorted(OPERATIONS))))
+
+    try:
+        return fn(client, op)
+    except KeyError as e:
+        raise OperationError("missing field {}".format(e))
+
+
+def format_result(result):
+    number, op = result.key
+
+    record = dict(line=number, ok=result.ok, elapsed=round(result.elapsed or 0, 4))
+
+    if isinstance(op, dict):
+        record["op"] = op.get("op")
+        if "id" in op:
+            record["id"] = op["id"]
+
+    if result.ok:
+        record["result"] = result.result
+    else:
+        record["error"] = str(result.error)
+
+    return json.dumps(record, sort_keys=True, default=str)
+
+
+def positive_float(value):
+    try:
+        number = float(value)
+    except ValueError:
+        number = None
+
+    if number is None or number <= 0:
+        raise argparse.ArgumentTypeError("must be a positive number, got {}".format(value))
+    return number
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="spotinst", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", nargs="?", default="-",
+                        help="JSONL file of operations, - for stdin (default)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="NDJSON results file, - for stdout (default)")
+    parser.add_argument("-c", "--concurrency", type=int,
+                        default=spotinst_executor.DEFAULT_MAX_WORKERS,
+                        help="operations in flight")
+    parser.add_argument("-r", "--rate-limit", type=positive_float,
+                        help="maximum API calls per second")
+    parser.add_argument("--profile", help="credentials profile")
+    parser.add_argument("--credentials-file", help="credentials file")
+    parser.add_argument("--account-id", help="overrides the profile's account")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default="critical")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    :rtype: int
+    :return: 0 when every operation succeeded, 1 otherwise
+    """
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    client = SpotinstClient(profile=args.profile,
+                            credentials_file=args.credentials_file,
+                            print_output=False,
+                            log_level=args.log_level)
+    if args.account_id:
+        client.account_id = args.account_id
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r")
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+
+    started = time.time()
+    total = failed = 0
+
+    try:
+        results = spotinst_executor.iter_batch(
+            lambda item: execute(client, item), read_operations(source),
+            max_workers=args.concurrency, rate_limit=args.rate_limit)
+
+        for result in results:
+            total += 1
+            if not result.ok:
+                failed += 1
+
+            output.write(format_result(result) + "\n")
+            output.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+    # stderr, so the summary never mixes with results written to stdout
+    sys.stderr.write("{} operations, {} failed in {:.2f}s\n".format(
+        total, failed, time.time() - started))
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,372 @@
+import datetime
+import heapq
+from array import array
+from collections import OrderedDict
+
+from spotinst_sdk import spotinst_executor
+
+# imported on first use by load_numpy(), it dominates import time otherwise
+numpy = None
+_numpy_loaded = False
+
+DIMENSIONS = ("group_id", "day", "instance_type", "lifecycle")
+MEASURES = ("actual", "potential", "running_hours")
+
+DATE_FORMAT = "%Y-%m-%d"
+
+LIFECYCLE_SPOT = "spot"
+LIFECYCLE_ON_DEMAND = "od"
+
+
+class CostTable:
+    def __init__(self, use_numpy=True):
+        """
+        Columnar store for cost items. Dimensions are dictionary encoded
+        into integer columns, measures are kept as float columns, so
+        aggregations run over flat arrays (vectorized when NumPy is
+        available).
+
+        :type use_numpy: bool
+        """
+        self.use_numpy = use_numpy and load_numpy() is not None
+
+        self._codes = dict((dimension, array('l')) for dimension in DIMENSIONS)
+        self._values = dict((dimension, []) for dimension in DIMENSIONS)
+        self._lookup = dict((dimension, {}) for dimension in DIMENSIONS)
+        self._measures = dict((measure, array('d')) for measure in MEASURES)
+
+    def __len__(self):
+        return len(self._measures["actual"])
+
+    # region Loaders
+    def add_row(self, group_id=None, day=None, instance_type=None,
+                lifecycle=None, actual=0, potential=0, running_hours=0):
+        row = dict(group_id=group_id, day=day, instance_type=instance_type,
+                   lifecycle=lifecycle)
+
+        for dimension in DIMENSIONS:
+            self._codes[dimension].append(self._encode(dimension, row[dimension]))
+
+        self._measures["actual"].append(to_float(actual))
+        self._measures["potential"].append(to_float(potential))
+        self._measures["running_hours"].append(to_float(running_hours))
+
+    def add_account_costs(self, items, day=None):
+        """
+        :param items: result of SpotinstClient.get_cost_per_account
+        """
+        for item in items:
+            for lifecycle, costs in item.items():
+                self.add_row(
+                    day=day,
+                    lifecycle=lifecycle,
+                    actual=costs.get("actual_costs"),
+                    potential=costs.get("potential_costs"),
+                    running_hours=costs.get("running_hours"))
+
+    def add_group_costs(self, group_id, items, day=None):
+        """
+        :param items: result of SpotinstClient.get_cost_per_elastigroup
+        """
+        if isinstance(items, dict):
+            items = [items]
+
+        for item in items:
+            costs = item.get("costs") or {}
+            self.add_row(
+                group_id=group_id,
+                day=day,
+                actual=costs.get("actual"),
+                potential=costs.get("potential"),
+                running_hours=(item.get("running") or {}).get("value"))
+
+    def add_detailed_costs(self, items, day=None):
+        """
+        :param items: result of SpotinstClient.get_group_detailed_cost
+        """
+        for item in items:
+            costs = item.get("costs") or {}
+
+            if item.get("spot_instance_request_id"):
+                lifecycle = LIFECYCLE_SPOT
+            else:
+                lifecycle = LIFECYCLE_ON_DEMAND
+
+            self.add_row(
+                group_id=item.get("group_id"),
+                day=day,
+                instance_type=item.get("instance_type"),
+                lifecycle=lifecycle,
+                actual=costs.get("actual"),
+                potential=costs.get("potential"),
+                running_hours=(item.get("running") or {}).get("value"))
+
+    def add_kubernetes_cluster_cost(self, cluster_id, item, day=None):
+        """
+        :param item: result of SpotinstClient.get_kubernetes_cluster_cost
+        """
+        self.add_row(group_id=cluster_id, day=day,
+                     actual=item.get("total_cost"))
+
+    # endregion
+
+    # region Aggregations
+    def total(self, measure="actual"):
+        values = self._measures[measure]
+
+        if self.use_numpy and len(values):
+            return float(numpy.frombuffer(values, dtype=numpy.float64).sum())
+
+        return float(sum(values))
+
+    def group_by(self, keys, measure="actual"):
+        """
+        Sum a measure per distinct combination of dimension values.
+
+        :type keys: str | tuple
+        :type measure: str
+        :rtype: dict
+        :return: {dimension value (or tuple of values): sum}
+        """
+        single = isinstance(keys, str)
+        keys = (keys,) if single else tuple(keys)
+
+        for key in keys:
+            if key not in DIMENSIONS:
+                raise ValueError("unknown cost dimension {}".format(key))
+
+        if not len(self):
+            return {}
+
+        if self.use_numpy:
+            sums = self._group_by_numpy(keys, measure)
+        else:
+            sums = self._group_by_python(keys, measure)
+
+        if single:
+            return dict((combo[0], value) for combo, value in sums.items())
+
+        return sums
+
+    def rollup(self, keys, measures=MEASURES):
+        """
+        :rtype: dict
+        :return: {dimension value (or tuple of values): {measure: sum}}
+        """
+        result = {}
+
+        for measure in measures:
+            for key, value in self.group_by(keys, measure).items():
+                result.setdefault(key, {})[measure] = value
+
+        return result
+
+    def top_n(self, n, by="group_id", measure="actual"):
+        """
+        :rtype: list[tuple]
+        :return: [(dimension value, sum)] sorted by descending sum
+        """
+        sums = self.group_by(by, measure)
+        return heapq.nlargest(n, sums.items(), key=lambda item: item[1])
+
+    # endregion
+
+    def _encode(self, dimension, value):
+        lookup = self._lookup[dimension]
+        code = lookup.get(value)
+
+        if code is None:
+            code = len(self._values[dimension])
+            lookup[value] = code
+            self._values[dimension].append(value)
+
+        return code
+
+    def _group_by_numpy(self, keys, measure):
+        columns = [numpy.frombuffer(self._codes[key], dtype=numpy.dtype('l'))
+                   for key in keys]
+        shape = tuple(len(self._values[key]) for key in keys)
+
+        combined = numpy.ravel_multi_index(columns, shape)
+        present, inverse = numpy.unique(combined, return_inverse=True)
+        values = numpy.frombuffer(self._measures[measure], dtype=numpy.float64)
+        sums = numpy.bincount(inverse, weights=values, minlength=len(present))
+
+        result = {}
+        for flat, value in zip(present, sums):
+            codes = numpy.unravel_index(flat, shape)
+            combo = tuple(self._values[key][int(code)]
+                          for key, code in zip(keys, codes))
+            result[combo] = float(value)
+
+        return result
+
+    def _group_by_python(self, keys, measure):
+        columns = [self._codes[key] for key in keys]
+        values = self._measures[measure]
+
+        sums = {}
+        for i, combo in enumerate(zip(*columns)):
+            sums[combo] = sums.get(combo, 0.0) + values[i]
+
+        return dict(
+            (tuple(self._values[key][code] for key, code in zip(keys, combo)),
+             value)
+            for combo, value in sums.items())
+
+
+def load_numpy():
+    """
+    :return: the numpy module, None when it isn't installed
+    """
+    global numpy, _numpy_loaded
+
+    if not _numpy_loaded:
+        try:
+            import numpy as module
+        except ImportError:
+            module = None
+
+        numpy = module
+        _numpy_loaded = True
+
+    return numpy
+
+
+def load_detailed_costs(client, group_ids, from_date=None, to_date=None,
+                        day=None, table=None,
+                        max_workers=spotinst_executor.DEFAULT_MAX_WORKERS):
+    """
+    Fetch get_group_detailed_cost for every group concurrently into a
+    CostTable.
+
+    :type client: spotinst_sdk.SpotinstClient
+    :type group_ids: list[str]
+    :rtype: CostTable
+    """
+    table = table if table is not None else CostTable()
+
+    results = spotinst_executor.run_batch(
+        lambda group_id: client.get_group_detailed_cost(
+            group_id, to_date=to_date, from_date=from_date),
+        group_ids, max_workers=max_workers)
+
+    for result in results:
+        if not result.ok:
+            raise result.error
+        table.add_detailed_costs(result.result, day=day)
+
+    return table
+
+
+def merge_kubernetes_cluster_costs(items):
+    """
+    Merge get_kubernetes_cluster_cost results for consecutive windows into
+    one result, summing costs per namespace and deployment in first-seen
+    order.
+
+    :type items: list[dict]
+    :rtype: dict
+    """
+    merged = dict(total_cost=0.0, headroom_cost=0.0, stand_alone_pods_cost=0.0)
+    namespaces = OrderedDict()
+    deployments = OrderedDict()
+
+    for item in items:
+        for key in ("total_cost", "headroom_cost", "stand_alone_pods_cost"):
+            merged[key] += to_float(item.get(key))
+
+        for namespace in item.get("namespaces") or []:
+            entry = namespaces.setdefault(
+                namespace.get("namespace"), dict(namespace, cost=0.0))
+            entry["cost"] += to_float(namespace.get("cost"))
+
+        for deployment in item.get("deployments") or []:
+            key = (deployment.get("namespace"), deployment.get("deployment_name"))
+            entry = deployments.setdefault(key, dict(deployment, cost=0.0))
+            entry["cost"] += to_float(deployment.get("cost"))
+
+    merged["namespaces"] = list(namespaces.values())
+    merged["deployments"] = list(deployments.values())
+
+    return merged
+
+
+def to_float(value):
+    if value is None or value == "":
+        return 0.0
+    return float(value)
+
+
+# region Dates
+def parse_date(value):
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.datetime.strptime(value, DATE_FORMAT).date()
+
+
+def format_date(value):
+    return value.strftime(DATE_FORMAT)
+
+
+def iter_days(from_date, to_date):
+    day = parse_date(from_date)
+    last = parse_date(to_date)
+
+    while day <= last:
+        yield day
+        day += datetime.timedelta(days=1)
+
+
+def split_date_range(from_date, to_date, window_days, aligned=False):
+    """
+    Split an inclusive date range into consecutive windows of at most
+    window_days days.
+
+    With aligned=True window boundaries fall on fixed multiples of
+    window_days, so overlapping ranges produce the same inner windows.
+
+    :rtype: list[tuple]
+    :return: [(from_date, to_date)] as date strings
+    """
+    start = parse_date(from_date)
+    last = parse_date(to_date)
+    window_days = max(1, int(window_days))
+    windows = []
+
+    while start <= last:
+        length = window_days
+        if aligned:
+            length -= start.toordinal() % window_days
+
+        end = min(last, start + datetime.timedelta(days=length - 1))
+        windows.append((format_date(start), format_date(end)))
+        start = end + datetime.timedelta(days=1)
+
+    return windows
+
+
+def missing_date_ranges(from_date, to_date, present_days):
+    """
+    :type present_days: set[str]
+    :rtype: list[tuple]
+    :return: inclusive (from_date, to_date) gaps not covered by present_days
+    """
+    gaps = []
+    gap_start = previous = None
+
+    for day in iter_days(from_date, to_date):
+        if format_date(day) in present_days:
+            if gap_start is not None:
+                gaps.append((format_date(gap_start), format_date(previous)))
+                gap_start = None
+        elif gap_start is None:
+            gap_start = day
+        previous = day
+
+    if gap_start is not None:
+        gaps.append((format_date(gap_start), format_date(previous)))
+
+    return gaps
+
+# endregion
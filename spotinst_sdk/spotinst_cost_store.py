@@ -0,0 +1,180 @@
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from spotinst_sdk import spotinst_cost
+from spotinst_sdk import spotinst_executor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COST_STORE_FILE = os.path.join(
+    os.path.expanduser("~"), '.spotinst', 'costs.db')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS group_costs (
+    account_id TEXT NOT NULL,
+    group_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    item TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (account_id, group_id, day)
+)
+"""
+
+
+class CostStore:
+    def __init__(
+            self,
+            client,
+            path=DEFAULT_COST_STORE_FILE,
+            max_workers=spotinst_executor.DEFAULT_MAX_WORKERS,
+            rate_limit=None):
+        """
+        Local per-day cache of get_cost_per_elastigroup results.
+
+        Each stored row is the response for a single day, so any range can
+        be answered from whole days and only the uncovered days are fetched.
+        Days from today onward are not final and are always refetched.
+
+        :type client: spotinst_sdk.SpotinstClient
+        :type path: str
+        :param path: sqlite file, or ':memory:'
+        :type max_workers: int
+        :type rate_limit: float
+        """
+        self.client = client
+        self.path = path
+        self.max_workers = max_workers
+        self.rate_limit = rate_limit
+
+        directory = os.path.dirname(path)
+        if path != ':memory:' and directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(_SCHEMA)
+        self._connection.commit()
+
+    @property
+    def account_id(self):
+        return self.client.account_id or ""
+
+    def close(self):
+        self._connection.close()
+
+    # region Queries
+    def stored_days(self, group_id, from_date, to_date):
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT day FROM group_costs "
+                "WHERE account_id = ? AND group_id = ? AND day BETWEEN ? AND ?",
+                (self.account_id, group_id,
+                 spotinst_cost.format_date(spotinst_cost.parse_date(from_date)),
+                 spotinst_cost.format_date(spotinst_cost.parse_date(to_date))))
+            return set(row[0] for row in rows)
+
+    def missing_ranges(self, group_id, from_date, to_date):
+        """
+        :rtype: list[tuple]
+        :return: inclusive (from_date, to_date) ranges that must be fetched
+        """
+        present = self.stored_days(group_id, from_date, to_date)
+
+        today = spotinst_cost.format_date(datetime.date.today())
+        present = set(day for day in present if day < today)
+
+        return spotinst_cost.missing_date_ranges(from_date, to_date, present)
+
+    def query(self, group_id, from_date, to_date):
+        """
+        Answer a range from the local store only.
+
+        :rtype: list[tuple]
+        :return: [(day, cost item)] ordered by day
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT day, item FROM group_costs "
+                "WHERE account_id = ? AND group_id = ? AND day BETWEEN ? AND ? "
+                "ORDER BY day",
+                (self.account_id, group_id,
+                 spotinst_cost.format_date(spotinst_cost.parse_date(from_date)),
+                 spotinst_cost.format_date(spotinst_cost.parse_date(to_date))))
+            return [(day, json.loads(item)) for day, item in rows]
+
+    # endregion
+
+    # region Sync
+    def sync_group(self, group_id, from_date, to_date):
+        """
+        Fetch the days in range that are not stored yet, one request per
+        day, concurrently.
+
+        :rtype: int
+        :return: number of days fetched
+        """
+        days = []
+        for gap_from, gap_to in self.missing_ranges(group_id, from_date, to_date):
+            days.extend(spotinst_cost.format_date(day)
+                        for day in spotinst_cost.iter_days(gap_from, gap_to))
+
+        if not days:
+            return 0
+
+        logger.debug("fetching {} missing cost days for {}".format(
+            len(days), group_id))
+
+        results = spotinst_executor.run_batch(
+            lambda day: self.client.get_cost_per_elastigroup(
+                group_id, to_date=day, from_date=day),
+            days, max_workers=self.max_workers, rate_limit=self.rate_limit)
+
+        failed = [result for result in results if not result.ok]
+        self.save(group_id, [(result.key, result.result)
+                             for result in results if result.ok])
+
+        if failed:
+            raise failed[0].error
+
+        return len(days)
+
+    def save(self, group_id, day_items):
+        fetched_at = time.time()
+
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO group_costs "
+                "(account_id, group_id, day, item, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(self.account_id, group_id, day, json.dumps(item), fetched_at)
+                 for day, item in day_items])
+            self._connection.commit()
+
+    def get_group_costs(self, group_id, from_date, to_date):
+        """
+        Fill any gaps from the API, then answer the range locally.
+
+        :rtype: list[tuple]
+        :return: [(day, cost item)] ordered by day
+        """
+        self.sync_group(group_id, from_date, to_date)
+        return self.query(group_id, from_date, to_date)
+
+    def load_cost_table(self, group_ids, from_date, to_date, table=None):
+        """
+        :rtype: spotinst_sdk.spotinst_cost.CostTable
+        """
+        table = table if table is not None else spotinst_cost.CostTable()
+
+        for group_id in group_ids:
+            for day, item in self.get_group_costs(group_id, from_date, to_date):
+                table.add_group_costs(group_id, item, day=day)
+
+        return table
+
+    # endregion
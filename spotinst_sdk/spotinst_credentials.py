@@ -0,0 +1,50 @@
+import os
+import threading
+
+_cache = dict()
+_lock = threading.Lock()
+
+
+def load_profiles(credentials_file):
+    """
+    All profiles of a shared credentials file.
+
+    The file is parsed once and kept in a process-wide cache keyed on its
+    path, mtime and size, so creating one client per profile doesn't
+    re-read it; an edited file is parsed again. The returned dict is
+    shared and must not be modified.
+
+    :type credentials_file: str
+    :rtype: dict
+    :return: {profile: {"token": ..., "account": ...}}
+    """
+    path = os.path.abspath(os.path.expanduser(credentials_file))
+    stat = os.stat(path)
+    version = (getattr(stat, "st_mtime_ns", stat.st_mtime), stat.st_size)
+
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with open(path, 'r') as f:
+        profiles = parse(f)
+
+    with _lock:
+        _cache[path] = (version, profiles)
+
+    return profiles
+
+
+def parse(stream):
+    import yaml
+
+    # the C loader is several times faster when libyaml is available
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    profiles = yaml.load(stream, Loader=loader)
+
+    return profiles if isinstance(profiles, dict) else dict()
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
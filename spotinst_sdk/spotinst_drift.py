@@ -0,0 +1,225 @@
+import json
+import logging
+
+from spotinst_sdk import aws_elastigroup
+from spotinst_sdk import spotinst_executor
+from spotinst_sdk import spotinst_fleet_diff
+
+logger = logging.getLogger(__name__)
+
+# read-only fields set by the service, never part of a desired model
+DEFAULT_IGNORED_FIELDS = ("id", "created_at", "updated_at")
+
+
+class GroupDrift:
+    def __init__(self, group_id, changes=None, error=None):
+        """
+        :type group_id: str
+        :type changes: list[spotinst_fleet_diff.ChangeRecord]
+        :param changes: desired value in old, live value in new; removed
+                        means the field is missing on the live group
+        :type error: Exception
+        """
+        self.group_id = group_id
+        self.changes = changes or []
+        self.error = error
+
+    @property
+    def drifted(self):
+        return bool(self.changes)
+
+    def __repr__(self):
+        return "GroupDrift({}, changes={}, error={})".format(
+            self.group_id, len(self.changes), self.error)
+
+
+class DriftReport:
+    def __init__(self, results):
+        """
+        :type results: list[GroupDrift]
+        """
+        self.results = results
+
+    @property
+    def drifted(self):
+        return [result for result in self.results if result.drifted]
+
+    @property
+    def failed(self):
+        return [result for result in self.results if result.error is not None]
+
+    def summary(self):
+        """
+        One line per drifted field, e.g.
+        sig-1 capacity.target: 2 -> 3
+
+        :rtype: str
+        """
+        lines = []
+
+        for result in self.results:
+            if result.error is not None:
+                lines.append("{} error: {}".format(result.group_id, result.error))
+
+            for change in result.changes:
+                if change.kind == spotinst_fleet_diff.REMOVED:
+                    live = "<missing>"
+                else:
+                    live = json.dumps(change.new, sort_keys=True)
+                lines.append("{} {}: {} -> {}".format(
+                    result.group_id, change.field,
+                    json.dumps(change.old, sort_keys=True), live))
+
+        lines.append("{} groups, {} drifted, {} failed".format(
+            len(self.results), len(self.drifted), len(self.failed)))
+
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return dict(
+            (result.group_id,
+             dict(error=None if result.error is None else str(result.error),
+                  changes=[change.to_dict() for change in result.changes]))
+            for result in self.results)
+
+
+class DriftDetector:
+    def __init__(
+            self,
+            client,
+            max_workers=spotinst_executor.DEFAULT_MAX_WORKERS,
+            rate_limit=None,
+            ignored_fields=DEFAULT_IGNORED_FIELDS):
+        """
+        Compare desired aws_elastigroup.Elastigroup models with live groups.
+
+        Only fields set on the model are compared, so service defaults and
+        read-only fields of the live group don't show up as drift. Both
+        sides are normalized first: keys go through the same camel/snake
+        conversion as the API, None and empty values are dropped, integral
+        floats become ints and lists of scalars are sorted.
+
+        :type client: spotinst_sdk.SpotinstClient
+        :type max_workers: int
+        :type rate_limit: float | spotinst_executor.RateLimiter
+        :type ignored_fields: tuple
+        :param ignored_fields: top-level group fields never compared
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.rate_limiter = spotinst_executor.resolve_rate_limiter(rate_limit)
+        self.ignored_fields = ignored_fields
+
+    def serialize(self, group):
+        """
+        :type group: aws_elastigroup.Elastigroup
+        :rtype: dict
+        :return: the model as a converted get_elastigroup item
+        """
+        request = aws_elastigroup.ElastigroupCreationRequest(group)
+        return self.serialize_dict(
+            self.client.exclude_missing(json.loads(request.toJSON()))["group"])
+
+    def serialize_dict(self, group_dict):
+        """
+        :type group_dict: dict
+        :param group_dict: group spec with snake or camel case keys
+        :rtype: dict
+        """
+        camel = self.client.convert_json(group_dict, self.client.underscore_to_camel)
+        return self.normalize(self.client.convert_json(
+            camel, self.client.camel_to_underscore))
+
+    def normalize(self, value):
+        if isinstance(value, dict):
+            normalized = dict()
+            for key, child in value.items():
+                child = self.normalize(child)
+                if child is not None and child != {} and child != []:
+                    normalized[key] = child
+            return normalized
+
+        if isinstance(value, (list, tuple)):
+            items = [self.normalize(child) for child in value]
+            if all(not isinstance(item, (dict, list)) for item in items):
+                return sorted(items, key=lambda item: (str(type(item)), item))
+            return items
+
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+
+        return value
+
+    def compare(self, group_id, desired, live):
+        """
+        :type desired: dict
+        :param desired: serialized model
+        :type live: dict
+        :param live: get_elastigroup item
+        :rtype: list[spotinst_fleet_diff.ChangeRecord]
+        """
+        desired = dict((key, value) for key, value in desired.items()
+                       if key not in self.ignored_fields)
+
+        return spotinst_fleet_diff.diff_values(
+            group_id, desired, project(self.normalize(live), desired))
+
+    def detect(self, desired, live=None):
+        """
+        :type desired: dict
+        :param desired: {group id: aws_elastigroup.Elastigroup}
+        :type live: dict | spotinst_sdk.spotinst_fleet.FleetSnapshot
+        :param live: cached {group id: get_elastigroup item} or a fleet
+                     snapshot; groups missing from it are fetched
+                     concurrently
+        :rtype: DriftReport
+        """
+        if live is None:
+            live = dict()
+        elif hasattr(live, "groups"):
+            live = live.groups
+
+        group_ids = list(desired)
+        missing = [group_id for group_id in group_ids if group_id not in live]
+
+        fetched = dict()
+        errors = dict()
+        for result in spotinst_executor.run_batch(
+                self.client.get_elastigroup, missing,
+                max_workers=self.max_workers, rate_limit=self.rate_limiter):
+            if result.ok:
+                fetched[result.key] = result.result
+            else:
+                logger.error("failed fetching group {}: {}".format(
+                    result.key, result.error))
+                errors[result.key] = result.error
+
+        results = []
+        for group_id in group_ids:
+            if group_id in errors:
+                results.append(GroupDrift(group_id, error=errors[group_id]))
+                continue
+
+            live_group = live[group_id] if group_id in live else fetched[group_id]
+            changes = self.compare(
+                group_id, self.serialize(desired[group_id]), live_group)
+            results.append(GroupDrift(group_id, changes))
+
+        return DriftReport(results)
+
+
+def project(live, desired):
+    """
+    Restrict live to the shape of desired: dict keys not in desired are
+    dropped, lists of equal length are projected item by item.
+    """
+    if isinstance(live, dict) and isinstance(desired, dict):
+        return dict((key, project(live[key], desired[key]))
+                    for key in desired if key in live)
+
+    if isinstance(live, list) and isinstance(desired, list) and \
+            len(live) == len(desired):
+        return [project(live_item, desired_item)
+                for live_item, desired_item in zip(live, desired)]
+
+    return live
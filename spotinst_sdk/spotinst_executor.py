@@ -0,0 +1,172 @@
+import collections
+import logging
+import threading
+import time
+
+from spotinst_sdk import spotinst_tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class BatchResult:
+    def __init__(self, key, result=None, error=None, elapsed=None):
+        """
+
+        :type key: object
+        :type result: object
+        :type error: Exception
+        :type elapsed: float
+        """
+        self.key = key
+        self.result = result
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return "BatchResult(key={!r}, result={!r})".format(
+                self.key, self.result)
+        return "BatchResult(key={!r}, error={!r})".format(self.key, self.error)
+
+
+class RateLimiter:
+    def __init__(self, rate, burst=None):
+        """
+        Token bucket shared between threads.
+
+        :type rate: float
+        :param rate: requests per second, must be positive
+        :type burst: int
+        """
+        if rate <= 0:
+            raise ValueError("rate_limit must be positive")
+
+        self.rate = float(rate)
+        self.burst = float(burst or max(1, int(rate)))
+
+        self._tokens = self.burst
+        self._last = time.time()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.time()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+def resolve_rate_limiter(rate_limit):
+    if rate_limit is None or isinstance(rate_limit, RateLimiter):
+        return rate_limit
+    return RateLimiter(rate_limit)
+
+
+def run_batch(fn, keys, max_workers=DEFAULT_MAX_WORKERS, rate_limit=None):
+    """
+    Call fn(key) for every key on a bounded thread pool.
+
+    Errors are captured per key instead of aborting the batch. Results are
+    returned in the same order as keys. Calls run under the caller's open
+    tracing spans, so their spans nest as they would in the caller.
+
+    :type fn: callable
+    :type keys: list
+    :type max_workers: int
+    :type rate_limit: float | RateLimiter
+    :param rate_limit: calls per second, or a limiter shared between batches
+    :rtype: list[BatchResult]
+    """
+    keys = list(keys)
+    call = _batch_call(fn, resolve_rate_limiter(rate_limit))
+
+    if not keys:
+        return []
+
+    workers = max(1, min(max_workers or DEFAULT_MAX_WORKERS, len(keys)))
+
+    if workers == 1:
+        return [call(key) for key in keys]
+
+    from multiprocessing.pool import ThreadPool
+
+    pool = ThreadPool(workers)
+    try:
+        return pool.map(call, keys)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def iter_batch(fn, keys, max_workers=DEFAULT_MAX_WORKERS, rate_limit=None,
+               window=None):
+    """
+    Streaming run_batch: keys are consumed lazily and results are yielded
+    in input order as soon as they are done, with at most window calls in
+    flight, so arbitrarily long inputs run in bounded memory.
+
+    :type keys: iterable
+    :type window: int
+    :param window: calls in flight, defaults to 4 * max_workers
+    :rtype: collections.Iterable[BatchResult]
+    """
+    call = _batch_call(fn, resolve_rate_limiter(rate_limit))
+    workers = max(1, max_workers or DEFAULT_MAX_WORKERS)
+    window = max(workers, window or 4 * workers)
+
+    from multiprocessing.pool import ThreadPool
+
+    pool = ThreadPool(workers)
+    pending = collections.deque()
+    try:
+        for key in keys:
+            pending.append(pool.apply_async(call, (key,)))
+
+            while len(pending) >= window or (pending and pending[0].ready()):
+                yield pending.popleft().get()
+
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _batch_call(fn, rate_limiter):
+    # built in the calling thread, whose tracing state every call inherits
+    traced = spotinst_tracing.capture()
+
+    def call(key):
+        if traced:
+            with spotinst_tracing.restore(traced):
+                return run(key)
+        return run(key)
+
+    def run(key):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+
+        start = time.time()
+        try:
+            return BatchResult(key, result=fn(key),
+                               elapsed=time.time() - start)
+        except Exception as e:
+            logger.debug("batch call for {} failed: {}".format(key, e))
+            return BatchResult(key, error=e, elapsed=time.time() - start)
+
+    return call
@@ -0,0 +1,381 @@
+import datetime
+import logging
+import threading
+import time
+
+from spotinst_sdk import spotinst_executor
+from spotinst_sdk import spotinst_fleet_diff
+from spotinst_sdk import spotinst_fleet_index
+from spotinst_sdk import spotinst_fleet_query
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_INTERVAL = 60
+DEFAULT_EVENT_CHECKS = 20
+EVENT_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.000+0000"
+
+
+class FleetSnapshot:
+    def __init__(self, groups, instances, taken_at=None, version=0):
+        """
+        Point in time view of the fleet. Snapshots are never modified after
+        they are published; a refresh builds a new one and swaps it in, so
+        readers always see a consistent state.
+
+        :type groups: dict
+        :param groups: {group id: get_elastigroups item}
+        :type instances: dict
+        :param instances: {group id: get_elastigroup_active_instances items}
+        :type taken_at: float
+        :type version: int
+        """
+        self.groups = groups
+        self.instances = instances
+        self.taken_at = taken_at
+        self.version = version
+        self._hash_trees = None
+
+    def __len__(self):
+        return len(self.groups)
+
+    def __contains__(self, group_id):
+        return group_id in self.groups
+
+    def group_ids(self):
+        return list(self.groups.keys())
+
+    def get_group(self, group_id):
+        return self.groups.get(group_id)
+
+    def get_instances(self, group_id):
+        return self.instances.get(group_id, [])
+
+    def all_instances(self):
+        for group_id, instances in self.instances.items():
+            for instance in instances:
+                yield group_id, instance
+
+    def hash_trees(self, build=True):
+        """
+        Structural hashes of the groups, built on first use and kept for
+        the life of the snapshot. diff compares by digest only when both
+        snapshots already have them; hashing costs more than one plain
+        comparison, so build them for snapshots that are diffed repeatedly.
+
+        :type build: bool
+        :param build: False returns None instead of building them
+        :rtype: dict
+        """
+        if self._hash_trees is None and build:
+            self._hash_trees = spotinst_fleet_diff.build_trees(self.groups)
+        return self._hash_trees
+
+    def diff(self, other):
+        """
+        :type other: FleetSnapshot
+        :param other: the earlier snapshot
+        :rtype: list[spotinst_fleet_diff.ChangeRecord]
+        """
+        return spotinst_fleet_diff.diff_snapshots(other, self)
+
+
+class FleetChange:
+    def __init__(self, snapshot, added, updated, removed):
+        """
+        :type snapshot: FleetSnapshot
+        :type added: list[str]
+        :type updated: list[str]
+        :type removed: list[str]
+        """
+        self.snapshot = snapshot
+        self.added = added
+        self.updated = updated
+        self.removed = removed
+
+    @property
+    def changed(self):
+        return self.added + self.updated
+
+    def __repr__(self):
+        return "FleetChange(version={}, added={}, updated={}, removed={})".format(
+            self.snapshot.version, len(self.added), len(self.updated),
+            len(self.removed))
+
+
+class FleetInventory:
+    def __init__(
+            self,
+            client,
+            max_workers=spotinst_executor.DEFAULT_MAX_WORKERS,
+            rate_limit=None,
+            check_events=False,
+            event_checks=DEFAULT_EVENT_CHECKS):
+        """
+        Local view of every Elastigroup and its active instances.
+
+        The first refresh fetches everything. Later refreshes list the
+        groups once and only re-fetch instances of groups that are new,
+        whose updated_at changed or, with check_events, that have activity
+        events since their instances were last fetched or checked.
+
+        Checking events costs one call per group, so each refresh checks at
+        most event_checks unchanged groups, least recently verified first;
+        every group is checked once per len(groups) / event_checks
+        refreshes.
+
+        :type client: spotinst_sdk.SpotinstClient
+        :type max_workers: int
+        :type rate_limit: float | spotinst_executor.RateLimiter
+        :type check_events: bool
+        :type event_checks: int
+        :param event_checks: unchanged groups checked for events per refresh
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.rate_limiter = spotinst_executor.resolve_rate_limiter(rate_limit)
+        self.check_events = check_events
+        self.event_checks = event_checks
+
+        # group id -> when its instances were last known to be current
+        self._verified_at = dict()
+
+        self._snapshot = FleetSnapshot(dict(), dict())
+        self._refresh_lock = threading.Lock()
+        self._listeners = []
+        self._thread = None
+        self._stopped = threading.Event()
+
+    @property
+    def snapshot(self):
+        """
+        :rtype: FleetSnapshot
+        """
+        return self._snapshot
+
+    def add_listener(self, listener):
+        """
+        :param listener: called with each FleetChange after it is published
+        """
+        self._listeners.append(listener)
+
+    # region Refresh
+    def refresh(self):
+        """
+        :rtype: FleetChange
+        """
+        with self._refresh_lock:
+            previous = self._snapshot
+            started = time.time()
+
+            groups = dict((group["id"], group)
+                          for group in self.client.get_elastigroups())
+
+            removed = [group_id for group_id in previous.groups
+                       if group_id not in groups]
+            added = [group_id for group_id in groups
+                     if group_id not in previous.groups]
+            updated = [group_id for group_id in groups
+                       if group_id in previous.groups and
+                       groups[group_id].get("updated_at") !=
+                       previous.groups[group_id].get("updated_at")]
+
+            checked = []
+            if self.check_events and previous.taken_at is not None:
+                candidates = [group_id for group_id in groups
+                              if group_id in previous.groups and
+                              group_id not in updated]
+                checked = sorted(
+                    candidates,
+                    key=lambda group_id: self._verified_at.get(group_id, 0))
+                checked = checked[:self.event_checks]
+
+                updated.extend(self.groups_with_events(checked, dict(
+                    (group_id, self._verified_at.get(group_id, previous.taken_at))
+                    for group_id in checked)))
+
+            instances = dict((group_id, previous.instances.get(group_id, []))
+                             for group_id in groups)
+
+            results = spotinst_executor.run_batch(
+                self.client.get_elastigroup_active_instances,
+                added + updated,
+                max_workers=self.max_workers, rate_limit=self.rate_limiter)
+
+            for result in results:
+                if result.ok:
+                    instances[result.key] = result.result
+                    continue
+
+                logger.error("failed fetching instances of {}: {}".format(
+                    result.key, result.error))
+
+                # keep the previous state so the next refresh retries it
+                if result.key in previous.groups:
+                    groups[result.key] = previous.groups[result.key]
+                else:
+                    del groups[result.key]
+                    del instances[result.key]
+
+            failed = set(result.key for result in results if not result.ok)
+            added = [group_id for group_id in added if group_id not in failed]
+            updated = [group_id for group_id in updated if group_id not in failed]
+
+            for group_id in added + updated + checked:
+                if group_id not in failed:
+                    self._verified_at[group_id] = started
+            for group_id in removed:
+                self._verified_at.pop(group_id, None)
+
+            snapshot = FleetSnapshot(groups, instances, started,
+                                     previous.version + 1)
+            self._snapshot = snapshot
+
+        change = FleetChange(snapshot, added, updated, removed)
+
+        for listener in self._listeners:
+            listener(change)
+
+        return change
+
+    def groups_with_events(self, group_ids, since):
+        """
+        :type since: dict
+        :param since: {group id: timestamp}
+        :rtype: list[str]
+        :return: groups with activity events after their since timestamp
+        """
+        since_utc = dict((group_id, datetime.datetime.utcfromtimestamp(since[group_id]))
+                         for group_id in group_ids)
+
+        results = spotinst_executor.run_batch(
+            lambda group_id: self.client.get_elastigroup_activity(
+                group_id, since_utc[group_id].strftime("%Y-%m-%d")),
+            group_ids,
+            max_workers=self.max_workers, rate_limit=self.rate_limiter)
+
+        changed = []
+        for result in results:
+            since_str = since_utc[result.key].strftime(EVENT_TIME_FORMAT)
+
+            if not result.ok:
+                changed.append(result.key)
+            elif any((event.get("created_at") or "") > since_str
+                     for event in result.result):
+                changed.append(result.key)
+
+        return changed
+
+    # endregion
+
+    # region Background
+    def start(self, interval=DEFAULT_REFRESH_INTERVAL):
+        """
+        Refresh on a daemon thread every interval seconds.
+        """
+        if self._thread is not None:
+            return
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, interval):
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error("fleet refresh failed: {}".format(e))
+
+            self._stopped.wait(interval)
+
+    # endregion
+
+
+class Fleet:
+    def __init__(self, client, **inventory_options):
+        """
+        Inventory, indexes and queries over the account's groups, e.g.
+        client.fleet.query(region="us-east-1", tags={"env": "prod"},
+        capacity_target__gt=10).
+
+        Criteria are field=value or field__operator=value, operators are
+        eq, ne, gt, gte, lt, lte, in, contains and regex. Indexed fields are
+        tags, region, instance_type, availability_zone, product and
+        capacity_target / capacity_minimum / capacity_maximum; any other
+        field is a path into the group dict (e.g. strategy__risk__gte=50).
+
+        :type client: spotinst_sdk.SpotinstClient
+        """
+        self.inventory = FleetInventory(client, **inventory_options)
+        self.index = spotinst_fleet_index.FleetIndex().attach(self.inventory)
+
+    @property
+    def snapshot(self):
+        return self.inventory.snapshot
+
+    def refresh(self):
+        return self.inventory.refresh()
+
+    def start(self, interval=DEFAULT_REFRESH_INTERVAL):
+        self.inventory.start(interval)
+
+    def stop(self):
+        self.inventory.stop()
+
+    def ensure_loaded(self):
+        if self.inventory.snapshot.taken_at is None:
+            self.inventory.refresh()
+
+    def explain(self, **criteria):
+        """
+        :rtype: spotinst_sdk.spotinst_fleet_query.QueryPlan
+        """
+        self.ensure_loaded()
+        return spotinst_fleet_query.plan(
+            spotinst_fleet_query.parse_criteria(criteria), self.index)
+
+    def query(self, **criteria):
+        """
+        :rtype: list[dict]
+        :return: matching groups, ordered by id
+        """
+        self.ensure_loaded()
+        snapshot = self.inventory.snapshot
+
+        query_plan = spotinst_fleet_query.plan(
+            spotinst_fleet_query.parse_criteria(criteria), self.index)
+
+        return spotinst_fleet_query.execute(query_plan, self.index, snapshot)
+
+    def query_instances(self, groups=None, **criteria):
+        """
+        :type groups: dict
+        :param groups: group criteria, as for query()
+        :rtype: list[tuple]
+        :return: [(group id, instance)] matching criteria
+        """
+        self.ensure_loaded()
+        snapshot = self.inventory.snapshot
+
+        if groups:
+            group_ids = [group["id"] for group in self.query(**groups)]
+        else:
+            group_ids = sorted(snapshot.instances)
+
+        instance_criteria = [
+            spotinst_fleet_query.Criterion.parse(key, value)
+            for key, value in sorted(criteria.items())]
+
+        return [(group_id, instance)
+                for group_id in group_ids
+                for instance in snapshot.get_instances(group_id)
+                if all(criterion.matches_path(instance)
+                       for criterion in instance_criteria)]
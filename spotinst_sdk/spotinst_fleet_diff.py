@@ -0,0 +1,235 @@
+import hashlib
+import json
+
+ADDED = "added"
+REMOVED = "removed"
+MODIFIED = "modified"
+
+
+class HashTree:
+    __slots__ = ("digest", "children")
+
+    def __init__(self, digest, children=None):
+        """
+        Merkle-style hash of a converted API item. Every dict and list node
+        carries the digest of its subtree. Trees are opt-in: diffs use them,
+        descending only into children whose digests differ, when both sides
+        have one (FleetSnapshot.hash_trees(), or old_trees and new_trees of
+        diff_groups); otherwise values are compared with ==.
+
+        :type digest: bytes
+        :type children: dict | list
+        :param children: child trees of a dict or list node, None for scalars
+        """
+        self.digest = digest
+        self.children = children
+
+    def __eq__(self, other):
+        return isinstance(other, HashTree) and self.digest == other.digest
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.digest)
+
+
+class ChangeRecord:
+    def __init__(self, group_id, path, kind, old=None, new=None):
+        """
+        :type group_id: str
+        :type path: tuple
+        :param path: keys and list indexes from the group root, () for the
+                     group itself
+        :type kind: str
+        :param kind: added, removed or modified
+        """
+        self.group_id = group_id
+        self.path = path
+        self.kind = kind
+        self.old = old
+        self.new = new
+
+    @property
+    def field(self):
+        """
+        Dotted path, e.g. compute.availability_zones[0].name
+        """
+        field = ""
+        for part in self.path:
+            if isinstance(part, int):
+                field += "[{}]".format(part)
+            else:
+                field += ("." if field else "") + part
+        return field
+
+    def to_dict(self):
+        return dict(group_id=self.group_id, field=self.field, kind=self.kind,
+                    old=self.old, new=self.new)
+
+    def __eq__(self, other):
+        return isinstance(other, ChangeRecord) and self.to_dict() == other.to_dict()
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return "ChangeRecord({}, {}, {})".format(
+            self.group_id, self.field or "<group>", self.kind)
+
+
+def build_tree(value):
+    """
+    :rtype: HashTree
+    """
+    if isinstance(value, dict):
+        children = dict((key, build_tree(child)) for key, child in value.items())
+        digest = hashlib.sha1(b"d")
+        for key in sorted(children, key=str):
+            digest.update(str(key).encode("utf-8"))
+            digest.update(children[key].digest)
+        return HashTree(digest.digest(), children)
+
+    if isinstance(value, (list, tuple)):
+        children = [build_tree(child) for child in value]
+        digest = hashlib.sha1(b"l")
+        for child in children:
+            digest.update(child.digest)
+        return HashTree(digest.digest(), children)
+
+    return HashTree(hashlib.sha1(encode_scalar(value)).digest())
+
+
+def encode_scalar(value):
+    # type tagged so 1, 1.0, "1" and True hash differently
+    if isinstance(value, bool) or value is None:
+        return ("b" + repr(value)).encode("utf-8")
+    if isinstance(value, (int, float)):
+        return ("{}{!r}".format(type(value).__name__[0], value)).encode("utf-8")
+    if isinstance(value, bytes):
+        return b"y" + value
+    try:
+        return ("s" + value).encode("utf-8")
+    except TypeError:
+        return ("j" + json.dumps(value, sort_keys=True, default=str)).encode("utf-8")
+
+
+def build_trees(groups):
+    """
+    :type groups: dict | list
+    :param groups: {group id: group} or a get_elastigroups list
+    :rtype: dict
+    """
+    return dict((group_id, build_tree(group))
+                for group_id, group in by_id(groups).items())
+
+
+def diff_values(group_id, old, new, old_tree=None, new_tree=None, path=()):
+    """
+    :rtype: list[ChangeRecord]
+    """
+    changes = []
+    _diff(group_id, old, new, old_tree, new_tree, path, changes)
+    return changes
+
+
+def diff_groups(old_groups, new_groups, old_trees=None, new_trees=None):
+    """
+    Diff two fleet states, e.g. yesterday's and today's get_elastigroups.
+    Equal groups are skipped after a plain comparison; for the others only
+    differing subtrees are visited. Trees are never built here: when both
+    sides of a group have one, e.g. from FleetSnapshot.hash_trees, their
+    digests replace the comparisons.
+
+    :type old_groups: dict | list
+    :type new_groups: dict | list
+    :type old_trees: dict
+    :param old_trees: {group id: HashTree} built earlier for old_groups
+    :type new_trees: dict
+    :rtype: list[ChangeRecord]
+    """
+    old_groups = by_id(old_groups)
+    new_groups = by_id(new_groups)
+
+    if old_trees is None:
+        old_trees = dict()
+    if new_trees is None:
+        new_trees = dict()
+
+    changes = []
+
+    for group_id in sorted(set(old_groups) | set(new_groups)):
+        if group_id not in new_groups:
+            changes.append(ChangeRecord(group_id, (), REMOVED, old=old_groups[group_id]))
+            continue
+
+        if group_id not in old_groups:
+            changes.append(ChangeRecord(group_id, (), ADDED, new=new_groups[group_id]))
+            continue
+
+        old, new = old_groups[group_id], new_groups[group_id]
+        if old is new:
+            continue
+
+        _diff(group_id, old, new, old_trees.get(group_id),
+              new_trees.get(group_id), (), changes)
+
+    return changes
+
+
+def diff_snapshots(old_snapshot, new_snapshot):
+    """
+    :type old_snapshot: spotinst_sdk.spotinst_fleet.FleetSnapshot
+    :type new_snapshot: spotinst_sdk.spotinst_fleet.FleetSnapshot
+    :rtype: list[ChangeRecord]
+    :return: compared by digest when both snapshots already built their
+             hash trees, with == otherwise
+    """
+    return diff_groups(old_snapshot.groups, new_snapshot.groups,
+                       old_snapshot.hash_trees(build=False),
+                       new_snapshot.hash_trees(build=False))
+
+
+def _diff(group_id, old, new, old_tree, new_tree, path, changes):
+    # hashing a value costs far more than comparing it, so digests are only
+    # used when both trees already exist
+    if old_tree is None or new_tree is None:
+        if old == new:
+            return
+        old_tree = new_tree = None
+    elif old_tree.digest == new_tree.digest:
+        return
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in sorted(set(old) | set(new), key=str):
+            if key not in new:
+                changes.append(ChangeRecord(group_id, path + (key,), REMOVED, old=old[key]))
+            elif key not in old:
+                changes.append(ChangeRecord(group_id, path + (key,), ADDED, new=new[key]))
+            else:
+                _diff(group_id, old[key], new[key],
+                      child(old_tree, key), child(new_tree, key),
+                      path + (key,), changes)
+        return
+
+    # lists are compared position by position only when the length is
+    # unchanged, otherwise the whole list is reported
+    if isinstance(old, (list, tuple)) and isinstance(new, (list, tuple)) and \
+            len(old) == len(new):
+        for i in range(len(old)):
+            _diff(group_id, old[i], new[i],
+                  child(old_tree, i), child(new_tree, i),
+                  path + (i,), changes)
+        return
+
+    changes.append(ChangeRecord(group_id, path, MODIFIED, old=old, new=new))
+
+
+def child(tree, key):
+    return None if tree is None else tree.children[key]
+
+
+def by_id(groups):
+    if isinstance(groups, dict):
+        return groups
+    return dict((group["id"], group) for group in groups)
@@ -0,0 +1,254 @@
+import bisect
+import threading
+
+INDEXED_FIELDS = ("tag", "region", "instance_type", "availability_zone", "product")
+CAPACITY_FIELDS = ("target", "minimum", "maximum")
+
+
+class FleetIndex:
+    def __init__(self):
+        """
+        Secondary indexes over converted get_elastigroups items.
+
+        Exact-match fields map each value to the set of group ids holding
+        it; tags are indexed as (key, value) pairs. Capacity fields are kept
+        as sorted (value, group id) lists for range lookups.
+        """
+        self._postings = dict((field, dict()) for field in INDEXED_FIELDS)
+        self._capacity = dict((field, []) for field in CAPACITY_FIELDS)
+        self._entries = dict()
+        self._lock = threading.RLock()
+
+    @classmethod
+    def build(cls, snapshot):
+        """
+        :type snapshot: spotinst_sdk.spotinst_fleet.FleetSnapshot
+        :rtype: FleetIndex
+        """
+        index = cls()
+        for group_id, group in snapshot.groups.items():
+            index.add(group_id, group)
+        return index
+
+    def attach(self, inventory):
+        """
+        Keep the index current with an inventory's refreshes.
+
+        :type inventory: spotinst_sdk.spotinst_fleet.FleetInventory
+        """
+        inventory.add_listener(self.apply)
+
+        for group_id, group in inventory.snapshot.groups.items():
+            self.add(group_id, group)
+
+        return self
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, group_id):
+        return group_id in self._entries
+
+    # region Updates
+    def add(self, group_id, group):
+        keys = extract_keys(group)
+        capacity = extract_capacity(group)
+
+        with self._lock:
+            self.remove(group_id)
+
+            for field, value in keys:
+                self._postings[field].setdefault(value, set()).add(group_id)
+
+            for field, value in capacity:
+                bisect.insort(self._capacity[field], (value, group_id))
+
+            self._entries[group_id] = (keys, capacity)
+
+    def remove(self, group_id):
+        with self._lock:
+            entry = self._entries.pop(group_id, None)
+            if entry is None:
+                return
+
+            keys, capacity = entry
+
+            for field, value in keys:
+                postings = self._postings[field]
+                postings[value].discard(group_id)
+                if not postings[value]:
+                    del postings[value]
+
+            for field, value in capacity:
+                values = self._capacity[field]
+                i = bisect.bisect_left(values, (value, group_id))
+                if i < len(values) and values[i] == (value, group_id):
+                    del values[i]
+
+    def apply(self, change):
+        """
+        :type change: spotinst_sdk.spotinst_fleet.FleetChange
+        """
+        with self._lock:
+            for group_id in change.removed:
+                self.remove(group_id)
+
+            for group_id in change.changed:
+                self.add(group_id, change.snapshot.get_group(group_id))
+
+    # endregion
+
+    # region Lookups
+    def lookup(self, field, value):
+        """
+        :rtype: frozenset
+        """
+        if field == "tag" and isinstance(value, dict):
+            return self.find(tags=value)
+
+        with self._lock:
+            return frozenset(self._postings[field].get(value, ()))
+
+    def count(self, field, value):
+        """
+        Number of groups holding value, used to pick the most selective
+        index first.
+        """
+        with self._lock:
+            return len(self._postings[field].get(value, ()))
+
+    def capacity_range(self, field="target", low=None, high=None,
+                       include_low=True, include_high=True):
+        """
+        :rtype: frozenset
+        """
+        with self._lock:
+            values = self._capacity[field]
+            start, end = capacity_bounds(values, low, high, include_low, include_high)
+
+            return frozenset(group_id for _, group_id in values[start:end])
+
+    def capacity_range_count(self, field="target", low=None, high=None,
+                             include_low=True, include_high=True):
+        """
+        Size of capacity_range without building it.
+
+        :rtype: int
+        """
+        with self._lock:
+            start, end = capacity_bounds(self._capacity[field], low, high,
+                                         include_low, include_high)
+            return max(0, end - start)
+
+    def find(self, tags=None, **fields):
+        """
+        Groups matching every criterion, e.g.
+        find(region="us-east-1", instance_type="c5.4xlarge", tags={"team": "search"})
+
+        :rtype: frozenset
+        """
+        lookups = [("tag", item) for item in sorted((tags or {}).items())]
+        lookups.extend(sorted(fields.items()))
+
+        with self._lock:
+            sets = [self._postings[field].get(value, ()) for field, value in lookups]
+
+            if not sets:
+                return frozenset(self._entries)
+
+            sets.sort(key=len)
+            result = set(sets[0])
+            for other in sets[1:]:
+                if not result:
+                    break
+                result.intersection_update(other)
+
+            return frozenset(result)
+
+    # endregion
+
+
+class _MaxKey(object):
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+    def __eq__(self, other):
+        return isinstance(other, _MaxKey)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return 0
+
+
+# sorts after every group id so (value, MAX_KEY) bounds all entries of value
+MAX_KEY = _MaxKey()
+
+
+def extract_keys(group):
+    """
+    :rtype: list[tuple]
+    :return: [(indexed field, value)] for a converted group item
+    """
+    compute = group.get("compute") or {}
+    keys = set()
+
+    for tag in (compute.get("launch_specification") or {}).get("tags") or []:
+        keys.add(("tag", (tag.get("tag_key"), tag.get("tag_value"))))
+
+    zones = [zone.get("name") for zone in compute.get("availability_zones") or []
+             if zone.get("name")]
+    for zone in zones:
+        keys.add(("availability_zone", zone))
+
+    region = group.get("region")
+    if not region and zones:
+        region = zones[0][:-1]
+    if region:
+        keys.add(("region", region))
+
+    instance_types = compute.get("instance_types") or {}
+    for field in ("ondemand", "spot", "preferred_spot"):
+        value = instance_types.get(field)
+        for instance_type in value if isinstance(value, list) else [value]:
+            if instance_type:
+                keys.add(("instance_type", instance_type))
+
+    if compute.get("product"):
+        keys.add(("product", compute["product"]))
+
+    return list(keys)
+
+
+def extract_capacity(group):
+    capacity = group.get("capacity") or {}
+    return [(field, capacity[field]) for field in CAPACITY_FIELDS
+            if isinstance(capacity.get(field), (int, float))]
+
+
+def capacity_bounds(values, low, high, include_low, include_high):
+    """
+    :type values: list[tuple]
+    :param values: sorted (capacity, group id) pairs
+    :rtype: tuple
+    :return: (start, end) slice of values within the range
+    """
+    if low is None:
+        start = 0
+    elif include_low:
+        start = bisect.bisect_left(values, (low,))
+    else:
+        start = bisect.bisect_right(values, (low, MAX_KEY))
+
+    if high is None:
+        end = len(values)
+    elif include_high:
+        end = bisect.bisect_right(values, (high, MAX_KEY))
+    else:
+        end = bisect.bisect_left(values, (high,))
+
+    return start, end
@@ -0,0 +1,235 @@
+import re
+
+from spotinst_sdk import spotinst_fleet_index
+
+OPERATORS = {
+    "eq": lambda actual, expected: actual == expected,
+    "ne": lambda actual, expected: actual != expected,
+    "gt": lambda actual, expected: actual is not None and actual > expected,
+    "gte": lambda actual, expected: actual is not None and actual >= expected,
+    "lt": lambda actual, expected: actual is not None and actual < expected,
+    "lte": lambda actual, expected: actual is not None and actual <= expected,
+    "in": lambda actual, expected: actual in expected,
+    "contains": lambda actual, expected: actual is not None and expected in actual,
+    "regex": lambda actual, expected: actual is not None and
+    re.search(expected, str(actual)) is not None,
+}
+
+INDEX_OPERATORS = ("eq", "in")
+RANGE_OPERATORS = ("eq", "gt", "gte", "lt", "lte")
+CAPACITY_PREFIX = "capacity_"
+
+
+class Criterion:
+    def __init__(self, field, operator, value):
+        """
+        One field__operator=value filter, e.g. capacity_target__gt=10.
+
+        :type field: str
+        :type operator: str
+        :type value: object
+        """
+        if operator not in OPERATORS:
+            raise ValueError("unknown query operator {}".format(operator))
+
+        self.field = field
+        self.operator = operator
+        self.value = value
+
+    @classmethod
+    def parse(cls, key, value):
+        parts = key.split("__")
+
+        if len(parts) > 1 and parts[-1] in OPERATORS:
+            return cls("__".join(parts[:-1]), parts[-1], value)
+
+        return cls(key, "eq", value)
+
+    @property
+    def capacity_field(self):
+        if self.field.startswith(CAPACITY_PREFIX):
+            field = self.field[len(CAPACITY_PREFIX):]
+            if field in spotinst_fleet_index.CAPACITY_FIELDS:
+                return field
+        return None
+
+    def is_indexed(self):
+        if self.field == "tags":
+            return self.operator == "eq" and isinstance(self.value, dict)
+        if self.field in spotinst_fleet_index.INDEXED_FIELDS:
+            return self.operator in INDEX_OPERATORS
+        if self.capacity_field:
+            return self.operator in RANGE_OPERATORS
+        return False
+
+    def estimate(self, index):
+        if self.field == "tags":
+            return min([index.count("tag", item) for item in self.value.items()] or [0])
+        if self.capacity_field:
+            return index.capacity_range_count(self.capacity_field, **self.range_bounds())
+        if self.operator == "in":
+            return sum(index.count(self.field, value) for value in self.value)
+        return index.count(self.field, self.value)
+
+    def lookup(self, index):
+        """
+        :rtype: frozenset
+        """
+        if self.field == "tags":
+            return index.find(tags=self.value)
+
+        if self.capacity_field:
+            return index.capacity_range(self.capacity_field, **self.range_bounds())
+
+        if self.operator == "in":
+            result = set()
+            for value in self.value:
+                result.update(index.lookup(self.field, value))
+            return frozenset(result)
+
+        return index.lookup(self.field, self.value)
+
+    def range_bounds(self):
+        """
+        :rtype: dict
+        :return: capacity_range arguments for a range criterion
+        """
+        if self.operator == "eq":
+            return dict(low=self.value, high=self.value)
+        if self.operator in ("gt", "gte"):
+            return dict(low=self.value, include_low=self.operator == "gte")
+        return dict(high=self.value, include_high=self.operator == "lte")
+
+    def matches(self, item):
+        if self.field == "tags":
+            values = set(group_values(item, "tag"))
+            return all((key, value) in values for key, value in self.value.items())
+
+        if self.field in spotinst_fleet_index.INDEXED_FIELDS:
+            values = group_values(item, self.field)
+            if self.operator == "ne":
+                return self.value not in values
+            return any(OPERATORS[self.operator](value, self.value) for value in values)
+
+        if self.capacity_field:
+            return self.matches_value((item.get("capacity") or {}).get(self.capacity_field))
+
+        return self.matches_path(item)
+
+    def matches_path(self, item):
+        """
+        Evaluate the field as a plain path into item, used for instances.
+        """
+        return self.matches_value(resolve_path(item, self.field))
+
+    def matches_value(self, actual):
+        try:
+            return OPERATORS[self.operator](actual, self.value)
+        except TypeError:
+            return False
+
+    def __repr__(self):
+        return "{}__{}={!r}".format(self.field, self.operator, self.value)
+
+
+class QueryPlan:
+    def __init__(self, criteria, index_steps, filters, scan, estimates):
+        """
+        :type criteria: list[Criterion]
+        :type index_steps: list[Criterion]
+        :param index_steps: index lookups, most selective first
+        :type filters: list[Criterion]
+        :param filters: criteria evaluated against each candidate
+        :type scan: bool
+        :param scan: no index applies, every group is a candidate
+        :type estimates: dict
+        """
+        self.criteria = criteria
+        self.index_steps = index_steps
+        self.filters = filters
+        self.scan = scan
+        self.estimates = estimates
+
+    def __str__(self):
+        lines = []
+
+        if self.scan:
+            lines.append("FULL SCAN")
+        for i, step in enumerate(self.index_steps):
+            lines.append("{} {!r} (estimated {} groups)".format(
+                "INDEX" if i == 0 else "INTERSECT", step, self.estimates[id(step)]))
+        for criterion in self.filters:
+            lines.append("FILTER {!r}".format(criterion))
+
+        return "\n".join(lines)
+
+    __repr__ = __str__
+
+
+def plan(criteria, index):
+    """
+    Use every indexable criterion, starting from the most selective one,
+    and evaluate the rest as filters. Without any indexable criterion the
+    plan is a full scan.
+
+    :type criteria: list[Criterion]
+    :type index: spotinst_sdk.spotinst_fleet_index.FleetIndex
+    :rtype: QueryPlan
+    """
+    indexed = [criterion for criterion in criteria if criterion.is_indexed()]
+    filters = [criterion for criterion in criteria if not criterion.is_indexed()]
+
+    estimates = dict((id(criterion), criterion.estimate(index))
+                     for criterion in indexed)
+    indexed.sort(key=lambda criterion: estimates[id(criterion)])
+
+    return QueryPlan(criteria, indexed, filters, not indexed, estimates)
+
+
+def execute(query_plan, index, snapshot):
+    """
+    :rtype: list[dict]
+    """
+    if query_plan.scan:
+        candidates = snapshot.groups.keys()
+    else:
+        candidates = None
+        for step in query_plan.index_steps:
+            found = step.lookup(index)
+            candidates = set(found) if candidates is None else candidates & found
+            if not candidates:
+                break
+
+    results = []
+    for group_id in sorted(candidates):
+        group = snapshot.get_group(group_id)
+        if group is None:
+            continue
+        # indexed criteria are re-checked too, the index is updated just
+        # after a new snapshot is published
+        if all(criterion.matches(group) for criterion in query_plan.criteria):
+            results.append(group)
+
+    return results
+
+
+def parse_criteria(criteria):
+    """
+    :type criteria: dict
+    :rtype: list[Criterion]
+    """
+    return [Criterion.parse(key, value) for key, value in sorted(criteria.items())]
+
+
+def group_values(group, field):
+    return [value for key, value in spotinst_fleet_index.extract_keys(group)
+            if key == field]
+
+
+def resolve_path(item, path):
+    value = item
+    for part in path.split("__"):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
@@ -1,11 +1,45 @@
 import base64
+import hashlib
+import io
 import json
 import os
+import re
+import shutil
+import stat
+import sys
 import tempfile
+import threading
 import zipfile
+import zlib
 import logging
 
+from spotinst_sdk import spotinst_executor
+
 none = "d3043820717d74d9a17694c176d39733"
+
+INLINE_SOURCE_PLACEHOLDER = "INLINE_BASE64_SOURCE_CODE"
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+ENCODE_CHUNK_SIZE = 3 * 64 * 1024
+ZIP_CHUNK_SIZE = 64 * 1024
+DEFAULT_COMPRESSION_LEVEL = 6
+DEFAULT_ZIP_WORKERS = 4
+
+# zipfile can stream an entry from 3.6 on and takes a per-entry level
+# from 3.7 on
+ZIP_STREAMING = sys.version_info >= (3, 6)
+ZIP_ENTRY_LEVELS = sys.version_info >= (3, 7)
+
+# entries get fixed timestamps and modes so unchanged sources always
+# produce the same bundle bytes
+ZIP_FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+BUNDLE_FORMAT_VERSION = 1
+
+IGNORE_FILE_NAME = ".spotinstignore"
+DEFAULT_IGNORE_PATTERNS = [
+    ".git/", ".hg/", ".svn/", "__pycache__/", "*.pyc", IGNORE_FILE_NAME]
+DEFAULT_BUNDLE_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), '.spotinst', 'functions')
 logger = logging.getLogger(__name__)
 
 
@@ -69,8 +103,33 @@ class EnvironmentCreationRequest:
 
 
 class FunctionCreationRequest:
-    def __init__(self, function, print_output=True):
+    def __init__(self, function, print_output=True,
+                 compression_level=DEFAULT_COMPRESSION_LEVEL,
+                 max_workers=DEFAULT_ZIP_WORKERS,
+                 bundle_cache=None,
+                 ignore_patterns=None):
+        """
+
+        :type function: Function
+        :type print_output: bool
+        :type compression_level: int
+        :param compression_level: zlib level, 0 (store) to 9 (best)
+        :type max_workers: int
+        :param max_workers: threads compressing files in parallel, 1 to
+                            compress them one by one
+        :type bundle_cache: BundleCache
+        :param bundle_cache: reuse the encoded bundle when the tree is unchanged
+        :type ignore_patterns: list[str]
+        :param ignore_patterns: gitignore style patterns, in addition to the
+            defaults and the directory's .spotinstignore
+        """
         self.should_print_output = print_output
+        self.compression_level = compression_level
+        self.max_workers = max_workers
+        self.bundle_cache = bundle_cache
+        self.ignore_patterns = ignore_patterns
+        self.ignored_bytes = 0
+        self.bundle_hash = None
         self.function = self.rebuildFunctionInlineCode(function)
 
     def print_output(self, output, level="debug"):
@@ -90,32 +149,610 @@ class FunctionCreationRequest:
         directory = function.directory
         handler = function.handler
 
-        with tempfile.NamedTemporaryFile() as temp:
-            self.zip(directory, temp.name)
+        files = self.collect_files(directory)
+        self.source = None
+
+        if self.bundle_cache is not None:
+            self.bundle_hash = self.bundle_cache.tree_hash(
+                files, self.compression_level)
+            bundle_path = self.bundle_cache.get_bundle(self.bundle_hash)
+
+            if bundle_path is not None:
+                self.source = open(bundle_path, "rb")
+                self.print_output("reusing cached bundle {}".format(
+                    self.bundle_hash), "info")
 
-            temp.seek(0)
-            base64content = base64.b64encode(temp.read())
-            function.code = {'source': base64content, 'handler': handler}
-            del function.directory
-            del function.handler
+        if self.source is None:
+            self.source = self.package(files)
+
+            if self.bundle_cache is not None:
+                self.bundle_cache.put_bundle(self.bundle_hash, self.source)
+
+        function.code = {'source': INLINE_SOURCE_PLACEHOLDER, 'handler': handler}
+        del function.directory
+        del function.handler
 
         return function
 
+    def package(self, files):
+        """
+        :rtype: tempfile.SpooledTemporaryFile
+        :return: base64 encoded zip of files
+        """
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as archive:
+            write_zip(archive, files, compression_level=self.compression_level,
+                      max_workers=self.max_workers)
+
+            archive.seek(0)
+            source = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+            encode_base64(archive, source)
+
+        source.seek(0)
+        return source
+
     def zip(self, src, dst):
         self.print_output("info level", "info")
-        zf = zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED)
+        write_zip(dst, self.collect_files(src),
+                  compression_level=self.compression_level,
+                  max_workers=self.max_workers)
+
+    def collect_files(self, src):
+        """
+        Ignored directories are pruned during the walk; the size of what
+        was left out is kept in ignored_bytes.
+
+        :rtype: list[tuple]
+        :return: [(absolute path, archive name)] in sorted walk order
+        """
         abs_src = os.path.abspath(src)
-        for dirname, subdirs, files in os.walk(src):
-            for filename in files:
-                absname = os.path.abspath(os.path.join(dirname, filename))
-                arcname = absname[len(abs_src) + 1:]
+        rules = IgnoreRules.from_directory(abs_src, self.ignore_patterns)
+        collected = []
+        ignored_bytes = 0
+
+        for dirname, subdirs, files in os.walk(abs_src):
+            reldir = dirname[len(abs_src) + 1:].replace(os.sep, "/")
+
+            kept = []
+            for subdir in sorted(subdirs):
+                relpath = reldir + "/" + subdir if reldir else subdir
+                if rules.is_ignored(relpath, True):
+                    ignored_bytes += directory_size(os.path.join(dirname, subdir))
+                else:
+                    kept.append(subdir)
+            subdirs[:] = kept
+
+            for filename in sorted(files):
+                absname = os.path.join(dirname, filename)
+                relpath = reldir + "/" + filename if reldir else filename
+
+                if rules.is_ignored(relpath, False):
+                    ignored_bytes += os.path.getsize(absname)
+                    continue
 
                 self.print_output("collecting file {}".format(
                         os.path.join(
                             dirname, filename)))
-                zf.write(absname, arcname)
-        zf.close()
+                collected.append((absname, absname[len(abs_src) + 1:]))
+
+        self.ignored_bytes = ignored_bytes
+        self.print_output("ignored {} bytes of {}".format(ignored_bytes, src), "info")
+
+        return collected
+
+    def close(self):
+        if self.source is not None:
+            self.source.close()
+
+    def build_body(self, body_json):
+        """
+        Stream the request body with the encoded bundle spliced in place of
+        the inline source placeholder.
+
+        :type body_json: str
+        :rtype: InlineSourceBody
+        """
+        return InlineSourceBody(body_json, self.source)
 
     def toJSON(self):
-        return json.dumps(self, default=lambda o: o.__dict__,
+        return json.dumps(dict(function=self.function),
+                          default=lambda o: o.__dict__,
                           sort_keys=True, indent=4)
+
+
+class InlineSourceBody:
+    def __init__(self, body_json, source):
+        """
+        File-like request body made of the JSON around the placeholder and
+        the base64 encoded source, read without joining them in memory.
+
+        The body supports tell() and seek(), which requests uses to rewind
+        it before resending; iterating always starts from the beginning.
+        Closing it closes source.
+
+        :type body_json: str
+        :type source: file
+        """
+        prefix, suffix = body_json.split(
+            json.dumps(INLINE_SOURCE_PLACEHOLDER), 1)
+
+        source.seek(0, os.SEEK_END)
+        source_length = source.tell()
+        source.seek(0)
+
+        prefix = (prefix + '"').encode('utf-8')
+        suffix = ('"' + suffix).encode('utf-8')
+
+        self._parts = [io.BytesIO(prefix), source, io.BytesIO(suffix)]
+        self._sizes = [len(prefix), source_length, len(suffix)]
+        self._length = sum(self._sizes)
+        self._position = 0
+
+    def __len__(self):
+        return self._length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self):
+        self.seek(0)
+
+        while True:
+            chunk = self.read(ENCODE_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self._length
+
+        self._position = max(0, min(offset, self._length))
+
+        # parts before the position are read to the end, later ones rewound
+        start = 0
+        for part, size in zip(self._parts, self._sizes):
+            part.seek(max(0, min(self._position - start, size)))
+            start += size
+
+        return self._position
+
+    def read(self, size=-1):
+        chunks = []
+
+        size = -1 if size is None else size
+
+        for part in self._parts:
+            if size == 0:
+                break
+
+            chunk = part.read(size)
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+
+        data = b"".join(chunks)
+        self._position += len(data)
+        return data
+
+    def close(self):
+        for part in self._parts:
+            part.close()
+
+
+def encode_base64(src, dst, chunk_size=ENCODE_CHUNK_SIZE):
+    """
+    Base64 encode src into dst chunk by chunk. chunk_size must be a
+    multiple of 3 so no padding is emitted mid-stream.
+    """
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        dst.write(base64.b64encode(chunk))
+
+
+# region Ignore Rules
+class IgnoreRules:
+    def __init__(self, patterns):
+        """
+        gitignore style matching: '#' comments, '!' negation, trailing '/'
+        for directories only, a '/' elsewhere anchors the pattern to the
+        root, '*', '?' and '**' wildcards. The last matching rule wins.
+
+        :type patterns: list[str]
+        """
+        self.rules = []
+
+        for pattern in patterns:
+            rule = self.compile(pattern)
+            if rule is not None:
+                self.rules.append(rule)
+
+    @classmethod
+    def from_directory(cls, src, extra_patterns=None):
+        patterns = list(DEFAULT_IGNORE_PATTERNS)
+
+        try:
+            with open(os.path.join(src, IGNORE_FILE_NAME)) as f:
+                patterns.extend(f.read().splitlines())
+        except (IOError, OSError):
+            pass
+
+        patterns.extend(extra_patterns or [])
+
+        return cls(patterns)
+
+    @staticmethod
+    def compile(pattern):
+        pattern = pattern.strip()
+        if not pattern or pattern.startswith("#"):
+            return None
+
+        negate = pattern.startswith("!")
+        if negate:
+            pattern = pattern[1:]
+
+        dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+
+        regex = glob_to_regex(pattern)
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+
+        return re.compile(regex + "$"), negate, dir_only
+
+    def is_ignored(self, relpath, is_dir):
+        ignored = False
+
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relpath):
+                ignored = not negate
+
+        return ignored
+
+
+def glob_to_regex(pattern):
+    parts = []
+    i = 0
+
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1:]:
+            end = pattern.index("]", i + 1)
+            chars = pattern[i + 1:end].replace("\\", "\\\\")
+            if chars.startswith("!"):
+                chars = "^" + chars[1:]
+            parts.append("[" + chars + "]")
+            i = end + 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+
+    return "".join(parts)
+
+
+def directory_size(path):
+    total = 0
+    for dirname, subdirs, files in os.walk(path):
+        for filename in files:
+            try:
+                total += os.lstat(os.path.join(dirname, filename)).st_size
+            except OSError:
+                pass
+    return total
+
+# endregion
+
+
+# region Bundle Cache
+class BundleCache:
+    def __init__(self, path=DEFAULT_BUNDLE_CACHE_DIR):
+        """
+        Content addressed cache of encoded function bundles.
+
+        Bundles are keyed by a hash of the source tree (file names and
+        contents) and packaging options. File hashes are remembered by
+        size and mtime so unchanged files are not re-read. The last
+        deployment of each function is recorded so identical redeploys can
+        skip the API call, and application and environment ids created by
+        DeploymentPipeline are kept so later runs reuse them.
+
+        :type path: str
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        self._stat_index = self._load_json("stat_index.json")
+        self._deployments = self._load_json("deployments.json")
+        self._resource_ids = self._load_json("resource_ids.json")
+
+    def tree_hash(self, files, compression_level=DEFAULT_COMPRESSION_LEVEL):
+        """
+        :type files: list[tuple]
+        :param files: [(absolute path, archive name)]
+        :rtype: str
+        """
+        digest = hashlib.sha256()
+        digest.update("{}:{}\n".format(
+            BUNDLE_FORMAT_VERSION, compression_level).encode("utf-8"))
+
+        updates = dict()
+        for absname, arcname in files:
+            st = os.stat(absname)
+            signature = [st.st_size, st.st_mtime, normalized_mode(st.st_mode)]
+
+            with self._lock:
+                cached = self._stat_index.get(absname)
+
+            if cached is not None and cached[:3] == signature:
+                file_hash = cached[3]
+            else:
+                file_hash = self.file_hash(absname)
+                updates[absname] = signature + [file_hash]
+
+            digest.update("{}\0{}\0{}\n".format(
+                arcname.replace(os.sep, "/"), signature[2], file_hash).encode("utf-8"))
+
+        if updates:
+            # the cache is shared by DeploymentPipeline workers
+            with self._lock:
+                self._stat_index.update(updates)
+                self._save_json("stat_index.json", self._stat_index)
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def file_hash(absname):
+        digest = hashlib.sha256()
+        with open(absname, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def bundle_path(self, bundle_hash):
+        return os.path.join(self.path, "{}.b64".format(bundle_hash))
+
+    def get_bundle(self, bundle_hash):
+        """
+        :rtype: str
+        :return: path of the cached encoded bundle, None when not cached
+        """
+        path = self.bundle_path(bundle_hash)
+        return path if os.path.isfile(path) else None
+
+    def put_bundle(self, bundle_hash, source):
+        fd, temp_path = tempfile.mkstemp(dir=self.path)
+        with os.fdopen(fd, "wb") as f:
+            shutil.copyfileobj(source, f)
+        os.rename(temp_path, self.bundle_path(bundle_hash))
+        source.seek(0)
+
+    @staticmethod
+    def deployment_hash(body_json, bundle_hash):
+        return hashlib.sha256(
+            (body_json + "\0" + bundle_hash).encode("utf-8")).hexdigest()
+
+    def get_deployment(self, key, deployment_hash):
+        """
+        :rtype: dict
+        :return: the recorded create_function result when the last
+            deployment of key had the same hash, otherwise None
+        """
+        with self._lock:
+            deployment = self._deployments.get(key)
+
+        if deployment and deployment.get("hash") == deployment_hash:
+            return deployment.get("response")
+
+        return None
+
+    def put_deployment(self, key, deployment_hash, response):
+        with self._lock:
+            self._deployments[key] = dict(hash=deployment_hash, response=response)
+            self._save_json("deployments.json", self._deployments)
+
+    def get_resource_id(self, key):
+        """
+        :type key: str
+        :rtype: str
+        :return: the id recorded for key, None when unknown
+        """
+        with self._lock:
+            return self._resource_ids.get(key)
+
+    def put_resource_id(self, key, resource_id):
+        with self._lock:
+            self._resource_ids[key] = resource_id
+            self._save_json("resource_ids.json", self._resource_ids)
+
+    def _load_json(self, name):
+        try:
+            with open(os.path.join(self.path, name)) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return dict()
+
+    def _save_json(self, name, data):
+        fd, temp_path = tempfile.mkstemp(dir=self.path)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.rename(temp_path, os.path.join(self.path, name))
+
+# endregion
+
+
+# region Zip
+class ZipEntry:
+    def __init__(self, info, chunks):
+        """
+        A file deflated by deflate_file, ready to be added to a zip.
+
+        :type info: zipfile.ZipInfo
+        :param info: with crc and sizes filled in
+        :type chunks: list[bytes]
+        :param chunks: raw deflate stream
+        """
+        self.info = info
+        self.chunks = chunks
+
+
+def write_zip(dst, files, compression_level=DEFAULT_COMPRESSION_LEVEL,
+              max_workers=DEFAULT_ZIP_WORKERS):
+    """
+    Write a deflated zip of files to dst, sorted by archive name.
+
+    With max_workers > 1 files are deflated on a thread pool, at most a
+    few per worker ahead of the writer, and added in order. Otherwise
+    entries are copied in chunks, so memory use does not grow with file
+    sizes. Both produce the same bytes.
+
+    :type dst: str | file
+    :type files: list[tuple]
+    :param files: [(absolute path, archive name)]
+    :type max_workers: int
+    """
+    files = sorted(files, key=lambda item: archive_name(item[1]))
+
+    zf = zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED, allowZip64=True)
+    try:
+        if max_workers and max_workers > 1 and len(files) > 1:
+            results = spotinst_executor.iter_batch(
+                lambda item: deflate_file(item[0], item[1], compression_level),
+                files, max_workers=max_workers)
+            try:
+                for result in results:
+                    if not result.ok:
+                        raise result.error
+                    add_deflated(zf, result.result)
+            finally:
+                results.close()
+        else:
+            for absname, arcname in files:
+                write_file(zf, absname, arcname, compression_level)
+    finally:
+        zf.close()
+
+
+def zip_info(absname, arcname):
+    st = os.stat(absname)
+
+    info = zipfile.ZipInfo(archive_name(arcname), ZIP_FIXED_DATE_TIME)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.external_attr = normalized_mode(st.st_mode) << 16
+    # lets zipfile pick zip64 headers for large files up front
+    info.file_size = st.st_size
+    return info
+
+
+def write_file(zf, absname, arcname, compression_level):
+    info = zip_info(absname, arcname)
+    if ZIP_ENTRY_LEVELS:
+        info._compresslevel = compression_level
+
+    with open(absname, "rb") as src:
+        if ZIP_STREAMING:
+            with zf.open(info, "w") as entry:
+                shutil.copyfileobj(src, entry, ZIP_CHUNK_SIZE)
+        else:
+            # no entry writer before 3.6, zlib's default level
+            zf.writestr(info, src.read())
+
+
+def deflate_file(absname, arcname, compression_level):
+    """
+    Raw deflate a single file, reading it in chunks. zlib releases the GIL
+    while compressing, so write_zip runs this on a thread pool.
+
+    :rtype: ZipEntry
+    """
+    info = zip_info(absname, arcname)
+    compressor = zlib.compressobj(compression_level, zlib.DEFLATED, -15)
+    chunks = []
+    crc = size = 0
+
+    with open(absname, "rb") as src:
+        while True:
+            chunk = src.read(ZIP_CHUNK_SIZE)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            chunks.append(compressor.compress(chunk))
+
+    chunks.append(compressor.flush())
+
+    info.CRC = crc & 0xFFFFFFFF
+    info.file_size = size
+    info.compress_size = sum(len(chunk) for chunk in chunks)
+    return ZipEntry(info, chunks)
+
+
+def add_deflated(zf, entry):
+    """
+    Append a deflate_file entry to zf. zipfile has no call taking already
+    compressed data, so this does what its entry writer does once an entry
+    is complete; the central directory is still written by zf.close().
+
+    :type zf: zipfile.ZipFile
+    :type entry: ZipEntry
+    """
+    info = entry.info
+    # the same test zipfile applies, so both write_zip paths match
+    zip64 = info.file_size * 1.05 > zipfile.ZIP64_LIMIT
+
+    # zipfile tracks the end of entries in start_dir from python 3
+    start_dir = getattr(zf, "start_dir", None)
+    if start_dir is not None:
+        zf.fp.seek(start_dir)
+
+    info.header_offset = zf.fp.tell()
+    zf._writecheck(info)
+    zf._didModify = True
+
+    zf.fp.write(info.FileHeader(zip64))
+    for chunk in entry.chunks:
+        zf.fp.write(chunk)
+
+    if start_dir is not None:
+        zf.start_dir = zf.fp.tell()
+    zf.filelist.append(info)
+    zf.NameToInfo[info.filename] = info
+
+
+def archive_name(arcname):
+    return arcname.replace(os.sep, "/")
+
+
+def normalized_mode(mode):
+    if mode & stat.S_IXUSR:
+        return stat.S_IFREG | 0o755
+    return stat.S_IFREG | 0o644
+
+# endregion
@@ -0,0 +1,249 @@
+import copy
+import logging
+import threading
+import time
+
+from spotinst_sdk import spotinst_executor
+from spotinst_sdk import spotinst_functions
+
+logger = logging.getLogger(__name__)
+
+none = spotinst_functions.none
+
+
+class FunctionDeployment:
+    def __init__(
+            self,
+            function,
+            application_name,
+            environment_name,
+            providers=none,
+            locations=none):
+        """
+        A function to deploy into an application environment that is
+        resolved (or created) by name.
+
+        :type function: spotinst_functions.Function
+        :type application_name: str
+        :type environment_name: str
+        :type providers: list[str]
+        :type locations: list[str]
+        """
+        self.function = function
+        self.application_name = application_name
+        self.environment_name = environment_name
+        self.providers = providers
+        self.locations = locations
+
+
+class DeploymentResult:
+    def __init__(self, name, response=None, error=None,
+                 package_seconds=None, upload_seconds=None):
+        self.name = name
+        self.response = response
+        self.error = error
+        self.package_seconds = package_seconds
+        self.upload_seconds = upload_seconds
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return ("DeploymentResult(name={!r}, ok={}, package_seconds={}, "
+                "upload_seconds={})").format(
+            self.name, self.ok, self.package_seconds, self.upload_seconds)
+
+
+class DeploymentPipeline:
+    def __init__(
+            self,
+            client,
+            max_workers=spotinst_executor.DEFAULT_MAX_WORKERS,
+            rate_limit=None,
+            compression_level=spotinst_functions.DEFAULT_COMPRESSION_LEVEL,
+            bundle_cache=None,
+            ignore_patterns=None,
+            application_ids=None,
+            environment_ids=None):
+        """
+        Packages and uploads many functions concurrently. Each worker
+        packages a bundle and then uploads it, so packaging overlaps with
+        uploads; only uploads are rate limited.
+
+        Applications and environments are referred to by name. An unknown
+        name is created once per run; with a bundle_cache the created ids
+        are stored in the cache directory and reused by later runs, so
+        redeploying doesn't create duplicates. Ids can also be passed in
+        with application_ids and environment_ids.
+
+        :type client: spotinst_sdk.SpotinstClient
+        :type max_workers: int
+        :type rate_limit: float | spotinst_executor.RateLimiter
+        :param rate_limit: function uploads per second
+        :type compression_level: int
+        :type bundle_cache: spotinst_functions.BundleCache
+        :type ignore_patterns: list[str]
+        :type application_ids: dict
+        :param application_ids: known {application name: id}
+        :type environment_ids: dict
+        :param environment_ids: known {(application name, environment name): id}
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.rate_limiter = spotinst_executor.resolve_rate_limiter(rate_limit)
+        self.compression_level = compression_level
+        self.bundle_cache = bundle_cache
+        self.ignore_patterns = ignore_patterns
+
+        self.application_ids = dict(application_ids or {})
+        self.environment_ids = dict(environment_ids or {})
+        self._lock = threading.Lock()
+
+    # region Resolve
+    def resource_key(self, *names):
+        return "/".join((self.client.account_id or "",) + names)
+
+    def resolve_application(self, name):
+        with self._lock:
+            if name not in self.application_ids:
+                key = self.resource_key("application", name)
+                application_id = self.load_resource_id(key)
+
+                if application_id is None:
+                    logger.info("creating application {}".format(name))
+                    app = self.client.create_application(
+                        spotinst_functions.Application(name=name))
+                    application_id = app["id"]
+                    self.store_resource_id(key, application_id)
+
+                self.application_ids[name] = application_id
+
+            return self.application_ids[name]
+
+    def resolve_environment(self, deployment):
+        key = (deployment.application_name, deployment.environment_name)
+
+        with self._lock:
+            environment_id = self.environment_ids.get(key)
+
+        if environment_id is None:
+            application_id = self.resolve_application(deployment.application_name)
+
+            with self._lock:
+                if key not in self.environment_ids:
+                    resource_key = self.resource_key("environment", *key)
+                    environment_id = self.load_resource_id(resource_key)
+
+                    if environment_id is None:
+                        logger.info("creating environment {}/{}".format(*key))
+                        env = self.client.create_environment(
+                            spotinst_functions.Environment(
+                                name=deployment.environment_name,
+                                application_id=application_id,
+                                providers=deployment.providers,
+                                locations=deployment.locations))
+                        environment_id = env["id"]
+                        self.store_resource_id(resource_key, environment_id)
+
+                    self.environment_ids[key] = environment_id
+
+                environment_id = self.environment_ids[key]
+
+        return environment_id
+
+    def load_resource_id(self, key):
+        if self.bundle_cache is None:
+            return None
+        return self.bundle_cache.get_resource_id(key)
+
+    def store_resource_id(self, key, resource_id):
+        if self.bundle_cache is not None:
+            self.bundle_cache.put_resource_id(key, resource_id)
+
+    # endregion
+
+    def deploy(self, deployments):
+        """
+        :type deployments: list[FunctionDeployment]
+        :rtype: list[DeploymentResult]
+        """
+        deployments = list(deployments)
+
+        # environments are resolved up front, one call per distinct name
+        environments = spotinst_executor.run_batch(
+            self.resolve_environment,
+            self.unique_environments(deployments),
+            max_workers=1)
+        failed_environments = dict(
+            ((result.key.application_name, result.key.environment_name),
+             result.error)
+            for result in environments if not result.ok)
+
+        results = spotinst_executor.run_batch(
+            lambda deployment: self.deploy_function(
+                deployment, failed_environments),
+            deployments, max_workers=self.max_workers)
+
+        report = [result.result for result in results]
+
+        for result in report:
+            if not result.ok:
+                logger.error("failed deploying function {}: {}".format(
+                    result.name, result.error))
+
+        return report
+
+    def deploy_function(self, deployment, failed_environments=None):
+        # packaging rewrites the function, leave the caller's object alone
+        function = copy.copy(deployment.function)
+        name = function.name
+
+        key = (deployment.application_name, deployment.environment_name)
+        if failed_environments and key in failed_environments:
+            return DeploymentResult(name, error=failed_environments[key])
+
+        start = time.time()
+        try:
+            function.environment_id = self.resolve_environment(deployment)
+
+            fx = spotinst_functions.FunctionCreationRequest(
+                function, self.client.should_print_output,
+                compression_level=self.compression_level,
+                # functions are already packaged in parallel
+                max_workers=1,
+                bundle_cache=self.bundle_cache,
+                ignore_patterns=self.ignore_patterns)
+        except Exception as e:
+            return DeploymentResult(name, error=e,
+                                    package_seconds=time.time() - start)
+
+        package_seconds = time.time() - start
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+        start = time.time()
+        try:
+            response = self.client.send_function_creation(fx)
+        except Exception as e:
+            return DeploymentResult(name, error=e,
+                                    package_seconds=package_seconds,
+                                    upload_seconds=time.time() - start)
+
+        return DeploymentResult(name, response=response,
+                                package_seconds=package_seconds,
+                                upload_seconds=time.time() - start)
+
+    @staticmethod
+    def unique_environments(deployments):
+        seen = set()
+        unique = []
+
+        for deployment in deployments:
+            key = (deployment.application_name, deployment.environment_name)
+            if key not in seen:
+                seen.add(key)
+                unique.append(deployment)
+
+        return unique
@@ -0,0 +1,235 @@
+import bisect
+import re
+import threading
+
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse
+
+# upper bounds in seconds, as in the Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75,
+                   1.0, 2.5, 5.0, 7.5, 10.0)
+
+STATUS_ERROR = "error"
+METRIC_PREFIX = "spotinst_sdk"
+
+# all digits, or a prefixed id such as sig-1a2b3c or i-0abc
+_id_segment = re.compile(r'^\d+$|^(?=.*\d).*-')
+
+
+class MetricsSink(object):
+    """
+    Receives one call per request event. The base class discards them;
+    enabled = False lets the client skip timing and byte counting.
+    """
+    enabled = False
+
+    def request_started(self, method, endpoint):
+        pass
+
+    def request_finished(self, method, endpoint, status, seconds,
+                         request_bytes, response_bytes):
+        """
+        :type status: int | str
+        :param status: HTTP status code, "error" when no response arrived
+        """
+        pass
+
+    def retry(self, method, endpoint):
+        pass
+
+
+NULL_SINK = MetricsSink()
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        :rtype: list[tuple]
+        :return: [(upper bound, observations <= bound)], last bound "+Inf"
+        """
+        result = []
+        total = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class InMemoryMetrics(MetricsSink):
+    enabled = True
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Thread-safe in-process aggregation, read with snapshot() or
+        to_prometheus(). Series are labelled by method and endpoint, the
+        URL path with id segments replaced by {id}.
+        """
+        self.buckets = buckets
+
+        self._latency = dict()
+        self._requests = dict()
+        self._request_bytes = dict()
+        self._response_bytes = dict()
+        self._retries = dict()
+        self._in_flight = dict()
+        self._lock = threading.Lock()
+
+    def request_started(self, method, endpoint):
+        key = (method, endpoint)
+        with self._lock:
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+
+    def request_finished(self, method, endpoint, status, seconds,
+                         request_bytes, response_bytes):
+        key = (method, endpoint)
+        with self._lock:
+            self._in_flight[key] = self._in_flight.get(key, 0) - 1
+
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+            status_key = key + (str(status),)
+            self._requests[status_key] = self._requests.get(status_key, 0) + 1
+            self._request_bytes[key] = self._request_bytes.get(key, 0) + request_bytes
+            self._response_bytes[key] = self._response_bytes.get(key, 0) + response_bytes
+
+    def retry(self, method, endpoint):
+        key = (method, endpoint)
+        with self._lock:
+            self._retries[key] = self._retries.get(key, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            for series in (self._latency, self._requests, self._request_bytes,
+                           self._response_bytes, self._retries, self._in_flight):
+                series.clear()
+
+    def snapshot(self):
+        """
+        :rtype: dict
+        :return: {"method endpoint": {"count", "sum", "buckets", "status",
+                 "request_bytes", "response_bytes", "retries", "in_flight"}}
+        """
+        with self._lock:
+            keys = set(self._latency) | set(self._retries) | set(self._in_flight)
+            result = dict()
+
+            for method, endpoint in sorted(keys):
+                key = (method, endpoint)
+                histogram = self._latency.get(key) or Histogram(self.buckets)
+
+                result["{} {}".format(method, endpoint)] = dict(
+                    count=histogram.count,
+                    sum=histogram.sum,
+                    buckets=histogram.cumulative(),
+                    status=dict((status, count) for (m, e, status), count
+                                in self._requests.items() if (m, e) == key),
+                    request_bytes=self._request_bytes.get(key, 0),
+                    response_bytes=self._response_bytes.get(key, 0),
+                    retries=self._retries.get(key, 0),
+                    in_flight=self._in_flight.get(key, 0))
+
+            return result
+
+    def to_prometheus(self):
+        """
+        :rtype: str
+        :return: Prometheus text exposition format
+        """
+        lines = []
+
+        with self._lock:
+            lines.extend(header("request_duration_seconds", "histogram",
+                                "Spotinst API request latency."))
+            for (method, endpoint), histogram in sorted(self._latency.items()):
+                for bound, count in histogram.cumulative():
+                    lines.append(sample("request_duration_seconds_bucket", count,
+                                        method=method, endpoint=endpoint,
+                                        le=format_bound(bound)))
+                lines.append(sample("request_duration_seconds_sum", histogram.sum,
+                                    method=method, endpoint=endpoint))
+                lines.append(sample("request_duration_seconds_count", histogram.count,
+                                    method=method, endpoint=endpoint))
+
+            lines.extend(header("requests_total", "counter",
+                                "Spotinst API requests by status code."))
+            for (method, endpoint, status), count in sorted(self._requests.items()):
+                lines.append(sample("requests_total", count, method=method,
+                                    endpoint=endpoint, status=status))
+
+            for name, series, help_text in (
+                    ("request_bytes_total", self._request_bytes, "Request body bytes sent."),
+                    ("response_bytes_total", self._response_bytes, "Response body bytes received."),
+                    ("retries_total", self._retries, "Retried requests.")):
+                lines.extend(header(name, "counter", help_text))
+                for (method, endpoint), value in sorted(series.items()):
+                    lines.append(sample(name, value, method=method, endpoint=endpoint))
+
+            lines.extend(header("requests_in_flight", "gauge",
+                                "Requests waiting for a response."))
+            for (method, endpoint), value in sorted(self._in_flight.items()):
+                lines.append(sample("requests_in_flight", value,
+                                    method=method, endpoint=endpoint))
+
+        return "\n".join(lines) + "\n"
+
+
+def endpoint_of(url):
+    """
+    URL path with id segments replaced, e.g.
+    https://api.spotinst.io/aws/ec2/group/sig-1234/status -> /aws/ec2/group/{id}/status
+    """
+    path = urlparse(url).path
+    return "/".join("{id}" if _id_segment.search(segment) else segment
+                    for segment in path.split("/"))
+
+
+def body_size(body):
+    if body is None:
+        return 0
+    try:
+        return len(body)
+    except TypeError:
+        return 0
+
+
+def header(name, metric_type, help_text):
+    name = "{}_{}".format(METRIC_PREFIX, name)
+    return ["# HELP {} {}".format(name, help_text),
+            "# TYPE {} {}".format(name, metric_type)]
+
+
+def sample(name, value, method, endpoint, **labels):
+    # the series labels first, then status or le
+    pairs = [("method", method), ("endpoint", endpoint)] + sorted(labels.items())
+    label_text = ",".join('{}="{}"'.format(key, escape(label)) for key, label in pairs)
+    return "{}_{}{{{}}} {}".format(METRIC_PREFIX, name, label_text, format_value(value))
+
+
+def format_bound(bound):
+    return bound if isinstance(bound, str) else repr(float(bound))
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
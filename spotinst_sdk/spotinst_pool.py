@@ -0,0 +1,117 @@
+import copy
+import threading
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk import spotinst_executor
+
+DEFAULT_MAX_CONNECTIONS = 32
+
+
+class ClientPool:
+    def __init__(
+            self,
+            auth_token=None,
+            profile=None,
+            credentials_file=None,
+            rate_limit=None,
+            max_connections=DEFAULT_MAX_CONNECTIONS,
+            print_output=False,
+            log_level=None,
+            user_agent=None,
+            metrics=None,
+            tracer=None):
+        """
+        Per-account SpotinstClient views over one transport.
+
+        Every view shares the pool's requests.Session (one keep-alive
+        connection pool), its rate limiter and the client caches; a view
+        only differs in the accountId sent with each request. A metrics
+        sink or tracer likewise sees the requests of every account, e.g.
+
+            pool = ClientPool(auth_token="token", rate_limit=20)
+            groups = pool.account("act-123").get_elastigroups()
+
+        :type auth_token: str
+        :param auth_token: a token with access to every account used
+        :type profile: str
+        :type credentials_file: str
+        :type rate_limit: float | spotinst_executor.RateLimiter
+        :param rate_limit: requests per second across all accounts
+        :type max_connections: int
+        :param max_connections: connections kept open to the API
+        :type print_output: bool
+        :type log_level: str
+        :type user_agent: str
+        :type metrics: spotinst_metrics.MetricsSink
+        :type tracer: spotinst_tracing.Tracer
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=1, pool_maxsize=max_connections))
+
+        self.client = SpotinstClient(
+            auth_token=auth_token,
+            profile=profile,
+            credentials_file=credentials_file,
+            print_output=print_output,
+            log_level=log_level,
+            user_agent=user_agent,
+            session=self.session,
+            rate_limit=rate_limit,
+            metrics=metrics,
+            tracer=tracer)
+
+        self._views = dict()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._views)
+
+    def account(self, account_id):
+        """
+        :type account_id: str
+        :rtype: SpotinstClient
+        """
+        view = self._views.get(account_id)
+
+        if view is None:
+            with self._lock:
+                view = self._views.get(account_id)
+
+                if view is None:
+                    # a shallow copy shares session, limiter, metrics, tracer,
+                    # logger and caches
+                    view = copy.copy(self.client)
+                    view.account_id = account_id
+                    view._fleet = None
+                    self._views[account_id] = view
+
+        return view
+
+    __getitem__ = account
+
+    def map(self, fn, account_ids,
+            max_workers=spotinst_executor.DEFAULT_MAX_WORKERS):
+        """
+        Call fn(client) for each account concurrently.
+
+        :type fn: callable
+        :type account_ids: list[str]
+        :rtype: list[spotinst_executor.BatchResult]
+        :return: results keyed by account id, in input order
+        """
+        return spotinst_executor.run_batch(
+            lambda account_id: fn(self.account(account_id)), account_ids,
+            max_workers=max_workers)
+
+    def close(self):
+        self.session.close()
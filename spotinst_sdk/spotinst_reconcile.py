@@ -0,0 +1,310 @@
+import json
+import logging
+import os
+from collections import OrderedDict
+
+import yaml
+
+from spotinst_sdk import spotinst_drift
+from spotinst_sdk import spotinst_executor
+
+logger = logging.getLogger(__name__)
+
+CREATE = "create"
+UPDATE = "update"
+DELETE = "delete"
+
+DEPENDS_ON = "depends_on"
+SPEC_EXTENSIONS = (".yaml", ".yml", ".json")
+
+
+class PlannedAction:
+    def __init__(self, action, name, group_id=None, spec=None, changes=None,
+                 depends_on=None):
+        """
+        :type action: str
+        :param action: create, update or delete
+        :type name: str
+        :type group_id: str
+        :param group_id: live group, None for creates
+        :type spec: dict
+        :param spec: request body, the desired spec for creates and only
+                     the changed top-level sections for updates
+        :type changes: list[spotinst_sdk.spotinst_fleet_diff.ChangeRecord]
+        :type depends_on: list[str]
+        :param depends_on: names of groups to apply before this one
+        """
+        self.action = action
+        self.name = name
+        self.group_id = group_id
+        self.spec = spec
+        self.changes = changes or []
+        self.depends_on = depends_on or []
+
+    def __repr__(self):
+        return "PlannedAction({}, {})".format(self.action, self.name)
+
+
+class Plan:
+    def __init__(self, actions, unchanged):
+        """
+        :type actions: list[PlannedAction]
+        :type unchanged: list[str]
+        :param unchanged: names of desired groups already converged
+        """
+        self.actions = actions
+        self.unchanged = unchanged
+
+    def __len__(self):
+        return len(self.actions)
+
+    def summary(self):
+        lines = []
+
+        for action in self.actions:
+            lines.append("{} {}{}".format(
+                action.action, action.name,
+                "" if action.group_id is None else " ({})".format(action.group_id)))
+            for change in action.changes:
+                lines.append("    {} {}".format(change.kind, change.field))
+
+        counts = dict((kind, 0) for kind in (CREATE, UPDATE, DELETE))
+        for action in self.actions:
+            counts[action.action] += 1
+
+        lines.append("{} to create, {} to update, {} to delete, {} unchanged".format(
+            counts[CREATE], counts[UPDATE], counts[DELETE], len(self.unchanged)))
+
+        return "\n".join(lines)
+
+
+class ApplyResult:
+    def __init__(self, action, result=None, error=None, skipped=False):
+        """
+        :type action: PlannedAction
+        :type skipped: bool
+        :param skipped: not attempted because a dependency failed
+        """
+        self.action = action
+        self.result = result
+        self.error = error
+        self.skipped = skipped
+
+    @property
+    def ok(self):
+        return self.error is None and not self.skipped
+
+    def __repr__(self):
+        return "ApplyResult({}, ok={})".format(self.action, self.ok)
+
+
+class Reconciler:
+    def __init__(
+            self,
+            client,
+            max_workers=spotinst_executor.DEFAULT_MAX_WORKERS,
+            rate_limit=None,
+            prune=False):
+        """
+        Plan and apply create_elastigroup / update_elastigroup /
+        delete_elastigroup calls converging live groups to desired specs.
+
+        Desired groups are matched to live ones by name. Live state comes
+        from a single get_elastigroups call. Live groups without a desired
+        spec are only deleted with prune.
+
+        :type client: spotinst_sdk.SpotinstClient
+        :type max_workers: int
+        :type rate_limit: float | spotinst_executor.RateLimiter
+        :param rate_limit: requests per second shared by every apply call
+        :type prune: bool
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.rate_limiter = spotinst_executor.resolve_rate_limiter(rate_limit)
+        self.prune = prune
+        self.detector = spotinst_drift.DriftDetector(client)
+
+    def plan(self, desired, live=None):
+        """
+        :type desired: dict
+        :param desired: {name: group spec}, see load_desired
+        :type live: list
+        :param live: get_elastigroups items, fetched when not given
+        :rtype: Plan
+        """
+        if live is None:
+            live = self.client.get_elastigroups()
+        elif hasattr(live, "groups"):
+            live = list(live.groups.values())
+
+        live_by_name = dict()
+        for group in live:
+            if group.get("name") in live_by_name:
+                logger.warning("several live groups named {}, using {}".format(
+                    group.get("name"), live_by_name[group.get("name")]["id"]))
+                continue
+            live_by_name[group.get("name")] = group
+
+        actions = []
+        unchanged = []
+
+        for name, spec in desired.items():
+            depends_on = list(spec.get(DEPENDS_ON) or [])
+            spec = self.detector.serialize_dict(
+                dict((key, value) for key, value in spec.items() if key != DEPENDS_ON))
+            spec.setdefault("name", name)
+
+            for dependency in depends_on:
+                if dependency not in desired:
+                    raise ValueError("{} depends on unknown group {}".format(
+                        name, dependency))
+
+            live_group = live_by_name.get(name)
+            if live_group is None:
+                actions.append(PlannedAction(CREATE, name, spec=spec,
+                                             depends_on=depends_on))
+                continue
+
+            changes = self.detector.compare(live_group["id"], spec, live_group)
+            if not changes:
+                unchanged.append(name)
+                continue
+
+            sections = set(change.path[0] for change in changes)
+            actions.append(PlannedAction(
+                UPDATE, name, live_group["id"],
+                dict((key, spec[key]) for key in spec if key in sections),
+                changes, depends_on))
+
+        if self.prune:
+            for name, group in sorted(live_by_name.items(), key=lambda item: str(item[0])):
+                if name not in desired:
+                    actions.append(PlannedAction(DELETE, name, group["id"]))
+
+        return Plan(actions, unchanged)
+
+    def apply(self, plan):
+        """
+        Creates and updates run in dependency levels, each level
+        concurrently; deletes run last. Actions depending on a failed one
+        are skipped.
+
+        :type plan: Plan
+        :rtype: list[ApplyResult]
+        :return: results in plan order
+        """
+        results = dict()
+        failed = set()
+
+        for level in dependency_levels(
+                [action for action in plan.actions if action.action != DELETE]):
+            runnable = []
+            for action in level:
+                if any(dependency in failed for dependency in action.depends_on):
+                    results[id(action)] = ApplyResult(action, skipped=True)
+                    failed.add(action.name)
+                else:
+                    runnable.append(action)
+
+            for result in self._run(runnable):
+                results[id(result.action)] = result
+                if not result.ok:
+                    failed.add(result.action.name)
+
+        for result in self._run([action for action in plan.actions
+                                 if action.action == DELETE]):
+            results[id(result.action)] = result
+
+        return [results[id(action)] for action in plan.actions]
+
+    def _run(self, actions):
+        batch = spotinst_executor.run_batch(
+            self.apply_action, actions,
+            max_workers=self.max_workers, rate_limit=self.rate_limiter)
+
+        for result in batch:
+            if not result.ok:
+                logger.error("failed to {} {}: {}".format(
+                    result.key.action, result.key.name, result.error))
+
+        return [ApplyResult(result.key, result.result, result.error)
+                for result in batch]
+
+    def apply_action(self, action):
+        if action.action == CREATE:
+            return self.client.create_elastigroup(action.spec)
+        if action.action == UPDATE:
+            return self.client.update_elastigroup(action.spec, action.group_id)
+        return self.client.delete_elastigroup(action.group_id)
+
+
+def dependency_levels(actions):
+    """
+    :type actions: list[PlannedAction]
+    :rtype: list[list[PlannedAction]]
+    :return: actions grouped so each one comes after its dependencies
+    """
+    pending = list(actions)
+    planned = set(action.name for action in actions)
+    done = set()
+    levels = []
+
+    while pending:
+        level = [action for action in pending
+                 if all(dependency in done or dependency not in planned
+                        for dependency in action.depends_on)]
+
+        if not level:
+            raise ValueError("dependency cycle between {}".format(
+                ", ".join(sorted(action.name for action in pending))))
+
+        levels.append(level)
+        done.update(action.name for action in level)
+        pending = [action for action in pending if action.name not in done]
+
+    return levels
+
+
+def load_desired(directory):
+    """
+    Read group specs from the .yaml, .yml and .json files of a directory.
+    A file holds one group, a list of groups or {"groups": [...]}; every
+    group needs a unique name and may list the names it depends_on.
+
+    :type directory: str
+    :rtype: dict
+    :return: {name: group spec}, in file order
+    """
+    desired = OrderedDict()
+
+    for file_name in sorted(os.listdir(directory)):
+        if not file_name.endswith(SPEC_EXTENSIONS):
+            continue
+
+        path = os.path.join(directory, file_name)
+        with open(path, "r") as spec_file:
+            if file_name.endswith(".json"):
+                content = json.load(spec_file)
+            else:
+                content = yaml.safe_load(spec_file)
+
+        if isinstance(content, dict) and "groups" in content:
+            content = content["groups"]
+        if isinstance(content, dict):
+            content = [content]
+
+        for spec in content or []:
+            if isinstance(spec, dict) and "group" in spec and len(spec) == 1:
+                spec = spec["group"]
+
+            name = spec.get("name")
+            if not name:
+                raise ValueError("group without a name in {}".format(path))
+            if name in desired:
+                raise ValueError("group {} defined twice, again in {}".format(
+                    name, path))
+
+            desired[name] = spec
+
+    return desired
@@ -0,0 +1,279 @@
+import json
+import logging
+import multiprocessing
+from collections import OrderedDict
+
+from spotinst_sdk import spotinst_executor
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_COSTS = "account_costs"
+GROUP_COSTS = "group_costs"
+POTENTIAL_SAVINGS = "potential_savings"
+REPORTS = (ACCOUNT_COSTS, GROUP_COSTS, POTENTIAL_SAVINGS)
+
+ERROR = "error"
+# key of the error record of an account that failed outside any report
+ACCOUNT = "account"
+
+# set in each worker process by _init_worker
+_worker_pool = None
+_worker_options = None
+
+
+class ReportRecord:
+    __slots__ = ("account_id", "kind", "key", "values")
+
+    def __init__(self, account_id, kind, key, values):
+        """
+        :type account_id: str
+        :type kind: str
+        :param kind: account_costs, group_costs, potential_savings or error
+        :type key: str
+        :param key: lifecycle for account costs, group id for group costs,
+                    the failed report (or "account") for errors
+        :type values: dict
+        """
+        self.account_id = account_id
+        self.kind = kind
+        self.key = key
+        self.values = values
+
+    def dumps(self):
+        return json.dumps([self.account_id, self.kind, self.key, self.values],
+                          separators=(",", ":"), sort_keys=True, default=str)
+
+    @classmethod
+    def loads(cls, data):
+        return cls(*json.loads(data))
+
+    def __eq__(self, other):
+        return isinstance(other, ReportRecord) and self.dumps() == other.dumps()
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return "ReportRecord({}, {}, {})".format(self.account_id, self.kind, self.key)
+
+
+class ReportDriver:
+    def __init__(
+            self,
+            auth_token=None,
+            profile=None,
+            credentials_file=None,
+            from_date=None,
+            to_date=None,
+            reports=REPORTS,
+            processes=None,
+            threads=spotinst_executor.DEFAULT_MAX_WORKERS,
+            rate_limit=None):
+        """
+        Run cost and savings reports for many accounts on a process pool.
+
+        Decoding responses and convert_json are CPU bound, so accounts are
+        partitioned across worker processes. Every worker keeps its own
+        spotinst_pool.ClientPool and fetches per-group costs with threads;
+        results come back as compact JSON records, streamed as workers
+        finish.
+
+        :type from_date: str
+        :type to_date: str
+        :type reports: tuple
+        :param reports: any of account_costs, group_costs, potential_savings
+        :type processes: int
+        :param processes: worker processes, defaults to the CPU count; 0
+                          runs everything in the calling process
+        :type threads: int
+        :param threads: concurrent requests per worker
+        :type rate_limit: float
+        :param rate_limit: requests per second per worker
+        """
+        for report in reports:
+            if report not in REPORTS:
+                raise ValueError("unknown report {}".format(report))
+
+        self.options = dict(
+            auth_token=auth_token,
+            profile=profile,
+            credentials_file=credentials_file,
+            from_date=from_date,
+            to_date=to_date,
+            reports=tuple(reports),
+            threads=threads,
+            rate_limit=rate_limit)
+        self.processes = multiprocessing.cpu_count() if processes is None else processes
+
+    def iter_records(self, account_ids):
+        """
+        :type account_ids: list[str]
+        :rtype: collections.Iterable[ReportRecord]
+        :return: records in completion order
+        """
+        account_ids = list(account_ids)
+
+        if not self.processes:
+            with _create_pool(self.options) as pool:
+                for account_id in account_ids:
+                    for line in _report_account(account_id, pool, self.options).splitlines():
+                        yield ReportRecord.loads(line)
+            return
+
+        # a few partitions per process keeps workers busy when accounts
+        # take uneven time
+        chunk_size = max(1, len(account_ids) // (self.processes * 4))
+
+        pool = multiprocessing.Pool(self.processes, initializer=_init_worker,
+                                    initargs=(self.options,))
+        try:
+            for data in pool.imap_unordered(_report_account, account_ids, chunk_size):
+                for line in data.splitlines():
+                    yield ReportRecord.loads(line)
+        finally:
+            pool.close()
+            pool.join()
+
+    def run(self, account_ids):
+        """
+        :rtype: dict
+        :return: merge_records of every record
+        """
+        return merge_records(self.iter_records(account_ids))
+
+
+def merge_records(records):
+    """
+    :type records: collections.Iterable[ReportRecord]
+    :rtype: dict
+    :return: {account id: {"account_costs": {lifecycle: values},
+             "group_costs": {group id: values}, "potential_savings": [...],
+             "errors": {report: message}}}, accounts sorted by id
+    """
+    merged = dict()
+
+    for record in records:
+        account = merged.setdefault(record.account_id, dict(
+            account_costs=dict(), group_costs=dict(), potential_savings=[],
+            errors=dict()))
+
+        if record.kind == ERROR:
+            account["errors"][record.key] = record.values["message"]
+        elif record.kind == POTENTIAL_SAVINGS:
+            account[POTENTIAL_SAVINGS].append(record.values)
+        else:
+            account[record.kind][record.key] = record.values
+
+    return OrderedDict(sorted(merged.items()))
+
+
+def _create_pool(options):
+    from spotinst_sdk import spotinst_pool
+
+    return spotinst_pool.ClientPool(
+        auth_token=options["auth_token"],
+        profile=options["profile"],
+        credentials_file=options["credentials_file"],
+        rate_limit=options["rate_limit"],
+        max_connections=options["threads"])
+
+
+def _init_worker(options):
+    global _worker_pool, _worker_options
+
+    _worker_options = options
+    _worker_pool = _create_pool(options)
+
+
+def _report_account(account_id, pool=None, options=None):
+    """
+    Never raises: a failure outside the reports becomes an error record
+    keyed "account", after any records produced before it.
+
+    :type pool: spotinst_sdk.spotinst_pool.ClientPool
+    :param pool: with options, defaults to the worker process ones
+    :type options: dict
+    :rtype: str
+    :return: newline separated ReportRecord dumps
+    """
+    if pool is None:
+        pool, options = _worker_pool, _worker_options
+
+    records = []
+
+    try:
+        _run_reports(account_id, pool, options, records)
+    except Exception as e:
+        logger.error("reports failed for {}: {}".format(account_id, e))
+        records.append(ReportRecord(account_id, ERROR, ACCOUNT, dict(message=str(e))))
+
+    return "\n".join(record.dumps() for record in records)
+
+
+def _run_reports(account_id, pool, options, records):
+    client = pool.account(account_id)
+
+    def run(report, fn):
+        try:
+            fn()
+        except Exception as e:
+            logger.error("{} failed for {}: {}".format(report, account_id, e))
+            records.append(ReportRecord(account_id, ERROR, report, dict(message=str(e))))
+
+    if ACCOUNT_COSTS in options["reports"]:
+        def account_costs():
+            for item in client.get_cost_per_account(
+                    to_date=options["to_date"], from_date=options["from_date"]):
+                for lifecycle, values in sorted(item.items()):
+                    records.append(ReportRecord(account_id, ACCOUNT_COSTS, lifecycle, values))
+
+        run(ACCOUNT_COSTS, account_costs)
+
+    if GROUP_COSTS in options["reports"]:
+        def group_costs():
+            group_ids = [group["id"] for group in client.get_elastigroups()]
+
+            results = spotinst_executor.run_batch(
+                lambda group_id: client.get_cost_per_elastigroup(
+                    group_id, to_date=options["to_date"],
+                    from_date=options["from_date"]),
+                group_ids, max_workers=options["threads"])
+
+            for result in results:
+                if result.ok:
+                    records.append(ReportRecord(account_id, GROUP_COSTS, result.key,
+                                                summarize_group_costs(result.result)))
+                else:
+                    records.append(ReportRecord(
+                        account_id, ERROR, "{}/{}".format(GROUP_COSTS, result.key),
+                        dict(message=str(result.error))))
+
+        run(GROUP_COSTS, group_costs)
+
+    if POTENTIAL_SAVINGS in options["reports"]:
+        def potential_savings():
+            for item in client.get_potential_savings():
+                records.append(ReportRecord(account_id, POTENTIAL_SAVINGS, None, item))
+
+        run(POTENTIAL_SAVINGS, potential_savings)
+
+
+def summarize_group_costs(items):
+    """
+    :param items: result of SpotinstClient.get_cost_per_elastigroup
+    :rtype: dict
+    """
+    from spotinst_sdk import spotinst_cost
+
+    if isinstance(items, dict):
+        items = [items]
+
+    totals = dict(actual=0.0, potential=0.0, running_hours=0.0)
+    for item in items:
+        costs = item.get("costs") or {}
+        totals["actual"] += spotinst_cost.to_float(costs.get("actual"))
+        totals["potential"] += spotinst_cost.to_float(costs.get("potential"))
+        totals["running_hours"] += spotinst_cost.to_float(
+            (item.get("running") or {}).get("value"))
+
+    return totals
@@ -0,0 +1,92 @@
+import logging
+import threading
+
+from spotinst_sdk import spotinst_executor
+
+logger = logging.getLogger(__name__)
+
+
+class ScaleDispatcher:
+    def __init__(
+            self,
+            client,
+            window=1.0,
+            max_workers=spotinst_executor.DEFAULT_MAX_WORKERS):
+        """
+        Collects scale requests per group and sends one netted call per
+        group when the window closes (or on flush).
+
+        :type client: spotinst_sdk.SpotinstClient
+        :type window: float
+        :type max_workers: int
+        """
+        self.client = client
+        self.window = window
+        self.max_workers = max_workers
+
+        self._pending = dict()
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def scale_up(self, group_id, adjustment):
+        self._add(group_id, int(adjustment))
+
+    def scale_down(self, group_id, adjustment):
+        self._add(group_id, -int(adjustment))
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self):
+        """
+        Send the netted adjustments for every pending group concurrently.
+
+        :rtype: list[spotinst_sdk.spotinst_executor.BatchResult]
+        """
+        with self._lock:
+            pending, self._pending = self._pending, dict()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        items = [(group_id, adjustment)
+                 for group_id, adjustment in sorted(pending.items())
+                 if adjustment != 0]
+
+        results = spotinst_executor.run_batch(
+            self._send, items, max_workers=self.max_workers)
+
+        for result in results:
+            if not result.ok:
+                logger.error("failed scaling group {}: {}".format(
+                    result.key[0], result.error))
+
+        return results
+
+    def close(self):
+        return self.flush()
+
+    def _add(self, group_id, adjustment):
+        with self._lock:
+            self._pending[group_id] = self._pending.get(
+                group_id, 0) + adjustment
+
+            if self.window and self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _send(self, item):
+        group_id, adjustment = item
+
+        if adjustment > 0:
+            return self.client.scale_elastigroup_up(group_id, adjustment)
+
+        return self.client.scale_elastigroup_down(group_id, -adjustment)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,278 @@
+import binascii
+import collections
+import functools
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+SERIALIZE = "serialize"
+NETWORK = "network"
+DECODE = "decode"
+CONVERT = "convert"
+
+DEFAULT_HEADER = "X-Trace-Id"
+DEFAULT_MAX_SPANS = 1000
+
+# every live RecordingTracer, so capture() can carry their per-thread
+# state into worker threads
+_tracers = weakref.WeakSet()
+
+
+def new_id(size=16):
+    """
+    :rtype: str
+    :return: 2 * size random hex digits
+    """
+    return binascii.hexlify(os.urandom(size)).decode("ascii")
+
+
+class Span:
+    def __init__(self, name, trace_id, parent_id=None):
+        """
+        One SDK call. Phases hold seconds spent in serialize (building the
+        body: toJSON, exclude_missing, convert_json and json.dumps, up to
+        the first request), network (including rate limiter waits), decode
+        and convert (response key conversion).
+
+        :type name: str
+        :param name: SpotinstClient method, e.g. get_elastigroup
+        """
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = new_id(8)
+        self.parent_id = parent_id
+        self.phases = collections.OrderedDict()
+        self.attributes = dict()
+        self.error = None
+        self.start = time.time()
+        self.end = None
+
+    @property
+    def duration(self):
+        return None if self.end is None else self.end - self.start
+
+    def add_phase(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def to_dict(self):
+        return dict(name=self.name, trace_id=self.trace_id, span_id=self.span_id,
+                    parent_id=self.parent_id, start=self.start,
+                    duration=self.duration, phases=dict(self.phases),
+                    attributes=self.attributes, error=self.error)
+
+    def __repr__(self):
+        return "Span({}, {})".format(self.name, self.span_id)
+
+
+class Tracer(object):
+    """
+    Tracer interface. This base class traces nothing; enabled = False lets
+    the client skip span and phase bookkeeping altogether.
+    """
+    enabled = False
+    header = DEFAULT_HEADER
+
+    def current(self):
+        """
+        :rtype: Span
+        :return: innermost open span of the calling thread, or None
+        """
+        return None
+
+    @contextmanager
+    def span(self, name):
+        yield None
+
+    @contextmanager
+    def phase(self, phase):
+        yield
+
+    def inject(self, headers):
+        pass
+
+
+NULL_TRACER = Tracer()
+
+
+class RecordingTracer(Tracer):
+    enabled = True
+
+    def __init__(self, on_finish=None, header=DEFAULT_HEADER,
+                 max_spans=DEFAULT_MAX_SPANS):
+        """
+        Spans nest per thread: a call made inside another (e.g.
+        send_function_creation from create_function) gets the outer span
+        as its parent and shares its trace id.
+
+        :type on_finish: callable
+        :param on_finish: called with every finished Span, e.g. to export
+                          it to the application's tracing system
+        :type header: str
+        :param header: request header carrying the trace id, None to send
+                       none
+        :type max_spans: int
+        :param max_spans: finished spans kept for spans()
+        """
+        self.on_finish = on_finish
+        self.header = header
+
+        self._finished = collections.deque(maxlen=max_spans)
+        self._local = threading.local()
+
+        _tracers.add(self)
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current(self):
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def trace(self, trace_id=None):
+        """
+        Use trace_id for the calling thread's spans opened inside the
+        block, e.g. the id of the application's own trace.
+
+        :rtype: str
+        :return: the trace id
+        """
+        previous = getattr(self._local, "trace_id", None)
+        self._local.trace_id = trace_id or new_id()
+        try:
+            yield self._local.trace_id
+        finally:
+            self._local.trace_id = previous
+
+    @contextmanager
+    def span(self, name):
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+
+        if parent is not None:
+            span = Span(name, parent.trace_id, parent.span_id)
+        else:
+            span = Span(name, getattr(self._local, "trace_id", None) or new_id())
+
+        stack.append(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = "{}: {}".format(type(e).__name__, e)
+            raise
+        finally:
+            span.end = time.time()
+            stack.pop()
+
+            self._finished.append(span)
+            if self.on_finish is not None:
+                self.on_finish(span)
+
+    @contextmanager
+    def phase(self, phase):
+        span = self.current()
+        started = time.time()
+
+        if span is not None and phase == NETWORK and SERIALIZE not in span.phases:
+            # everything between entering the call and its first request
+            span.add_phase(SERIALIZE, started - span.start)
+
+        try:
+            yield
+        finally:
+            if span is not None:
+                span.add_phase(phase, time.time() - started)
+
+    def context(self):
+        """
+        :rtype: tuple
+        :return: (innermost open span, trace id) of the calling thread, or
+                 None when it has neither
+        """
+        span = self.current()
+        trace_id = getattr(self._local, "trace_id", None)
+        if span is None and trace_id is None:
+            return None
+        return span, trace_id
+
+    def _swap(self, stack, trace_id):
+        previous = (getattr(self._local, "stack", None),
+                    getattr(self._local, "trace_id", None))
+        self._local.stack = stack
+        self._local.trace_id = trace_id
+        return previous
+
+    def inject(self, headers):
+        span = self.current()
+        if span is not None and self.header:
+            headers[self.header] = span.trace_id
+
+    def spans(self):
+        """
+        :rtype: list[Span]
+        :return: finished spans, oldest first
+        """
+        return list(self._finished)
+
+    def clear(self):
+        self._finished.clear()
+
+
+def capture():
+    """
+    Snapshot the calling thread's open spans and trace ids of every
+    RecordingTracer, for restore() in the threads that do its work.
+
+    :rtype: list
+    :return: (tracer, context) pairs, empty when nothing is traced
+    """
+    captured = []
+    for tracer in list(_tracers):
+        context = tracer.context()
+        if context is not None:
+            captured.append((tracer, context))
+    return captured
+
+
+@contextmanager
+def restore(captured):
+    """
+    Run the block with a capture() result as the calling thread's tracing
+    state; spans opened inside become children of the captured ones.
+
+    :type captured: list
+    """
+    replaced = []
+    for tracer, (span, trace_id) in captured:
+        stack = [span] if span is not None else None
+        replaced.append((tracer, tracer._swap(stack, trace_id)))
+    try:
+        yield
+    finally:
+        for tracer, previous in replaced:
+            tracer._swap(*previous)
+
+
+def traced(fn):
+    """
+    Wrap a SpotinstClient method in a span named after it when the
+    client's tracer is enabled. Only API methods are decorated; helpers
+    such as send_get run inside their caller's span.
+    """
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def call(self, *args, **kwargs):
+        tracer = self.tracer
+        if not tracer.enabled:
+            return fn(self, *args, **kwargs)
+
+        with tracer.span(name):
+            return fn(self, *args, **kwargs)
+
+    return call
@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk.cli import main
+
+
+class SpotinstCliTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.input = os.path.join(self.directory, "ops.jsonl")
+        self.output = os.path.join(self.directory, "results.jsonl")
+
+        self.environ = patch.dict(os.environ, {"SPOTINST_TOKEN": "dummy-token",
+                                               "SPOTINST_ACCOUNT": "dummy-account"})
+        self.environ.start()
+
+    def tearDown(self):
+        self.environ.stop()
+        shutil.rmtree(self.directory)
+
+    def run_cli(self, operations):
+        with open(self.input, "w") as f:
+            for operation in operations:
+                f.write(operation if isinstance(operation, str) else json.dumps(operation))
+                f.write("\n")
+
+        with patch('sys.stderr') as stderr:
+            code = main([self.input, "-o", self.output, "-c", "3"])
+        self.summary = "".join(call[0][0] for call in stderr.write.call_args_list)
+
+        with open(self.output) as f:
+            return code, [json.loads(line) for line in f]
+
+
+class SpotinstCliBatchTest(SpotinstCliTestCase):
+    @patch.object(SpotinstClient, 'get_elastigroup')
+    @patch.object(SpotinstClient, 'lock_instance')
+    @patch.object(SpotinstClient, 'scale_elastigroup_down')
+    @patch.object(SpotinstClient, 'scale_elastigroup_up')
+    def runTest(self, scale_up, scale_down, lock, get):
+        scale_up.return_value = [{"new_instances": []}]
+        scale_down.return_value = [{"victim_instances": []}]
+        lock.return_value = {"code": 200}
+        get.return_value = {"id": "sig-1"}
+
+        code, results = self.run_cli([
+            {"op": "scale", "group_id": "sig-1", "adjustment": 2, "id": "a"},
+            {"op": "scale", "group_id": "sig-1", "adjustment": -1},
+            "# comment",
+            {"op": "lock", "instance_id": "i-1", "lock_time": 30},
+            {"op": "get", "group_id": "sig-1"},
+            "not json",
+            {"op": "reboot"},
+            {"op": "lock"},
+            {"op": "scale", "group_id": "sig-1", "adjustment": 0}])
+
+        self.assertEqual(code, 1)
+        self.assertEqual([r["line"] for r in results], [1, 2, 4, 5, 6, 7, 8, 9])
+        self.assertEqual([r["ok"] for r in results],
+                         [True, True, True, True, False, False, False, False])
+        self.assertEqual(results[0]["id"], "a")
+        self.assertEqual(results[3]["result"], {"id": "sig-1"})
+        self.assertIn("missing field", results[6]["error"])
+        self.assertIn("must not be 0", results[7]["error"])
+        self.assertTrue(self.summary.startswith("8 operations, 4 failed in "))
+
+        scale_up.assert_called_once_with("sig-1", 2)
+        scale_down.assert_called_once_with("sig-1", 1)
+        lock.assert_called_once_with("i-1", 30)
+
+
+class SpotinstCliRateLimitTest(SpotinstCliTestCase):
+    def runTest(self):
+        for value in ("0", "-5", "fast"):
+            with patch('sys.stderr'):
+                with self.assertRaises(SystemExit) as raised:
+                    main([self.input, "--rate-limit", value])
+            self.assertEqual(raised.exception.code, 2)
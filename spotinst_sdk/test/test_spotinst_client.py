@@ -1,4 +1,10 @@
+import json
+import logging
+import os
+import subprocess
+import sys
 import unittest
+from mock import patch, MagicMock
 
 from spotinst_sdk import SpotinstClient
 from spotinst_sdk.aws_elastigroup import *
@@ -44,4 +50,90 @@ class SpotinstClientConvertJsonToCamelCaseTest(SpotinstClientTestCase):
                         'c']}}}
         self.assertDictEqual(actual_obj, expected_obj)
 
+
+
+class SpotinstClientChunkQueryValuesTest(SpotinstClientTestCase):
+    def runTest(self):
+        values = ["i-{:05d}".format(i) for i in range(10)]
+
+        chunks = list(self.client.chunk_query_values(values, 30))
+
+        self.assertEqual(",".join(chunks), ",".join(values))
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk.replace(",", "%2C")), 30)
+
+# endregion
+
+
+# region Chunked Requests
+class SpotinstClientInstancePotentialSavingsChunkTest(SpotinstClientTestCase):
+    @patch('requests.get')
+    def runTest(self, mock):
+        def get(url, params=None, headers=None):
+            items = [dict(name=instance_id, potentialSavings=1)
+                     for instance_id in params["instanceIds"].split(",")]
+            response = MagicMock()
+            response.status_code = 200
+            response.content.decode.return_value = json.dumps(
+                {"response": {"items": items}})
+            return response
+
+        mock.side_effect = get
+        instance_ids = ["i-{:017d}".format(i) for i in range(10000)]
+
+        items = self.client.get_instance_potential_savings(
+            instance_ids, "us-west-2")
+
+        self.assertEqual([item["name"] for item in items], instance_ids)
+        self.assertGreater(mock.call_count, 1)
+        for call in mock.call_args_list:
+            self.assertFalse(call[1]["params"]["instanceIds"].endswith(","))
+
+# endregion
+
+
+# region Construction
+class SpotinstClientConstructionTest(SpotinstClientTestCase):
+    def runTest(self):
+        logger = logging.getLogger("spotinst_sdk")
+        handlers = len(logger.handlers)
+
+        with patch.object(sys, "argv", ["app", "--unrelated", "--log-level", "bogus"]):
+            for _ in range(50):
+                SpotinstClient(auth_token='dummy-token', account_id='act-1234567')
+
+        self.assertEqual(len(logger.handlers), handlers)
+        self.assertEqual(handlers, 1)
+
+        previous = logger.level
+        self.addCleanup(logger.setLevel, previous)
+
+        with patch.dict(os.environ, {"SPOTINST_LOG_LEVEL": "info"}):
+            SpotinstClient(auth_token='dummy-token')
+        self.assertEqual(logger.level, logging.INFO)
+
+        SpotinstClient(auth_token='dummy-token', log_level="error")
+        self.assertEqual(logger.level, logging.ERROR)
+
+        self.assertRaises(ValueError, SpotinstClient,
+                          auth_token='dummy-token', log_level="loud")
+
+
+class SpotinstClientLazyImportTest(SpotinstClientTestCase):
+    def runTest(self):
+        root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+        output = subprocess.check_output(
+            [sys.executable, "-c",
+             "import sys, spotinst_sdk; "
+             "print(','.join(m for m in ('requests', 'yaml', 'numpy', "
+             "'spotinst_sdk.aws_elastigroup') if m in sys.modules))"],
+            cwd=root).decode("utf-8").strip()
+
+        if sys.version_info >= (3, 7):
+            self.assertEqual(output, "")
+
+        import spotinst_sdk
+        self.assertIs(spotinst_sdk.aws_elastigroup.Capacity, Capacity)
+        self.assertEqual(spotinst_sdk.version["__version__"], spotinst_sdk.__version__)
+        self.assertEqual(spotinst_sdk.none, none)
 # endregion
@@ -0,0 +1,85 @@
+import json
+import os
+import unittest
+from mock import patch
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk.spotinst_cost import *
+
+
+class SpotinstCostTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.client = SpotinstClient(
+            auth_token='dummy-token',
+            account_id='dummy-account')
+
+    def load_items(self, path):
+        with open(os.path.join(os.path.dirname(os.path.realpath(__file__)), path)) as res_json:
+            res = json.load(res_json)
+        return self.client.convert_json(
+            res, self.client.camel_to_underscore)["response"]["items"]
+
+    def build_table(self, use_numpy):
+        table = CostTable(use_numpy=use_numpy)
+        detailed = self.load_items('test_lib/output/detailed_cost_per_group_res.json')
+
+        table.add_detailed_costs(detailed, day="2018-10-01")
+        table.add_detailed_costs(detailed, day="2018-10-02")
+        table.add_group_costs(
+            "sig-999", self.load_items('test_lib/output/cost_per_group_res.json'),
+            day="2018-10-01")
+        return table
+
+
+class SpotinstCostAggregationTest(SpotinstCostTestCase):
+    def runTest(self):
+        for use_numpy in (True, False):
+            table = self.build_table(use_numpy)
+
+            self.assertEqual(len(table), 5)
+            self.assertAlmostEqual(table.total(), 2 * (0.268 + 0.0568) + 0.2681)
+
+            by_group = table.group_by("group_id")
+            self.assertAlmostEqual(by_group["sig-12345"], 0.536)
+            self.assertAlmostEqual(by_group["sig-999"], 0.2681)
+
+            by_day_lifecycle = table.group_by(("day", "lifecycle"))
+            self.assertAlmostEqual(by_day_lifecycle[("2018-10-02", "spot")], 0.0568)
+
+            rollup = table.rollup("instance_type")
+            self.assertAlmostEqual(rollup["m3.large"]["potential"], 1.064)
+            self.assertAlmostEqual(rollup["m3.large"]["running_hours"], 8)
+
+            top = table.top_n(2)
+            self.assertEqual([group_id for group_id, _ in top], ["sig-12345", "sig-999"])
+
+
+class SpotinstCostUnknownDimensionTest(SpotinstCostTestCase):
+    def runTest(self):
+        with self.assertRaises(ValueError):
+            CostTable().group_by("region")
+
+
+class SpotinstCostKubernetesWindowsTest(SpotinstCostTestCase):
+    @patch.object(SpotinstClient, 'get_kubernetes_cluster_cost_window')
+    def runTest(self, mock):
+        item = self.load_items('test_lib/output/kubernetes_cost_res.json')[0]
+        mock.return_value = item
+
+        merged = self.client.get_kubernetes_cluster_cost(
+            "cluster-1", "2018-01-01", "2018-03-31", window_days=30)
+
+        windows = [call[0][1:] for call in mock.call_args_list]
+        self.assertEqual(len(windows), mock.call_count)
+        self.assertEqual(min(windows)[0], "2018-01-01")
+        self.assertEqual(max(windows)[1], "2018-03-31")
+        self.assertAlmostEqual(merged["total_cost"], item["total_cost"] * len(windows))
+        self.assertEqual([ns["namespace"] for ns in merged["namespaces"]],
+                         ["default", "kube-system"])
+
+        calls = mock.call_count
+        self.client.get_kubernetes_cluster_cost(
+            "cluster-1", "2018-01-15", "2018-04-10", window_days=30)
+
+        self.assertEqual(mock.call_count - calls, 2)
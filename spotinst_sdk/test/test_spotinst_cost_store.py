@@ -0,0 +1,59 @@
+import unittest
+from mock import patch
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk.spotinst_cost import *
+from spotinst_sdk.spotinst_cost_store import CostStore
+
+
+class SpotinstCostStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.client = SpotinstClient(
+            auth_token='dummy-token',
+            account_id='dummy-account')
+        self.store = CostStore(self.client, path=':memory:', max_workers=4)
+
+    def tearDown(self):
+        self.store.close()
+
+    @staticmethod
+    def cost_item(day):
+        return {"costs": {"actual": "1.0", "potential": "2.0"},
+                "running": {"value": "3.0", "unit": "hours"},
+                "day": day}
+
+
+class SpotinstCostStoreDateRangeTest(SpotinstCostStoreTestCase):
+    def runTest(self):
+        self.assertEqual(
+            split_date_range("2018-01-01", "2018-01-10", 4),
+            [("2018-01-01", "2018-01-04"),
+             ("2018-01-05", "2018-01-08"),
+             ("2018-01-09", "2018-01-10")])
+
+        self.assertEqual(
+            missing_date_ranges("2018-01-01", "2018-01-06",
+                                {"2018-01-02", "2018-01-03", "2018-01-05"}),
+            [("2018-01-01", "2018-01-01"),
+             ("2018-01-04", "2018-01-04"),
+             ("2018-01-06", "2018-01-06")])
+
+
+class SpotinstCostStoreGapFillTest(SpotinstCostStoreTestCase):
+    @patch.object(SpotinstClient, 'get_cost_per_elastigroup')
+    def runTest(self, mock):
+        mock.side_effect = lambda group_id, to_date, from_date: self.cost_item(from_date)
+
+        first = self.store.get_group_costs("sig-1", "2018-01-01", "2018-01-10")
+        self.assertEqual(mock.call_count, 10)
+        self.assertEqual([day for day, _ in first][0], "2018-01-01")
+
+        second = self.store.get_group_costs("sig-1", "2018-01-05", "2018-01-15")
+        self.assertEqual(mock.call_count, 15)
+        self.assertEqual(len(second), 11)
+        self.assertEqual(second[-1][1]["day"], "2018-01-15")
+
+        table = self.store.load_cost_table(["sig-1"], "2018-01-01", "2018-01-15")
+        self.assertEqual(mock.call_count, 15)
+        self.assertAlmostEqual(table.total(), 15.0)
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch
+
+from spotinst_sdk import SpotinstClient, SpotinstClientException
+from spotinst_sdk import spotinst_credentials
+
+
+class SpotinstCredentialsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "credentials")
+        self.write({"default": ("token-0", "act-0"), "other": ("token-1", "act-1")})
+
+        spotinst_credentials.clear_cache()
+        self.addCleanup(spotinst_credentials.clear_cache)
+
+        self.environ = patch.dict(os.environ, clear=True)
+        self.environ.start()
+
+    def tearDown(self):
+        self.environ.stop()
+        shutil.rmtree(self.directory)
+
+    def write(self, profiles, mtime=None):
+        with open(self.path, "w") as f:
+            for profile, (token, account) in sorted(profiles.items()):
+                f.write("{}:\n  token: {}\n  account: {}\n".format(profile, token, account))
+
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+
+class SpotinstCredentialsCacheTest(SpotinstCredentialsTestCase):
+    def runTest(self):
+        with patch.object(spotinst_credentials, 'parse',
+                          wraps=spotinst_credentials.parse) as parse:
+            default = SpotinstClient(credentials_file=self.path)
+            other = SpotinstClient(credentials_file=self.path, profile="other")
+
+            self.assertEqual((default.auth_token, default.account_id), ("token-0", "act-0"))
+            self.assertEqual((other.auth_token, other.account_id), ("token-1", "act-1"))
+            self.assertEqual(parse.call_count, 1)
+
+            self.write({"default": ("token-2", "act-2")}, mtime=1000000000)
+            default = SpotinstClient(credentials_file=self.path)
+
+            self.assertEqual(default.auth_token, "token-2")
+            self.assertEqual(parse.call_count, 2)
+
+            missing = SpotinstClient.__new__(SpotinstClient)
+            self.assertRaises(SpotinstClientException, missing.load_credentials, "nope", self.path)
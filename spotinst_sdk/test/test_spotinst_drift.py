@@ -0,0 +1,86 @@
+import copy
+import unittest
+from mock import patch
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk.aws_elastigroup import *
+from spotinst_sdk.spotinst_drift import *
+
+
+class SpotinstDriftTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.client = SpotinstClient(
+            auth_token='dummy-token',
+            account_id='dummy-account')
+
+        self.live = {
+            "id": "sig-1",
+            "name": "web",
+            "created_at": "2018-08-29T18:09:01.431+0000",
+            "capacity": {"minimum": 0, "maximum": 10.0, "target": 2, "unit": "instance"},
+            "strategy": {"risk": 100, "fallback_to_od": True, "draining_timeout": 120},
+            "compute": {
+                "product": "Linux/UNIX",
+                "instance_types": {"ondemand": "c5.large", "spot": ["m5.large", "c5.large"]},
+                "availability_zones": [{"name": "us-east-1a", "subnet_ids": ["subnet-1"]}]}}
+
+    @staticmethod
+    def create_group(target=2, spot=None):
+        return Elastigroup(
+            name="web",
+            capacity=Capacity(minimum=0, maximum=10, target=target),
+            strategy=Strategy(risk=100, fallback_to_od=True),
+            compute=Compute(
+                product="Linux/UNIX",
+                instance_types=InstanceTypes(ondemand="c5.large",
+                                             spot=spot or ["c5.large", "m5.large"]),
+                availability_zones=[AvailabilityZone(name="us-east-1a")]))
+
+
+class SpotinstDriftNoChangeTest(SpotinstDriftTestCase):
+    def runTest(self):
+        detector = DriftDetector(self.client)
+        report = detector.detect({"sig-1": self.create_group()}, {"sig-1": self.live})
+
+        self.assertEqual(report.drifted, [])
+        self.assertEqual(report.summary(), "1 groups, 0 drifted, 0 failed")
+
+
+class SpotinstDriftDetectTest(SpotinstDriftTestCase):
+    @patch.object(SpotinstClient, 'get_elastigroup')
+    def runTest(self, mock):
+        other = copy.deepcopy(self.live)
+        other["id"] = "sig-2"
+        del other["strategy"]["fallback_to_od"]
+
+        def get_elastigroup(group_id):
+            if group_id == "sig-3":
+                raise Exception("not found")
+            return other
+
+        mock.side_effect = get_elastigroup
+
+        desired = {"sig-1": self.create_group(target=3, spot=["r5.large"]),
+                   "sig-2": self.create_group(),
+                   "sig-3": self.create_group()}
+
+        detector = DriftDetector(self.client, max_workers=2)
+        report = detector.detect(desired, {"sig-1": self.live})
+
+        self.assertEqual(sorted(call[0][0] for call in mock.call_args_list),
+                         ["sig-2", "sig-3"])
+        self.assertEqual(
+            [(change.field, change.kind, change.old, change.new)
+             for change in report.results[0].changes],
+            [("capacity.target", "modified", 3, 2),
+             ("compute.instance_types.spot", "modified",
+              ["r5.large"], ["c5.large", "m5.large"])])
+        self.assertEqual(
+            [(change.field, change.kind) for change in report.results[1].changes],
+            [("strategy.fallback_to_od", "removed")])
+        self.assertEqual(len(report.failed), 1)
+
+        summary = report.summary().splitlines()
+        self.assertEqual(summary[0], "sig-1 capacity.target: 3 -> 2")
+        self.assertEqual(summary[-1], "3 groups, 2 drifted, 1 failed")
@@ -0,0 +1,87 @@
+import json
+import time
+import unittest
+from mock import patch, MagicMock
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk.spotinst_executor import *
+
+
+class SpotinstExecutorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.client = SpotinstClient(
+            auth_token='dummy-token',
+            account_id='dummy-account')
+
+    @staticmethod
+    def mock_response(data):
+        response = MagicMock()
+        response.status_code = 200
+        response.content.decode.return_value = json.dumps(data)
+        return response
+
+
+class SpotinstExecutorRunBatchTest(SpotinstExecutorTestCase):
+    def runTest(self):
+        def fn(key):
+            if key == 3:
+                raise ValueError("bad key")
+            return key * 2
+
+        results = run_batch(fn, range(6), max_workers=4)
+
+        self.assertEqual([r.key for r in results], list(range(6)))
+        self.assertEqual([r.result for r in results if r.ok], [0, 2, 4, 8, 10])
+        self.assertIsInstance(results[3].error, ValueError)
+
+
+class SpotinstExecutorRateLimiterTest(SpotinstExecutorTestCase):
+    def runTest(self):
+        limiter = RateLimiter(rate=50, burst=1)
+
+        start = time.time()
+        run_batch(lambda key: key, range(6), max_workers=3, rate_limit=limiter)
+
+        self.assertGreaterEqual(time.time() - start, 0.09)
+
+        for rate in (0, -1):
+            self.assertRaises(ValueError, RateLimiter, rate)
+            self.assertRaises(ValueError, run_batch, lambda key: key, range(2),
+                              rate_limit=rate)
+
+
+class SpotinstExecutorBulkLockTest(SpotinstExecutorTestCase):
+    @patch('requests.post')
+    def runTest(self, mock):
+        ok = self.mock_response(
+            {"response": {"status": {"code": 200, "message": "OK"}}})
+        failed = self.mock_response(
+            {"response": {"errors": [{"code": "NOT_FOUND"}]}})
+        failed.status_code = 404
+
+        mock.side_effect = lambda url, **kwargs: failed if "i-bad" in url else ok
+
+        results = self.client.lock_instances(
+            ["i-1", "i-bad", "i-2"], lock_time=10, max_workers=2)
+
+        self.assertEqual([r.key for r in results], ["i-1", "i-bad", "i-2"])
+        self.assertEqual([r.ok for r in results], [True, False, True])
+        self.assertEqual(results[0].result["code"], 200)
+
+
+class SpotinstExecutorIterBatchTest(SpotinstExecutorTestCase):
+    def runTest(self):
+        consumed = []
+
+        def keys():
+            for key in range(20):
+                consumed.append(key)
+                yield key
+
+        results = iter_batch(lambda key: key * 2, keys(), max_workers=2, window=4)
+        first = next(results)
+
+        self.assertEqual(first.result, 0)
+        self.assertLessEqual(len(consumed), 5)
+        self.assertEqual([r.key for r in results], list(range(1, 20)))
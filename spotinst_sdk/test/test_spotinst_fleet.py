@@ -0,0 +1,112 @@
+import unittest
+from mock import patch
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk.spotinst_fleet import *
+
+
+class SpotinstFleetTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.client = SpotinstClient(
+            auth_token='dummy-token',
+            account_id='dummy-account')
+
+        self.groups = dict(
+            (group_id, self.create_group(group_id))
+            for group_id in ("sig-1", "sig-2", "sig-3"))
+        self.events = dict()
+
+        patchers = [
+            patch.object(SpotinstClient, 'get_elastigroups',
+                         side_effect=lambda: list(self.groups.values())),
+            patch.object(SpotinstClient, 'get_elastigroup_active_instances',
+                         side_effect=lambda group_id: [
+                             {"instance_id": "i-" + group_id,
+                              "updated_at": self.groups[group_id]["updated_at"]}]),
+            patch.object(SpotinstClient, 'get_elastigroup_activity',
+                         side_effect=lambda group_id, start_date: self.events.get(group_id, []))]
+
+        self.mocks = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+        self.inventory = FleetInventory(self.client, max_workers=2)
+
+    @staticmethod
+    def create_group(group_id, updated_at="2018-08-29T18:09:01.431+0000"):
+        return {"id": group_id, "name": group_id, "updated_at": updated_at,
+                "capacity": {"minimum": 0, "maximum": 10, "target": 2}}
+
+
+class SpotinstFleetIncrementalRefreshTest(SpotinstFleetTestCase):
+    def runTest(self):
+        instances_mock = self.mocks[1]
+        self.inventory.check_events = True
+
+        first = self.inventory.refresh()
+        snapshot = self.inventory.snapshot
+
+        self.assertEqual(sorted(first.added), ["sig-1", "sig-2", "sig-3"])
+        self.assertEqual(instances_mock.call_count, 3)
+        self.assertEqual(snapshot.get_instances("sig-2")[0]["instance_id"], "i-sig-2")
+
+        self.groups["sig-1"] = self.create_group("sig-1", "2018-09-01T00:00:00.000+0000")
+        self.events["sig-2"] = [{"created_at": "2999-01-01T00:00:00.000+0000"}]
+        self.events["sig-3"] = [{"created_at": "2000-01-01T00:00:00.000+0000"}]
+        del self.groups["sig-3"]
+        self.groups["sig-4"] = self.create_group("sig-4")
+
+        second = self.inventory.refresh()
+
+        self.assertEqual(second.added, ["sig-4"])
+        self.assertEqual(sorted(second.updated), ["sig-1", "sig-2"])
+        self.assertEqual(second.removed, ["sig-3"])
+        self.assertEqual(instances_mock.call_count, 6)
+
+        # the earlier snapshot is unchanged
+        self.assertIn("sig-3", snapshot)
+        self.assertNotIn("sig-3", self.inventory.snapshot)
+        self.assertEqual(self.inventory.snapshot.version, 2)
+
+        self.events.clear()
+        third = self.inventory.refresh()
+        self.assertEqual(third.changed, [])
+        self.assertEqual(instances_mock.call_count, 6)
+
+
+class SpotinstFleetEventChecksTest(SpotinstFleetTestCase):
+    def runTest(self):
+        activity_mock = self.mocks[2]
+
+        self.inventory.refresh()
+        self.inventory.refresh()
+        self.assertEqual(activity_mock.call_count, 0)
+
+        self.inventory.check_events = True
+        self.inventory.event_checks = 2
+
+        checked = []
+        for _ in range(3):
+            activity_mock.reset_mock()
+            self.inventory.refresh()
+            self.assertEqual(activity_mock.call_count, 2)
+            checked.append(set(call[0][0] for call in activity_mock.call_args_list))
+
+        # the least recently verified groups are checked first
+        self.assertEqual(checked[0] | checked[1], set(self.groups))
+        self.assertEqual(len(checked[0] & checked[1]), 1)
+
+
+class SpotinstFleetFailedGroupTest(SpotinstFleetTestCase):
+    def runTest(self):
+        self.inventory.refresh()
+
+        self.groups["sig-1"] = self.create_group("sig-1", "2018-09-01T00:00:00.000+0000")
+        self.mocks[1].side_effect = Exception("boom")
+
+        change = self.inventory.refresh()
+
+        self.assertEqual(change.updated, [])
+        self.assertEqual(self.inventory.snapshot.get_group("sig-1")["updated_at"],
+                         "2018-08-29T18:09:01.431+0000")
@@ -0,0 +1,77 @@
+import copy
+import unittest
+
+from spotinst_sdk.spotinst_fleet import FleetSnapshot
+from spotinst_sdk.spotinst_fleet_diff import *
+
+
+class SpotinstFleetDiffTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.old_groups = [self.create_group("sig-{}".format(i)) for i in range(4)]
+        self.new_groups = copy.deepcopy(self.old_groups)
+
+    @staticmethod
+    def create_group(group_id):
+        return {
+            "id": group_id,
+            "name": group_id,
+            "capacity": {"minimum": 0, "maximum": 10, "target": 2},
+            "compute": {
+                "availability_zones": [{"name": "us-east-1a"}, {"name": "us-east-1b"}],
+                "launch_specification": {"monitoring": False}}}
+
+
+class SpotinstFleetDiffTest(SpotinstFleetDiffTestCase):
+    def runTest(self):
+        new = dict((group["id"], group) for group in self.new_groups)
+        new["sig-0"]["capacity"]["target"] = 3
+        new["sig-1"]["compute"]["availability_zones"][1]["name"] = "us-east-1c"
+        new["sig-1"]["compute"]["launch_specification"]["key_pair"] = "kp"
+        new["sig-2"]["compute"]["availability_zones"].pop()
+        del new["sig-3"]
+        new["sig-4"] = self.create_group("sig-4")
+
+        changes = diff_groups(self.old_groups, new)
+
+        self.assertEqual(
+            [(change.group_id, change.field, change.kind) for change in changes],
+            [("sig-0", "capacity.target", MODIFIED),
+             ("sig-1", "compute.availability_zones[1].name", MODIFIED),
+             ("sig-1", "compute.launch_specification.key_pair", ADDED),
+             ("sig-2", "compute.availability_zones", MODIFIED),
+             ("sig-3", "", REMOVED),
+             ("sig-4", "", ADDED)])
+
+        self.assertEqual(changes[0].old, 2)
+        self.assertEqual(changes[0].new, 3)
+
+        # digests, when both sides have them, give the same records
+        self.assertEqual(
+            diff_groups(self.old_groups, new, build_trees(self.old_groups), build_trees(new)),
+            changes)
+
+
+class SpotinstFleetDiffHashTest(SpotinstFleetDiffTestCase):
+    def runTest(self):
+        group = self.old_groups[0]
+
+        self.assertEqual(build_tree(group), build_tree(copy.deepcopy(group)))
+        self.assertNotEqual(build_tree({"a": 1}), build_tree({"a": "1"}))
+        self.assertNotEqual(build_tree({"a": 1}), build_tree({"a": True}))
+        self.assertNotEqual(build_tree([1, 2]), build_tree([2, 1]))
+
+        old_snapshot = FleetSnapshot(dict((g["id"], g) for g in self.old_groups), {})
+        new_snapshot = FleetSnapshot(dict((g["id"], g) for g in self.new_groups), {})
+
+        self.assertEqual(new_snapshot.diff(old_snapshot), [])
+        self.assertIsNone(old_snapshot.hash_trees(build=False))
+        self.assertIs(old_snapshot.hash_trees(), old_snapshot.hash_trees())
+
+        # with both trees built, diff goes by digest: snapshots are never
+        # modified, so an edit made after hashing is not seen
+        new_snapshot.hash_trees()
+        new_snapshot.groups["sig-0"]["capacity"]["target"] = 5
+        self.assertEqual(new_snapshot.diff(old_snapshot), [])
+        self.assertEqual([change.field for change in diff_groups(
+            old_snapshot.groups, new_snapshot.groups)], ["capacity.target"])
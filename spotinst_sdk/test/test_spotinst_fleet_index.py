@@ -0,0 +1,68 @@
+import unittest
+
+from spotinst_sdk.spotinst_fleet import FleetSnapshot, FleetChange
+from spotinst_sdk.spotinst_fleet_index import *
+
+
+def create_group(group_id, region="us-east-1", zone="a", instance_types=("c5.4xlarge",),
+                 tags=None, target=2, product="Linux/UNIX"):
+    return {
+        "id": group_id,
+        "region": region,
+        "capacity": {"minimum": 0, "maximum": 20, "target": target},
+        "compute": {
+            "product": product,
+            "instance_types": {"ondemand": instance_types[0], "spot": list(instance_types)},
+            "availability_zones": [{"name": region + zone}],
+            "launch_specification": {
+                "tags": [{"tag_key": k, "tag_value": v} for k, v in sorted((tags or {}).items())]}}}
+
+
+class SpotinstFleetIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.groups = {
+            "sig-1": create_group("sig-1", tags={"team": "search", "env": "prod"}, target=10),
+            "sig-2": create_group("sig-2", instance_types=("m5.large",), tags={"team": "search"}),
+            "sig-3": create_group("sig-3", region="us-west-2", tags={"team": "search"}, target=12),
+            "sig-4": create_group("sig-4", tags={"team": "ads"}, target=5, product="Windows"),
+        }
+        self.snapshot = FleetSnapshot(self.groups, {})
+        self.index = FleetIndex.build(self.snapshot)
+
+
+class SpotinstFleetIndexFindTest(SpotinstFleetIndexTestCase):
+    def runTest(self):
+        self.assertEqual(
+            self.index.find(region="us-east-1", instance_type="c5.4xlarge",
+                            tags={"team": "search"}),
+            frozenset(["sig-1"]))
+        self.assertEqual(self.index.lookup("availability_zone", "us-west-2a"),
+                         frozenset(["sig-3"]))
+        self.assertEqual(self.index.lookup("product", "Windows"), frozenset(["sig-4"]))
+        self.assertEqual(self.index.count("tag", ("team", "search")), 3)
+        self.assertEqual(self.index.capacity_range("target", low=5, high=10),
+                         frozenset(["sig-1", "sig-4"]))
+        self.assertEqual(self.index.capacity_range("target", low=5, include_low=False),
+                         frozenset(["sig-1", "sig-3"]))
+        self.assertEqual(self.index.capacity_range_count("target", low=5, high=10), 2)
+        self.assertEqual(self.index.capacity_range_count("target", low=5, include_low=False), 2)
+        self.assertEqual(self.index.capacity_range_count("target", low=10, high=5), 0)
+        self.assertEqual(len(self.index.find()), 4)
+
+
+class SpotinstFleetIndexApplyChangeTest(SpotinstFleetIndexTestCase):
+    def runTest(self):
+        groups = dict(self.groups)
+        groups["sig-1"] = create_group("sig-1", region="eu-west-1", target=3)
+        groups["sig-5"] = create_group("sig-5", tags={"team": "search"})
+        del groups["sig-2"]
+
+        self.index.apply(FleetChange(FleetSnapshot(groups, {}), ["sig-5"], ["sig-1"], ["sig-2"]))
+
+        self.assertEqual(self.index.find(tags={"team": "search"}),
+                         frozenset(["sig-3", "sig-5"]))
+        self.assertEqual(self.index.lookup("region", "eu-west-1"), frozenset(["sig-1"]))
+        self.assertEqual(self.index.lookup("instance_type", "m5.large"), frozenset())
+        self.assertEqual(self.index.capacity_range("target", high=3), frozenset(["sig-1", "sig-5"]))
+        self.assertNotIn("sig-2", self.index)
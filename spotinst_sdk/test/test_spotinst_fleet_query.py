@@ -0,0 +1,90 @@
+import unittest
+from mock import patch
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk.spotinst_fleet_query import *
+
+
+class SpotinstFleetQueryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.client = SpotinstClient(
+            auth_token='dummy-token',
+            account_id='dummy-account')
+
+        self.groups = [
+            self.create_group("sig-1", "us-east-1a", "c5.large", 12, "prod", 80),
+            self.create_group("sig-2", "us-east-1b", "m5.large", 4, "prod", 50),
+            self.create_group("sig-3", "us-west-2a", "c5.large", 20, "prod", 100),
+            self.create_group("sig-4", "us-east-1a", "c5.large", 30, "dev", 100)]
+
+        patchers = [
+            patch.object(SpotinstClient, 'get_elastigroups',
+                         side_effect=lambda: list(self.groups)),
+            patch.object(SpotinstClient, 'get_elastigroup_active_instances',
+                         side_effect=lambda group_id: [
+                             {"instance_id": "i-{}-{}".format(group_id, lifecycle),
+                              "life_cycle": lifecycle}
+                             for lifecycle in ("spot", "od")])]
+
+        self.mocks = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def create_group(group_id, zone, instance_type, target, env, risk):
+        return {
+            "id": group_id,
+            "name": group_id,
+            "capacity": {"minimum": 0, "maximum": 50, "target": target},
+            "strategy": {"risk": risk},
+            "compute": {
+                "product": "Linux/UNIX",
+                "availability_zones": [{"name": zone}],
+                "instance_types": {"ondemand": instance_type, "spot": [instance_type]},
+                "launch_specification": {
+                    "tags": [{"tag_key": "env", "tag_value": env}]}}}
+
+
+class SpotinstFleetQueryTest(SpotinstFleetQueryTestCase):
+    def runTest(self):
+        fleet = self.client.fleet
+
+        groups = fleet.query(region="us-east-1", tags={"env": "prod"},
+                             capacity_target__gt=10)
+        self.assertEqual([group["id"] for group in groups], ["sig-1"])
+
+        groups = fleet.query(instance_type__in=["m5.large", "c5.large"],
+                             strategy__risk__gte=100)
+        self.assertEqual([group["id"] for group in groups], ["sig-3", "sig-4"])
+
+        groups = fleet.query(name__regex="sig-[12]", capacity_target__lte=12)
+        self.assertEqual([group["id"] for group in groups], ["sig-1", "sig-2"])
+
+        self.assertEqual(len(fleet.query()), 4)
+        self.assertEqual(self.mocks[0].call_count, 1)
+
+        instances = fleet.query_instances(groups={"region": "us-west-2"},
+                                          life_cycle="spot")
+        self.assertEqual(instances, [("sig-3", {"instance_id": "i-sig-3-spot",
+                                                 "life_cycle": "spot"})])
+
+
+class SpotinstFleetQueryPlanTest(SpotinstFleetQueryTestCase):
+    def runTest(self):
+        fleet = self.client.fleet
+
+        query_plan = fleet.explain(region="us-east-1", tags={"env": "dev"},
+                                   strategy__risk__gt=10)
+
+        self.assertFalse(query_plan.scan)
+        self.assertEqual([step.field for step in query_plan.index_steps],
+                         ["tags", "region"])
+        self.assertEqual([criterion.field for criterion in query_plan.filters],
+                         ["strategy__risk"])
+        self.assertTrue(str(query_plan).startswith("INDEX tags__eq={'env': 'dev'}"))
+
+        query_plan = fleet.explain(name__contains="sig")
+        self.assertTrue(query_plan.scan)
+
+        self.assertRaises(ValueError, Criterion, "name", "like", "sig")
@@ -0,0 +1,250 @@
+import base64
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from mock import patch, MagicMock
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk.spotinst_functions import *
+
+
+class SpotinstFunctionsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.client = SpotinstClient(
+            auth_token='dummy-token',
+            account_id='dummy-account')
+
+        self.directory = tempfile.mkdtemp()
+        self.write_file("handler.py", "def main(event, context):\n    return event\n")
+        self.write_file(os.path.join("lib", "data.txt"), "x" * 100000)
+
+        self.sent = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_file(self, name, content):
+        path = os.path.join(self.directory, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, "w") as f:
+            f.write(content)
+
+    def create_function(self):
+        return Function(
+            name="fx",
+            environment_id="env-123",
+            directory=self.directory,
+            handler="handler.main",
+            runtime="python27",
+            memory=128,
+            timeout=30)
+
+    @staticmethod
+    def mock_response():
+        response = MagicMock()
+        response.status_code = 200
+        response.content.decode.return_value = json.dumps(
+            {"response": {"items": [{"id": "fx-123"}]}})
+        return response
+
+    def mock_post(self, url, data=None, **kwargs):
+        # the bundle is closed once the upload returns
+        self.sent.append((data, data.read()))
+        return self.mock_response()
+
+    def create_request(self, **kwargs):
+        request = FunctionCreationRequest(self.create_function(), print_output=False, **kwargs)
+        self.addCleanup(request.close)
+        return request
+
+    @staticmethod
+    def read_archive(body):
+        source = body["function"]["code"]["source"]
+        archive = zipfile.ZipFile(io.BytesIO(base64.b64decode(source)))
+        return dict((name, archive.read(name)) for name in archive.namelist())
+
+
+class SpotinstFunctionsStreamingBodyTest(SpotinstFunctionsTestCase):
+    @patch('requests.post')
+    def runTest(self, mock):
+        mock.side_effect = self.mock_post
+
+        response = self.client.create_function(self.create_function())
+
+        self.assertEqual(response["id"], "fx-123")
+
+        data, raw = self.sent[0]
+        self.assertIsInstance(data, InlineSourceBody)
+        self.assertEqual(len(raw), len(data))
+
+        body = json.loads(raw.decode("utf-8"))
+        self.assertEqual(body["function"]["code"]["handler"], "handler.main")
+        self.assertEqual(body["function"]["environmentId"], "env-123")
+        self.assertNotIn("shouldPrintOutput", body)
+
+        files = self.read_archive(body)
+        self.assertEqual(sorted(files), ["handler.py", "lib/data.txt"])
+
+
+class SpotinstFunctionsRewindBodyTest(SpotinstFunctionsTestCase):
+    def runTest(self):
+        source = io.BytesIO(b"QUJD" * 10)
+        body_json = json.dumps({"code": INLINE_SOURCE_PLACEHOLDER, "name": "fx"})
+
+        with InlineSourceBody(body_json, source) as body:
+            first = body.read()
+            self.assertEqual(body.read(), b"")
+            self.assertEqual(body.tell(), len(body))
+
+            # requests rewinds bodies with seek() before resending
+            body.seek(0)
+            self.assertEqual(body.read(7) + body.read(), first)
+
+            body.seek(-3, os.SEEK_END)
+            self.assertEqual(body.read(), first[-3:])
+            self.assertEqual(b"".join(body), first)
+
+        self.assertEqual(json.loads(first.decode("utf-8"))["code"], "QUJD" * 10)
+        self.assertTrue(source.closed)
+
+
+class SpotinstFunctionsEncodeChunksTest(SpotinstFunctionsTestCase):
+    def runTest(self):
+        payload = os.urandom(1000)
+        dst = io.BytesIO()
+
+        encode_base64(io.BytesIO(payload), dst, chunk_size=3 * 7)
+
+        self.assertEqual(dst.getvalue(), base64.b64encode(payload))
+
+
+class SpotinstFunctionsParallelZipTest(SpotinstFunctionsTestCase):
+    def runTest(self):
+        for i in range(20):
+            self.write_file(os.path.join("pkg", "mod_{}.py".format(i)), "value = {}\n".format(i) * 50)
+
+        files = self.create_request().collect_files(self.directory)
+        names = sorted(arcname.replace(os.sep, "/") for _, arcname in files)
+
+        archives = []
+        for compression_level, max_workers in ((6, 1), (6, 4), (9, 4), (0, 4)):
+            dst = io.BytesIO()
+            # the given order does not matter, entries are sorted
+            write_zip(dst, list(reversed(files)), compression_level=compression_level,
+                      max_workers=max_workers)
+            archives.append(dst.getvalue())
+
+            archive = zipfile.ZipFile(io.BytesIO(dst.getvalue()))
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.namelist(), names)
+            self.assertEqual(archive.read("lib/data.txt"), b"x" * 100000)
+            self.assertEqual(archive.getinfo("handler.py").date_time, ZIP_FIXED_DATE_TIME)
+
+        self.assertEqual(archives[0], archives[1])
+        self.assertGreater(len(archives[3]), len(archives[2]))
+
+
+class SpotinstFunctionsBundleCacheTest(SpotinstFunctionsTestCase):
+    def setUp(self):
+        super(SpotinstFunctionsBundleCacheTest, self).setUp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = BundleCache(self.cache_dir)
+
+    def tearDown(self):
+        super(SpotinstFunctionsBundleCacheTest, self).tearDown()
+        shutil.rmtree(self.cache_dir)
+
+    @patch('requests.post')
+    def runTest(self, mock):
+        mock.side_effect = self.mock_post
+
+        first = self.client.create_function(self.create_function(), bundle_cache=self.cache)
+        self.assertEqual(mock.call_count, 1)
+        first_body = self.sent[0][1]
+
+        # touching a file without changing it keeps the bundle and deployment
+        handler = os.path.join(self.directory, "handler.py")
+        os.utime(handler, (1000000000, 1000000000))
+
+        second = self.client.create_function(self.create_function(), bundle_cache=self.cache)
+        self.assertEqual(mock.call_count, 1)
+        self.assertEqual(first, second)
+
+        self.write_file("handler.py", "def main(event, context):\n    return None\n")
+        self.client.create_function(self.create_function(), bundle_cache=self.cache)
+        self.assertEqual(mock.call_count, 2)
+        self.assertNotEqual(self.sent[1][1], first_body)
+
+
+class SpotinstFunctionsBundleCacheThreadsTest(SpotinstFunctionsBundleCacheTest):
+    def runTest(self):
+        from spotinst_sdk import spotinst_executor
+
+        trees = []
+        for i in range(8):
+            files = []
+            for j in range(20):
+                name = os.path.join("tree_{}".format(i), "mod_{}.py".format(j))
+                self.write_file(name, "value = {}\n".format(i * 100 + j))
+                files.append((os.path.join(self.directory, name), name))
+            trees.append(files)
+
+        results = spotinst_executor.run_batch(self.cache.tree_hash, trees, max_workers=8)
+
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(len(set(result.result for result in results)), 8)
+        self.assertEqual(len(BundleCache(self.cache_dir)._stat_index), 8 * 20)
+        self.assertIsNone(self.cache.get_bundle(results[0].result))
+
+
+class SpotinstFunctionsDeterministicZipTest(SpotinstFunctionsTestCase):
+    def runTest(self):
+        request = self.create_request()
+
+        first = request.source.read()
+
+        handler = os.path.join(self.directory, "handler.py")
+        os.utime(handler, (1000000000, 1000000000))
+
+        second = self.create_request().source.read()
+
+        self.assertEqual(first, second)
+
+
+class SpotinstFunctionsIgnoreRulesTest(SpotinstFunctionsTestCase):
+    def runTest(self):
+        rules = IgnoreRules(["*.log", "!keep.log", "build/", "/data/*.csv",
+                             "docs/**/tmp", "test_[!a]*.py"])
+
+        self.assertTrue(rules.is_ignored("a/b/debug.log", False))
+        self.assertFalse(rules.is_ignored("a/keep.log", False))
+        self.assertTrue(rules.is_ignored("x/build", True))
+        self.assertFalse(rules.is_ignored("x/build", False))
+        self.assertTrue(rules.is_ignored("data/rows.csv", False))
+        self.assertFalse(rules.is_ignored("lib/data/rows.csv", False))
+        self.assertTrue(rules.is_ignored("docs/a/b/tmp", True))
+        self.assertTrue(rules.is_ignored("test_b.py", False))
+        self.assertFalse(rules.is_ignored("test_a.py", False))
+
+
+class SpotinstFunctionsIgnoreCollectTest(SpotinstFunctionsTestCase):
+    def runTest(self):
+        self.write_file(os.path.join(".git", "objects", "blob"), "b" * 5000)
+        self.write_file(os.path.join("pkg", "__pycache__", "mod.pyc"), "c" * 300)
+        self.write_file(os.path.join("venv", "lib", "site.py"), "v" * 2000)
+        self.write_file(os.path.join("tests", "fixture.json"), "{}")
+        self.write_file(".spotinstignore", "# local\nvenv/\n")
+
+        request = self.create_request(ignore_patterns=["tests/"])
+
+        files = request.collect_files(self.directory)
+
+        self.assertEqual([arcname for _, arcname in files],
+                         ["handler.py", os.path.join("lib", "data.txt")])
+        self.assertEqual(request.ignored_bytes, 5000 + 300 + 2000 + 2 + len("# local\nvenv/\n"))
@@ -0,0 +1,112 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch, MagicMock
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk.spotinst_functions import *
+from spotinst_sdk.spotinst_functions_deploy import *
+
+
+class SpotinstFunctionsDeployTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.client = SpotinstClient(
+            auth_token='dummy-token',
+            account_id='dummy-account')
+
+        self.directory = tempfile.mkdtemp()
+        with open(os.path.join(self.directory, "handler.py"), "w") as f:
+            f.write("def main(event, context):\n    return event\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def create_deployment(self, name, environment_name="prod"):
+        function = Function(
+            name=name,
+            environment_id=None,
+            directory=self.directory,
+            handler="handler.main",
+            runtime="python27",
+            memory=128,
+            timeout=30)
+        return FunctionDeployment(function, "app", environment_name)
+
+    @staticmethod
+    def mock_post(url, params=None, data=None, headers=None):
+        response = MagicMock()
+        response.status_code = 200
+
+        if url.endswith("/application"):
+            item = {"id": "app-1"}
+        elif url.endswith("/environment"):
+            item = {"id": "env-{}".format(json.loads(data)["environment"]["name"])}
+        else:
+            body = json.loads(data.read().decode("utf-8"))
+            if body["function"]["name"] == "broken":
+                response.status_code = 400
+                response.content.decode.return_value = json.dumps(
+                    {"response": {"errors": [{"code": "INVALID"}]}})
+                return response
+            item = {"id": "fx-" + body["function"]["name"],
+                    "environment_id": body["function"]["environmentId"]}
+
+        response.content.decode.return_value = json.dumps(
+            {"response": {"items": [item]}})
+        return response
+
+
+class SpotinstFunctionsDeployPipelineTest(SpotinstFunctionsDeployTestCase):
+    @patch('requests.post')
+    def runTest(self, mock):
+        mock.side_effect = self.mock_post
+
+        deployments = [self.create_deployment("fx{}".format(i)) for i in range(6)]
+        deployments.append(self.create_deployment("staged", "staging"))
+        deployments.append(self.create_deployment("broken"))
+
+        pipeline = DeploymentPipeline(self.client, max_workers=4, rate_limit=100)
+        report = pipeline.deploy(deployments)
+
+        self.assertEqual([r.name for r in report], [d.function.name for d in deployments])
+        self.assertEqual([r.ok for r in report], [True] * 7 + [False])
+        self.assertEqual(report[0].response["environment_id"], "env-prod")
+        self.assertEqual(report[6].response["environment_id"], "env-staging")
+        self.assertIsNotNone(report[0].package_seconds)
+        self.assertIsNotNone(report[0].upload_seconds)
+
+        urls = [call[0][0] for call in mock.call_args_list]
+        self.assertEqual(len([url for url in urls if url.endswith("/application")]), 1)
+        self.assertEqual(len([url for url in urls if url.endswith("/environment")]), 2)
+
+        self.assertIsNone(deployments[0].function.environment_id)
+        self.assertEqual(deployments[0].function.directory, self.directory)
+
+
+class SpotinstFunctionsDeployResourceIdsTest(SpotinstFunctionsDeployTestCase):
+    def setUp(self):
+        super(SpotinstFunctionsDeployResourceIdsTest, self).setUp()
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super(SpotinstFunctionsDeployResourceIdsTest, self).tearDown()
+        shutil.rmtree(self.cache_dir)
+
+    @patch('requests.post')
+    def runTest(self, mock):
+        mock.side_effect = self.mock_post
+
+        for run in range(2):
+            pipeline = DeploymentPipeline(self.client, max_workers=2,
+                                          bundle_cache=BundleCache(self.cache_dir))
+            report = pipeline.deploy([self.create_deployment("fx{}".format(run))])
+
+            self.assertTrue(report[0].ok)
+            self.assertEqual(report[0].response["environment_id"], "env-prod")
+
+        urls = [call[0][0] for call in mock.call_args_list]
+        self.assertEqual([url.rsplit("/", 1)[1] for url in urls],
+                         ["application", "environment", "function", "function"])
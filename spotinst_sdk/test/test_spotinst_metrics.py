@@ -0,0 +1,112 @@
+import json
+import unittest
+from mock import patch, MagicMock
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk.spotinst_metrics import *
+
+
+class SpotinstMetricsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = InMemoryMetrics()
+        self.client = SpotinstClient(auth_token='dummy-token', print_output=False,
+                                     metrics=self.metrics)
+
+    @staticmethod
+    def mock_response(status_code, body):
+        response = MagicMock()
+        response.status_code = status_code
+        response.content = json.dumps(body).encode("utf-8")
+        return response
+
+
+class SpotinstMetricsEndpointTest(SpotinstMetricsTestCase):
+    def runTest(self):
+        self.assertEqual(endpoint_of("https://api.spotinst.io/aws/ec2/group/sig-1234/status"),
+                         "/aws/ec2/group/{id}/status")
+        self.assertEqual(endpoint_of("https://api.spotinst.io/aws/ec2/group?accountId=act-1"),
+                         "/aws/ec2/group")
+        self.assertEqual(endpoint_of("https://api.spotinst.io/functions/application/42"),
+                         "/functions/application/{id}")
+        self.assertEqual(body_size('{"a": 1}'), 8)
+        self.assertEqual(body_size(None), 0)
+
+
+class SpotinstMetricsRequestTest(SpotinstMetricsTestCase):
+    @patch('requests.post')
+    @patch('requests.get')
+    def runTest(self, mock_get, mock_post):
+        mock_get.side_effect = [
+            self.mock_response(200, {"response": {"items": [{"id": "sig-1"}]}}),
+            self.mock_response(200, {"response": {"items": [{"id": "sig-2"}]}})]
+        mock_post.return_value = self.mock_response(400, {"response": {"errors": []}})
+
+        self.client.get_elastigroup("sig-1")
+        self.client.get_elastigroup("sig-2")
+        with self.assertRaises(Exception):
+            self.client.send_post("https://api.spotinst.io/aws/ec2/group", "group",
+                                  body='{"group": {}}')
+
+        snapshot = self.metrics.snapshot()
+
+        get = snapshot["get /aws/ec2/group/{id}"]
+        self.assertEqual(get["count"], 2)
+        self.assertEqual(get["status"], {"200": 2})
+        self.assertEqual(get["in_flight"], 0)
+        self.assertEqual(get["buckets"][-1], ("+Inf", 2))
+        self.assertEqual(get["response_bytes"],
+                         2 * len(b'{"response": {"items": [{"id": "sig-1"}]}}'))
+
+        post = snapshot["post /aws/ec2/group"]
+        self.assertEqual(post["status"], {"400": 1})
+        self.assertEqual(post["request_bytes"], len('{"group": {}}'))
+
+
+class SpotinstMetricsErrorTest(SpotinstMetricsTestCase):
+    @patch('requests.get')
+    def runTest(self, mock_get):
+        mock_get.side_effect = IOError("connection reset")
+
+        with self.assertRaises(IOError):
+            self.client.get_elastigroup("sig-1")
+
+        entry = self.metrics.snapshot()["get /aws/ec2/group/{id}"]
+        self.assertEqual(entry["status"], {STATUS_ERROR: 1})
+        self.assertEqual(entry["in_flight"], 0)
+
+
+class SpotinstMetricsPrometheusTest(SpotinstMetricsTestCase):
+    def runTest(self):
+        self.metrics.request_finished("get", "/aws/ec2/group", 200, 0.02, 0, 10)
+        self.metrics.request_finished("get", "/aws/ec2/group", 200, 3.0, 0, 10)
+        self.metrics.retry("get", "/aws/ec2/group")
+
+        text = self.metrics.to_prometheus()
+        labels = 'method="get",endpoint="/aws/ec2/group"'
+
+        self.assertIn("# TYPE spotinst_sdk_request_duration_seconds histogram", text)
+        self.assertIn('spotinst_sdk_request_duration_seconds_bucket{{{},le="0.01"}} 0'.format(labels), text)
+        self.assertIn('spotinst_sdk_request_duration_seconds_bucket{{{},le="0.025"}} 1'.format(labels), text)
+        self.assertIn('spotinst_sdk_request_duration_seconds_bucket{{{},le="+Inf"}} 2'.format(labels), text)
+        self.assertIn('spotinst_sdk_request_duration_seconds_count{{{}}} 2'.format(labels), text)
+        self.assertIn('spotinst_sdk_requests_total{{{},status="200"}} 2'.format(labels), text)
+        self.assertIn('spotinst_sdk_response_bytes_total{{{}}} 20'.format(labels), text)
+        self.assertIn('spotinst_sdk_retries_total{{{}}} 1'.format(labels), text)
+
+        self.metrics.reset()
+        self.assertEqual(self.metrics.snapshot(), {})
+
+
+class SpotinstMetricsDisabledTest(unittest.TestCase):
+    @patch('spotinst_sdk.spotinst_metrics.endpoint_of')
+    @patch('requests.get')
+    def runTest(self, mock_get, mock_endpoint_of):
+        mock_get.return_value = SpotinstMetricsTestCase.mock_response(
+            200, {"response": {"items": []}})
+        client = SpotinstClient(auth_token='dummy-token', print_output=False)
+
+        client.get_elastigroups()
+
+        self.assertIs(client.metrics, NULL_SINK)
+        self.assertEqual(mock_endpoint_of.call_count, 0)
@@ -0,0 +1,44 @@
+import json
+import unittest
+from mock import patch, MagicMock
+
+from spotinst_sdk.spotinst_pool import *
+
+
+class SpotinstPoolTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ClientPool(auth_token='dummy-token', rate_limit=1000)
+        self.addCleanup(self.pool.close)
+
+    @staticmethod
+    def mock_request(method, url, params=None, **kwargs):
+        response = MagicMock()
+        response.status_code = 200
+        response.content.decode.return_value = json.dumps(
+            {"response": {"items": [{"id": "sig-" + params["accountId"]}]}})
+        return response
+
+
+class SpotinstPoolAccountsTest(SpotinstPoolTestCase):
+    @patch('requests.get')
+    def runTest(self, module_get):
+        with patch.object(self.pool.session, 'request',
+                          side_effect=self.mock_request) as request:
+            results = self.pool.map(lambda client: client.get_elastigroups(),
+                                    ["act-1", "act-2", "act-3"], max_workers=3)
+
+        self.assertEqual([r.result for r in results],
+                         [[{"id": "sig-act-1"}], [{"id": "sig-act-2"}], [{"id": "sig-act-3"}]])
+        self.assertEqual(request.call_count, 3)
+        self.assertEqual(module_get.call_count, 0)
+
+        first = self.pool.account("act-1")
+        second = self.pool["act-2"]
+
+        self.assertIs(first, self.pool.account("act-1"))
+        self.assertIs(first.session, second.session)
+        self.assertIs(first.rate_limiter, second.rate_limiter)
+        self.assertIs(first.kubernetes_cost_cache, second.kubernetes_cost_cache)
+        self.assertIsNone(self.pool.client.account_id)
+        self.assertEqual(len(self.pool), 3)
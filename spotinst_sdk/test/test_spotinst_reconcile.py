@@ -0,0 +1,102 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch, MagicMock
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk.spotinst_reconcile import *
+
+
+class SpotinstReconcileTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.client = SpotinstClient(
+            auth_token='dummy-token',
+            account_id='dummy-account',
+            print_output=False)
+
+        self.directory = tempfile.mkdtemp()
+
+        with open(os.path.join(self.directory, "web.yaml"), "w") as f:
+            f.write("name: web\n"
+                    "depends_on: [db]\n"
+                    "capacity: {minimum: 0, maximum: 10, target: 4}\n")
+
+        with open(os.path.join(self.directory, "backend.json"), "w") as f:
+            json.dump({"groups": [
+                {"name": "db", "capacity": {"minimum": 1, "maximum": 3, "target": 1}},
+                {"name": "cache", "capacity": {"minimum": 1, "maximum": 3, "target": 2}},
+                {"name": "worker", "strategy": {"fallbackToOd": True}}]}, f)
+
+        self.live = [
+            {"id": "sig-1", "name": "web", "capacity": {"minimum": 0, "maximum": 10, "target": 2}},
+            {"id": "sig-2", "name": "cache", "capacity": {"minimum": 1, "maximum": 3.0, "target": 2}},
+            {"id": "sig-3", "name": "old", "capacity": {"minimum": 0, "maximum": 1, "target": 0}}]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+class SpotinstReconcilePlanApplyTest(SpotinstReconcileTestCase):
+    def runTest(self):
+        desired = load_desired(self.directory)
+        self.assertEqual(sorted(desired), ["cache", "db", "web", "worker"])
+
+        calls = []
+
+        def create(spec):
+            calls.append(("create", spec["name"]))
+            if spec["name"] == "db":
+                raise Exception("quota exceeded")
+            return {"id": "sig-new"}
+
+        def update(spec, group_id):
+            calls.append(("update", group_id))
+            return True
+
+        with patch.object(SpotinstClient, 'get_elastigroups', return_value=self.live), \
+                patch.object(SpotinstClient, 'create_elastigroup', side_effect=create), \
+                patch.object(SpotinstClient, 'update_elastigroup', side_effect=update), \
+                patch.object(SpotinstClient, 'delete_elastigroup', return_value=True) as delete:
+            reconciler = Reconciler(self.client, max_workers=4, prune=True)
+            plan = reconciler.plan(desired)
+
+            self.assertEqual([(a.action, a.name) for a in plan.actions],
+                             [("create", "db"), ("create", "worker"),
+                              ("update", "web"), ("delete", "old")])
+            self.assertEqual(plan.unchanged, ["cache"])
+            self.assertEqual(plan.actions[2].spec, {"capacity": {"minimum": 0, "maximum": 10, "target": 4}})
+            self.assertEqual(plan.actions[1].spec["strategy"], {"fallback_to_od": True})
+
+            results = reconciler.apply(plan)
+
+        self.assertEqual([(r.action.name, r.ok, r.skipped) for r in results],
+                         [("db", False, False), ("worker", True, False),
+                          ("web", False, True), ("old", True, False)])
+        self.assertNotIn(("update", "sig-1"), calls)
+        delete.assert_called_once_with("sig-3")
+
+
+class SpotinstReconcileCreateBodyTest(SpotinstReconcileTestCase):
+    @patch('requests.post')
+    def runTest(self, mock):
+        response = MagicMock()
+        response.status_code = 200
+        response.content.decode.return_value = json.dumps(
+            {"response": {"items": [{"id": "sig-new"}]}})
+        mock.return_value = response
+
+        reconciler = Reconciler(self.client)
+        plan = reconciler.plan(load_desired(self.directory), live=[])
+        worker = [action for action in plan.actions if action.name == "worker"][0]
+
+        reconciler.apply(Plan([worker], []))
+
+        self.assertEqual(json.loads(mock.call_args[1]["data"]),
+                         {"group": {"name": "worker", "strategy": {"fallbackToOd": True}}})
+
+        cycle = [PlannedAction(CREATE, "a", depends_on=["b"]),
+                 PlannedAction(CREATE, "b", depends_on=["a"])]
+        self.assertRaises(ValueError, dependency_levels, cycle)
@@ -0,0 +1,80 @@
+import multiprocessing
+import unittest
+from mock import patch, MagicMock
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk import spotinst_report
+from spotinst_sdk.spotinst_report import *
+
+
+def get_cost_per_account(self, to_date=None, from_date=None):
+    if self.account_id == "act-bad":
+        raise Exception("forbidden")
+    return [{"spot": {"actual_costs": 10.0, "potential_costs": 40.0, "running_hours": 5},
+             "on_demand": {"actual_costs": 2.5, "potential_costs": 2.5, "running_hours": 1}}]
+
+
+def get_elastigroups(self):
+    return [{"id": "sig-{}-{}".format(self.account_id, i)} for i in range(2)]
+
+
+def get_cost_per_elastigroup(self, group_id, to_date=None, from_date=None):
+    return [{"costs": {"actual": 1.5, "potential": 3}, "running": {"value": 2}}]
+
+
+class SpotinstReportTestCase(unittest.TestCase):
+
+    def setUp(self):
+        patchers = [
+            patch.object(SpotinstClient, 'get_cost_per_account', get_cost_per_account),
+            patch.object(SpotinstClient, 'get_elastigroups', get_elastigroups),
+            patch.object(SpotinstClient, 'get_cost_per_elastigroup', get_cost_per_elastigroup)]
+
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def check(self, merged):
+        self.assertEqual(list(merged), ["act-1", "act-2", "act-bad"])
+        self.assertEqual(merged["act-1"]["account_costs"]["spot"]["actual_costs"], 10.0)
+        self.assertEqual(merged["act-2"]["group_costs"]["sig-act-2-1"],
+                         {"actual": 1.5, "potential": 3.0, "running_hours": 2.0})
+        self.assertEqual(merged["act-bad"]["errors"], {"account_costs": "forbidden"})
+        self.assertEqual(len(merged["act-bad"]["group_costs"]), 2)
+
+
+class SpotinstReportInlineTest(SpotinstReportTestCase):
+    def runTest(self):
+        driver = ReportDriver(auth_token="dummy-token", processes=0,
+                              reports=(ACCOUNT_COSTS, GROUP_COSTS))
+        records = list(driver.iter_records(["act-1", "act-2", "act-bad"]))
+
+        self.assertEqual(ReportRecord.loads(records[0].dumps()), records[0])
+        self.check(merge_records(records))
+
+        # the inline run keeps its pool to itself
+        self.assertIsNone(spotinst_report._worker_pool)
+
+        self.assertRaises(ValueError, ReportDriver, reports=("nightly",))
+
+
+class SpotinstReportAccountErrorTest(SpotinstReportTestCase):
+    def runTest(self):
+        pool = MagicMock()
+        pool.account.side_effect = ValueError("no credentials for act-1")
+        driver = ReportDriver(auth_token="dummy-token", processes=0)
+
+        data = spotinst_report._report_account("act-1", pool, driver.options)
+
+        self.assertEqual([ReportRecord.loads(line) for line in data.splitlines()],
+                         [ReportRecord("act-1", ERROR, ACCOUNT,
+                                       dict(message="no credentials for act-1"))])
+
+
+@unittest.skipUnless(getattr(multiprocessing, "get_start_method", lambda: "fork")() == "fork",
+                     "worker processes inherit the test patches only when forked")
+class SpotinstReportProcessesTest(SpotinstReportTestCase):
+    def runTest(self):
+        driver = ReportDriver(auth_token="dummy-token", processes=2,
+                              reports=(ACCOUNT_COSTS, GROUP_COSTS))
+        self.check(driver.run(["act-1", "act-2", "act-bad"]))
@@ -0,0 +1,49 @@
+import unittest
+from mock import patch
+
+from spotinst_sdk import SpotinstClient
+from spotinst_sdk.spotinst_scale import ScaleDispatcher
+
+
+class SpotinstScaleTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.client = SpotinstClient(
+            auth_token='dummy-token',
+            account_id='dummy-account')
+        self.dispatcher = ScaleDispatcher(self.client, window=None)
+
+
+class SpotinstScaleCoalesceTest(SpotinstScaleTestCase):
+    @patch.object(SpotinstClient, 'scale_elastigroup_down')
+    @patch.object(SpotinstClient, 'scale_elastigroup_up')
+    def runTest(self, mock_up, mock_down):
+        mock_up.return_value = []
+        mock_down.return_value = []
+
+        self.dispatcher.scale_up("sig-1", 3)
+        self.dispatcher.scale_down("sig-1", 1)
+        self.dispatcher.scale_down("sig-2", 4)
+        self.dispatcher.scale_up("sig-3", 2)
+        self.dispatcher.scale_down("sig-3", 2)
+
+        results = self.dispatcher.flush()
+
+        self.assertEqual([r.key for r in results], [("sig-1", 2), ("sig-2", -4)])
+        mock_up.assert_called_once_with("sig-1", 2)
+        mock_down.assert_called_once_with("sig-2", 4)
+        self.assertDictEqual(self.dispatcher.pending(), {})
+
+
+class SpotinstScaleErrorTest(SpotinstScaleTestCase):
+    @patch.object(SpotinstClient, 'scale_elastigroup_up')
+    def runTest(self, mock_up):
+        mock_up.side_effect = [Exception("boom"), []]
+
+        self.dispatcher.scale_up("sig-1", 1)
+        self.dispatcher.scale_up("sig-2", 1)
+
+        results = self.dispatcher.flush()
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(len([r for r in results if not r.ok]), 1)
@@ -0,0 +1,120 @@
+import json
+import unittest
+from mock import patch, MagicMock
+
+from spotinst_sdk import SpotinstClient, SpotinstClientException
+from spotinst_sdk import aws_elastigroup
+from spotinst_sdk import spotinst_executor
+from spotinst_sdk.spotinst_tracing import *
+
+
+class SpotinstTracingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.finished = []
+        self.tracer = RecordingTracer(on_finish=self.finished.append)
+        self.client = SpotinstClient(auth_token='dummy-token', print_output=False,
+                                     tracer=self.tracer)
+
+    @staticmethod
+    def mock_response(status_code, body):
+        response = MagicMock()
+        response.status_code = status_code
+        response.content = json.dumps(body).encode("utf-8")
+        return response
+
+
+class SpotinstTracingPhasesTest(SpotinstTracingTestCase):
+    @patch('requests.put')
+    def runTest(self, mock_put):
+        mock_put.return_value = self.mock_response(
+            200, {"response": {"items": [{"id": "sig-1", "capacityTarget": 2}]}})
+
+        with self.tracer.trace("controller-trace") as trace_id:
+            result = self.client.update_elastigroup(
+                aws_elastigroup.Elastigroup(name="web"), "sig-1")
+
+        self.assertEqual(trace_id, "controller-trace")
+        self.assertEqual(result, {"id": "sig-1", "capacity_target": 2})
+
+        span, = self.tracer.spans()
+        self.assertEqual(span.name, "update_elastigroup")
+        self.assertEqual(span.trace_id, "controller-trace")
+        self.assertIsNone(span.parent_id)
+        self.assertIsNone(span.error)
+        self.assertEqual(list(span.phases), [SERIALIZE, NETWORK, DECODE, CONVERT])
+        self.assertLessEqual(sum(span.phases.values()), span.duration + 1e-6)
+        self.assertEqual(self.finished, [span])
+
+        headers = mock_put.call_args[1]["headers"]
+        self.assertEqual(headers[DEFAULT_HEADER], "controller-trace")
+        self.assertIn("User-Agent", headers)
+
+
+class SpotinstTracingNestedTest(SpotinstTracingTestCase):
+    @patch('requests.get')
+    def runTest(self, mock_get):
+        mock_get.side_effect = [
+            self.mock_response(200, {"response": {"items": [{"id": "sig-1"}]}}),
+            self.mock_response(400, {"response": {"errors": [{"code": "GROUP_DOESNT_EXIST"}]}})]
+
+        with self.tracer.span("reconcile") as outer:
+            self.client.get_elastigroup("sig-1")
+            with self.assertRaises(SpotinstClientException):
+                self.client.get_elastigroup("sig-2")
+
+        first, second, root = self.tracer.spans()
+
+        self.assertIs(root, outer)
+        self.assertEqual([first.parent_id, second.parent_id], [outer.span_id] * 2)
+        self.assertEqual(set([first.trace_id, second.trace_id]), set([outer.trace_id]))
+        self.assertIsNone(first.error)
+        self.assertTrue(second.error.startswith("SpotinstClientException"))
+
+        traced = [call[1]["headers"][DEFAULT_HEADER] for call in mock_get.call_args_list]
+        self.assertEqual(traced, [outer.trace_id] * 2)
+
+
+class SpotinstTracingBatchTest(SpotinstTracingTestCase):
+    @patch('requests.post')
+    def runTest(self, mock_post):
+        mock_post.side_effect = lambda *args, **kwargs: self.mock_response(
+            200, {"response": {"status": {"code": 200}}})
+
+        with self.tracer.trace("ctl"):
+            results = self.client.lock_instances(["i-1", "i-2", "i-3"], 30,
+                                                 max_workers=3)
+
+        self.assertTrue(all(result.ok for result in results))
+
+        spans = self.tracer.spans()
+        batch = spans[-1]
+        children = spans[:-1]
+
+        self.assertEqual(batch.name, "lock_instances")
+        self.assertEqual([span.name for span in children], ["lock_instance"] * 3)
+        self.assertEqual([span.parent_id for span in children], [batch.span_id] * 3)
+        self.assertEqual(set(span.trace_id for span in spans), set(["ctl"]))
+
+        traced = [call[1]["headers"][DEFAULT_HEADER] for call in mock_post.call_args_list]
+        self.assertEqual(traced, ["ctl"] * 3)
+
+        # worker threads do not keep the batch's spans afterwards
+        self.assertEqual(spotinst_executor.run_batch(
+            lambda key: self.tracer.current(), [1, 2], max_workers=2)[0].result, None)
+
+
+class SpotinstTracingDisabledTest(unittest.TestCase):
+    @patch('requests.get')
+    def runTest(self, mock_get):
+        mock_get.return_value = SpotinstTracingTestCase.mock_response(
+            200, {"response": {"items": []}})
+        client = SpotinstClient(auth_token='dummy-token', print_output=False)
+
+        client.get_elastigroups()
+
+        self.assertIs(client.tracer, NULL_TRACER)
+        self.assertNotIn(DEFAULT_HEADER, mock_get.call_args[1]["headers"])
+        self.assertEqual(SpotinstClient.get_elastigroups.__name__, "get_elastigroups")
+        self.assertFalse(hasattr(SpotinstClient.send_get, "__wrapped__"))
+        self.assertTrue(hasattr(SpotinstClient.get_elastigroups, "__wrapped__"))